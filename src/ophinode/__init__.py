@@ -6,6 +6,10 @@ __all__ = [
     "render_page",
     "render_nodes",
     "render_html",
+    "Renderer",
+    "RenderingApp",
+    "PageSource",
+    "PagedPageSource",
     "ClosedRenderable",
     "OpenRenderable",
     "Expandable",
@@ -16,6 +20,13 @@ __all__ = [
     "HTML5Layout",
     "Node",
     "TextNode",
+    "Markup",
+    "RawHTML",
+    "LazyChildren",
+    "FileText",
+    "ForEach",
+    "Field",
+    "ColumnarTable",
     "HTML5Doctype",
     "CDATASection",
     "Comment",
@@ -417,6 +428,10 @@ from .site import (
     render_page,
     render_nodes,
     render_html,
+    Renderer,
+    RenderingApp,
+    PageSource,
+    PagedPageSource,
 )
 from .nodes.base import (
     ClosedRenderable,
@@ -429,6 +444,13 @@ from .nodes.html import (
     HTML5Layout,
     Node,
     TextNode,
+    Markup,
+    RawHTML,
+    LazyChildren,
+    FileText,
+    ForEach,
+    Field,
+    ColumnarTable,
     HTML5Doctype,
     CDATASection,
     Comment,
@@ -1,5 +1,10 @@
+import sys
 import argparse
 
+from ophinode.cli.build import add_build_arguments, run_build
+from ophinode.cli.watch import add_watch_arguments, run_watch
+from ophinode.cli.serve import add_serve_arguments, run_serve
+
 EXAMPLE1 = """# Example program: render a page without defining a site.
 #
 # Running this program prints a HTML document to standard output.
@@ -166,26 +171,55 @@ if __name__ == "__main__":
     site.build_site()
 """
 
+def print_example(arguments):
+    if not arguments:
+        print(
+            "available examples: render_page, basic_site, parallel_build"
+        )
+    elif arguments[0] == "render_page":
+        print(EXAMPLE1)
+    elif arguments[0] == "basic_site":
+        print(EXAMPLE2)
+    elif arguments[0] == "parallel_build":
+        print(EXAMPLE3)
+    else:
+        print(
+            "available examples: render_page, basic_site, parallel_build"
+        )
+
 def main():
     parser = argparse.ArgumentParser(prog="ophinode")
-    parser.add_argument("subcommand", choices=["examples"])
-    parser.add_argument("arguments", nargs="*")
+    subparsers = parser.add_subparsers(dest="subcommand")
+
+    examples_parser = subparsers.add_parser(
+        "examples", help="print example programs"
+    )
+    examples_parser.add_argument("arguments", nargs="*")
+
+    build_parser = subparsers.add_parser(
+        "build", help="build a site defined in a module"
+    )
+    add_build_arguments(build_parser)
+
+    watch_parser = subparsers.add_parser(
+        "watch", help="build a site and rebuild pages when files change"
+    )
+    add_watch_arguments(watch_parser)
+
+    serve_parser = subparsers.add_parser(
+        "serve", help="serve a site, building pages when they are requested"
+    )
+    add_serve_arguments(serve_parser)
+
     args = parser.parse_args()
     if args.subcommand == "examples":
-        if not args.arguments:
-            print(
-                "available examples: render_page, basic_site, parallel_build"
-            )
-        elif args.arguments[0] == "render_page":
-            print(EXAMPLE1)
-        elif args.arguments[0] == "basic_site":
-            print(EXAMPLE2)
-        elif args.arguments[0] == "parallel_build":
-            print(EXAMPLE3)
-        else:
-            print(
-                "available examples: render_page, basic_site, parallel_build"
-            )
+        print_example(args.arguments)
+    elif args.subcommand == "build":
+        sys.exit(run_build(args))
+    elif args.subcommand == "watch":
+        sys.exit(run_watch(args))
+    elif args.subcommand == "serve":
+        sys.exit(run_serve(args))
     else:
         parser.print_help()
 
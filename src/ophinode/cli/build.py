@@ -0,0 +1,133 @@
+import sys
+import json
+import time
+import argparse
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from .site_loader import load_site_module, get_site
+
+def add_site_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "target",
+        help="path to a Python file or a module name that defines the site",
+    )
+    parser.add_argument(
+        "--site",
+        default="site",
+        metavar="NAME",
+        help="name of the Site (or a callable returning a Site) in the "
+             "module (default: site)",
+    )
+    parser.add_argument(
+        "--build-strategy",
+        choices=["sync", "parallel"],
+        help="override the build_strategy config value",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        metavar="N",
+        help="override the parallel_build_workers config value",
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        metavar="N",
+        help="override the parallel_build_chunksize config value",
+    )
+    parser.add_argument(
+        "--export-root-path",
+        metavar="PATH",
+        help="override the export_root_path config value",
+    )
+
+def add_build_arguments(parser: argparse.ArgumentParser):
+    add_site_arguments(parser)
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="print a summary of build time and memory usage",
+    )
+    parser.add_argument(
+        "--profile-json",
+        metavar="PATH",
+        help="write a summary of build time and memory usage as JSON",
+    )
+
+def get_config_overrides(args: argparse.Namespace) -> dict:
+    overrides = {}
+    if args.build_strategy is not None:
+        overrides["build_strategy"] = args.build_strategy
+    if args.workers is not None:
+        overrides["parallel_build_workers"] = args.workers
+    if args.chunksize is not None:
+        overrides["parallel_build_chunksize"] = args.chunksize
+    if args.export_root_path is not None:
+        overrides["export_root_path"] = args.export_root_path
+    return overrides
+
+def load_site(args: argparse.Namespace):
+    module = load_site_module(args.target)
+    site = get_site(module, args.site)
+    site.update_config(get_config_overrides(args))
+    return site
+
+def _get_max_rss_bytes(who):
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(who).ru_maxrss
+    # ru_maxrss is in bytes on macOS, and in kilobytes elsewhere
+    if sys.platform == "darwin":
+        return max_rss
+    return max_rss * 1024
+
+def run_build(args: argparse.Namespace) -> int:
+    load_start = time.perf_counter()
+    site = load_site(args)
+    load_time = time.perf_counter() - load_start
+
+    build_start = time.perf_counter()
+    cpu_start = time.process_time()
+    context = site.build_site()
+    build_time = time.perf_counter() - build_start
+    cpu_time = time.process_time() - cpu_start
+
+    if args.profile or args.profile_json:
+        summary = {
+            "build_strategy": site.get_config_value("build_strategy"),
+            "parallel_build_workers": site.get_config_value(
+                "parallel_build_workers"
+            ),
+            "parallel_build_chunksize": site.get_config_value(
+                "parallel_build_chunksize"
+            ),
+            "pages": len(site.get_pages()),
+            "exported_files": len(context.get_exported_file_paths()),
+            "load_time": load_time,
+            "build_time": build_time,
+            "main_process_cpu_time": cpu_time,
+            "main_process_max_rss": None,
+            "worker_processes_max_rss": None,
+        }
+        if resource is not None:
+            summary["main_process_max_rss"] = _get_max_rss_bytes(
+                resource.RUSAGE_SELF
+            )
+            summary["worker_processes_max_rss"] = _get_max_rss_bytes(
+                resource.RUSAGE_CHILDREN
+            )
+        if args.profile:
+            for k, v in summary.items():
+                if isinstance(v, float):
+                    v = "{:.3f}s".format(v)
+                elif v is not None and k.endswith("_max_rss"):
+                    v = "{:.1f} MiB".format(v / (1024 * 1024))
+                print("{:<26} {}".format(k + ":", v), file=sys.stderr)
+        if args.profile_json:
+            with open(args.profile_json, "w", encoding="utf-8") as f:
+                json.dump(summary, f, indent=2)
+
+    return 0
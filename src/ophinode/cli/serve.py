@@ -0,0 +1,281 @@
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import mimetypes
+import traceback
+import collections
+import socketserver
+import urllib.parse
+import http.server
+
+from ophinode.site.static_file import StaticFile
+from .watch import SiteWatcher, add_watch_arguments
+
+def add_serve_arguments(parser: argparse.ArgumentParser):
+    add_watch_arguments(parser)
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="address to listen on (default: 127.0.0.1)",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=8000,
+        help="port to listen on (default: 8000)",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=256,
+        metavar="N",
+        help="maximum number of page builds kept in memory (default: 256)",
+    )
+    parser.add_argument(
+        "--static-root",
+        metavar="PATH",
+        help="a directory to serve files from when a path does not belong "
+             "to a page",
+    )
+
+SERVE_CONFIG_OVERRIDES = {
+    "build_strategy"                         : "sync",
+    "auto_write_exported_page_build_files"   : False,
+    "auto_write_exported_site_build_files"   : False,
+    "return_exported_files_after_page_build" : True,
+    "gather_and_merge_page_build_results"    : True,
+}
+
+def _normalize_export_path(path: str) -> str:
+    return "/" + path.lstrip("/")
+
+class PageServer:
+    """Builds pages on request and caches the exported files.
+
+    Each page is built alone through the usual build phases. The exported
+    files of the most recently used page builds are kept in an LRU cache
+    keyed by page path and data version; the data version changes when
+    the watcher finds changed inputs. Pages of page sources are served
+    too; their paths are found by iterating the page sources once after
+    each change.
+    """
+
+    def __init__(self, args: argparse.Namespace):
+        self._args = args
+        self._lock = threading.RLock()
+        self._watcher = SiteWatcher(args)
+        self._cache = collections.OrderedDict()
+        self._cache_size = max(args.cache_size, 1)
+        self._data_version = 0
+        self._page_data_versions = {}
+        self._asset_files = None
+        self._page_source_paths = None
+        self._load_site()
+        self._watcher.take_snapshot()
+
+    def _load_site(self):
+        self._site = self._watcher.load_site()
+        self._site.update_config(SERVE_CONFIG_OVERRIDES)
+
+    def _get_page_candidates(self, request_path: str):
+        site = self._site
+        file_name = site.get_config_value("page_default_file_name")
+        suffix = site.get_config_value("page_default_file_name_suffix")
+        candidates = [request_path]
+        if file_name and request_path.endswith("/" + file_name):
+            candidates.append(request_path[:-len(file_name)])
+        if suffix and request_path.endswith(suffix):
+            candidates.append(request_path[:-len(suffix)])
+        if not request_path.endswith("/"):
+            candidates.append(request_path + "/")
+        return [x for x in candidates if self._has_page(x)]
+
+    def _has_page(self, page_path: str) -> bool:
+        if self._site.has_page(page_path):
+            return True
+        if self._page_source_paths is None:
+            self._page_source_paths = set(
+                self._site.get_page_source_paths()
+            )
+        return page_path in self._page_source_paths
+
+    def _build_page(self, page_path: str):
+        key = (
+            page_path,
+            self._data_version,
+            self._page_data_versions.get(page_path, 0),
+        )
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        context = self._site.build_site([page_path])
+        self._watcher.update_input_files(
+            context.get_input_files(), [page_path]
+        )
+        exported_files = {}
+        for path, content in context.get_exported_files().items():
+            exported_files[_normalize_export_path(path)] = content
+
+        self._cache[key] = exported_files
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return exported_files
+
+    def get_file(self, request_path: str):
+        request_path = _normalize_export_path(request_path)
+        with self._lock:
+            for page_path in self._get_page_candidates(request_path):
+                exported_files = self._build_page(page_path)
+                candidates = [request_path]
+                if request_path.endswith("/"):
+                    file_name = self._site.get_config_value(
+                        "page_default_file_name"
+                    )
+                    if file_name:
+                        candidates.append(request_path + file_name)
+                else:
+                    suffix = self._site.get_config_value(
+                        "page_default_file_name_suffix"
+                    )
+                    if suffix:
+                        candidates.append(request_path + suffix)
+                for path in candidates:
+                    if path in exported_files:
+                        return path, exported_files[path]
+
+            if self._asset_files is None:
+                self._asset_files = {}
+                assets = self._site.get_assets()
+                for export_path, path in self._site.get_asset_paths().items():
+                    self._asset_files[path] = assets[export_path]
+            if request_path in self._asset_files:
+                return request_path, self._asset_files[request_path]
+
+        static_root = self._args.static_root
+        if static_root:
+            root = os.path.abspath(static_root)
+            file_path = os.path.abspath(
+                os.path.join(root, request_path.lstrip("/"))
+            )
+            if os.path.isdir(file_path):
+                file_path = os.path.join(file_path, "index.html")
+            if (
+                file_path.startswith(root + os.sep)
+                and os.path.isfile(file_path)
+            ):
+                with open(file_path, "rb") as f:
+                    return file_path, f.read()
+
+        return None, None
+
+    def check_for_changes(self):
+        with self._lock:
+            action, paths = self._watcher.poll()
+            if action is None:
+                return
+            # changed files can change the pages defined by page sources
+            self._page_source_paths = None
+            if action == "reload":
+                print("reloading site module", file=sys.stderr)
+                try:
+                    self._load_site()
+                except Exception:
+                    traceback.print_exc()
+            if action in ("reload", "rebuild"):
+                self._data_version += 1
+                self._page_data_versions = {}
+                self._asset_files = None
+                self._cache.clear()
+            else:
+                for page_path in paths:
+                    self._page_data_versions[page_path] = (
+                        self._page_data_versions.get(page_path, 0) + 1
+                    )
+                for key in list(self._cache):
+                    if key[0] in paths:
+                        del self._cache[key]
+
+    def watch_forever(self):
+        while True:
+            time.sleep(self._args.interval)
+            try:
+                self.check_for_changes()
+            except Exception:
+                traceback.print_exc()
+
+class _ThreadingHTTPServer(
+    socketserver.ThreadingMixIn, http.server.HTTPServer
+):
+    daemon_threads = True
+
+def _create_request_handler(page_server: PageServer):
+    class RequestHandler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            self._respond(send_body=True)
+
+        def do_HEAD(self):
+            self._respond(send_body=False)
+
+        def _respond(self, send_body: bool):
+            request_path = urllib.parse.unquote(
+                urllib.parse.urlsplit(self.path).path
+            )
+            try:
+                path, content = page_server.get_file(request_path)
+            except Exception:
+                traceback.print_exc()
+                self.send_error(500, "failed to build page")
+                return
+            if path is None:
+                self.send_error(404)
+                return
+
+            if isinstance(content, StaticFile):
+                body = content.read_bytes()
+            elif isinstance(content, str):
+                body = content.encode("utf-8")
+            elif isinstance(content, (bytes, bytearray, memoryview)):
+                body = bytes(content)
+            else:
+                body = json.dumps(content).encode("utf-8")
+            content_type, _ = mimetypes.guess_type(path)
+            if content_type is None:
+                content_type = "text/html"
+            if content_type.startswith("text/"):
+                content_type += "; charset=utf-8"
+
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            if send_body:
+                self.wfile.write(body)
+
+    return RequestHandler
+
+def run_serve(args: argparse.Namespace) -> int:
+    page_server = PageServer(args)
+    watcher_thread = threading.Thread(
+        target=page_server.watch_forever, daemon=True
+    )
+    watcher_thread.start()
+
+    httpd = _ThreadingHTTPServer(
+        (args.host, args.port), _create_request_handler(page_server)
+    )
+    print(
+        "serving on http://{}:{}/".format(args.host, httpd.server_port),
+        file=sys.stderr,
+    )
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+    return 0
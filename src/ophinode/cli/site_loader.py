@@ -0,0 +1,49 @@
+import os
+import sys
+import importlib
+
+from ophinode.site.core import Site
+
+def load_site_module(target: str):
+    """Import the module that defines a site.
+
+    target is either a path to a Python file, or a dotted module name.
+    The directory of a file is added to sys.path, so that the file can
+    import its sibling modules and be imported again by worker processes.
+    """
+
+    if target.endswith(".py") or os.path.sep in target:
+        path = os.path.abspath(target)
+        if not os.path.isfile(path):
+            raise FileNotFoundError("no such file: {}".format(target))
+        directory, file_name = os.path.split(path)
+        if directory not in sys.path:
+            sys.path.insert(0, directory)
+        module_name = os.path.splitext(file_name)[0]
+        return importlib.import_module(module_name)
+    if os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())
+    return importlib.import_module(target)
+
+def get_site(module, attribute: str = "site") -> Site:
+    """Get a Site from a module attribute.
+
+    The attribute is either a Site, or a callable taking no arguments that
+    returns a Site.
+    """
+
+    if not hasattr(module, attribute):
+        raise AttributeError(
+            "module '{}' has no attribute '{}'".format(
+                module.__name__, attribute
+            )
+        )
+    site = getattr(module, attribute)
+    if not isinstance(site, Site) and callable(site):
+        site = site()
+    if not isinstance(site, Site):
+        raise TypeError(
+            "'{}' in module '{}' is not a Site, nor a callable returning "
+            "a Site".format(attribute, module.__name__)
+        )
+    return site
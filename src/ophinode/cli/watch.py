@@ -0,0 +1,250 @@
+import os
+import sys
+import time
+import argparse
+import traceback
+import multiprocessing
+
+from .build import add_site_arguments, get_config_overrides
+from .site_loader import load_site_module, get_site
+
+def add_watch_arguments(parser: argparse.ArgumentParser):
+    add_site_arguments(parser)
+    parser.add_argument(
+        "--watch",
+        action="append",
+        default=[],
+        metavar="PATH",
+        help="a content file or directory to watch for changes (can be "
+             "given multiple times)",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=0.2,
+        metavar="SECONDS",
+        help="how often to check files for changes (default: 0.2)",
+    )
+
+def _stat_file(path: str):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+def _is_excluded(path: str, excluded_directories) -> bool:
+    for directory in excluded_directories:
+        if path == directory or path.startswith(directory + os.sep):
+            return True
+    return False
+
+def _scan_directory(
+    directory: str,
+    snapshot: dict,
+    suffix: str = None,
+    excluded_directories = (),
+):
+    if _is_excluded(directory, excluded_directories):
+        return
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = [
+            d for d in dirs
+            if not d.startswith(".")
+            and d != "__pycache__"
+            and os.path.join(root, d) not in excluded_directories
+        ]
+        for file_name in files:
+            if suffix is not None and not file_name.endswith(suffix):
+                continue
+            path = os.path.join(root, file_name)
+            stat = _stat_file(path)
+            if stat is not None:
+                snapshot[path] = stat
+
+class SiteWatcher:
+    """Keeps a site loaded and finds the pages affected by file changes.
+
+    Watched files are the Python files in the directory of the site module,
+    the files in the --watch paths, and the input files declared by pages
+    through BuildContext.add_input_file(). Files are polled, because the
+    standard library has no portable file system event API.
+    """
+
+    def __init__(self, args: argparse.Namespace):
+        self._args = args
+        self._watch_paths = [os.path.abspath(x) for x in args.watch]
+        self._source_directory = None
+        self._snapshot = {}
+        self._input_files_by_page = {}
+        self._pages_by_input_file = {}
+        self.module = None
+        self.site = None
+
+    def load_site(self):
+        if self._source_directory is not None:
+            # forget modules imported from the source directory, so that
+            # they are imported again with the latest changes
+            for name, module in list(sys.modules.items()):
+                module_file = getattr(module, "__file__", None)
+                if module_file and os.path.abspath(module_file).startswith(
+                    self._source_directory + os.sep
+                ):
+                    del sys.modules[name]
+        self.module = load_site_module(self._args.target)
+        self._source_directory = os.path.dirname(
+            os.path.abspath(self.module.__file__)
+        )
+        self.site = get_site(self.module, self._args.site)
+        self.site.update_config(get_config_overrides(self._args))
+        # pages are rebuilt many times from the same site definition; only
+        # the pages selected for a build are copied, so updates stay cheap
+        self.site.set_config_value(
+            "preserve_site_definition_across_builds", True
+        )
+        return self.site
+
+    def _get_excluded_directories(self) -> set:
+        # files written by builds must not be watched, or each build would
+        # trigger the next one
+        excluded_directories = set()
+        if self.site is not None:
+            for k in ("export_root_path", "page_cache_path"):
+                path = self.site.get_config_value(k)
+                if path:
+                    excluded_directories.add(os.path.abspath(path))
+        return excluded_directories
+
+    def take_snapshot(self):
+        snapshot = {}
+        excluded_directories = self._get_excluded_directories()
+        _scan_directory(
+            self._source_directory, snapshot, ".py", excluded_directories
+        )
+        for path in self._watch_paths:
+            if os.path.isdir(path):
+                _scan_directory(path, snapshot, None, excluded_directories)
+            else:
+                stat = _stat_file(path)
+                if stat is not None:
+                    snapshot[path] = stat
+        for path in self._pages_by_input_file:
+            if path not in snapshot:
+                stat = _stat_file(path)
+                if stat is not None:
+                    snapshot[path] = stat
+        self._snapshot = snapshot
+
+    def update_input_files(self, input_files: dict, rebuilt_page_paths=None):
+        if rebuilt_page_paths is None:
+            self._input_files_by_page = {}
+        else:
+            for page_path in rebuilt_page_paths:
+                self._input_files_by_page.pop(page_path, None)
+        for page_path, file_paths in input_files.items():
+            self._input_files_by_page[page_path] = list(file_paths)
+
+        self._pages_by_input_file = {}
+        for page_path, file_paths in self._input_files_by_page.items():
+            for file_path in file_paths:
+                if file_path not in self._pages_by_input_file:
+                    self._pages_by_input_file[file_path] = set()
+                self._pages_by_input_file[file_path].add(page_path)
+                if file_path not in self._snapshot:
+                    stat = _stat_file(file_path)
+                    if stat is not None:
+                        self._snapshot[file_path] = stat
+
+    def poll(self):
+        """Check watched files for changes.
+
+        Returns a tuple of an action and a set of page paths. The action is
+        "reload" if Python source files changed, "rebuild" if files that
+        are not declared inputs of any page changed, "update" if only
+        declared inputs changed, and None if nothing changed.
+        """
+
+        previous_snapshot = self._snapshot
+        self.take_snapshot()
+        changed_files = set()
+        for path, stat in self._snapshot.items():
+            if previous_snapshot.get(path) != stat:
+                changed_files.add(path)
+        for path in previous_snapshot:
+            if path not in self._snapshot:
+                changed_files.add(path)
+
+        if not changed_files:
+            return None, set()
+
+        source_prefix = self._source_directory + os.sep
+        affected_page_paths = set()
+        for path in changed_files:
+            if path.endswith(".py") and path.startswith(source_prefix):
+                return "reload", changed_files
+            if path not in self._pages_by_input_file:
+                return "rebuild", changed_files
+            affected_page_paths.update(self._pages_by_input_file[path])
+        return "update", affected_page_paths
+
+def _create_pool(site):
+    if site.get_config_value("build_strategy") != "parallel":
+        return None
+    return multiprocessing.Pool(
+        processes=site.get_config_value("parallel_build_workers")
+    )
+
+def _close_pool(pool):
+    if pool is not None:
+        pool.terminate()
+        pool.join()
+
+def run_watch(args: argparse.Namespace) -> int:
+    watcher = SiteWatcher(args)
+    site = watcher.load_site()
+    pool = _create_pool(site)
+    try:
+        action, page_paths = "rebuild", None
+        while True:
+            if action is not None:
+                start = time.perf_counter()
+                try:
+                    if action in ("reload", "rebuild"):
+                        watcher.take_snapshot()
+                        context = site.build_site(pool=pool)
+                        watcher.update_input_files(context.get_input_files())
+                        description = "all pages"
+                    else:
+                        context = site.build_site(page_paths, pool=pool)
+                        watcher.update_input_files(
+                            context.get_input_files(), page_paths
+                        )
+                        description = "{} page(s)".format(len(page_paths))
+                except Exception:
+                    traceback.print_exc()
+                else:
+                    print(
+                        "built {} in {:.0f} ms".format(
+                            description, (time.perf_counter() - start) * 1000
+                        ),
+                        file=sys.stderr,
+                    )
+
+            time.sleep(args.interval)
+            action, page_paths = watcher.poll()
+            if action == "reload":
+                print("reloading site module", file=sys.stderr)
+                _close_pool(pool)
+                pool = None
+                try:
+                    site = watcher.load_site()
+                except Exception:
+                    traceback.print_exc()
+                    action = None
+                    continue
+                pool = _create_pool(site)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        _close_pool(pool)
+    return 0
@@ -1,2 +1,5 @@
 class InvalidAttributeNameError(Exception):
     pass
+
+class UnresolvedFieldError(Exception):
+    pass
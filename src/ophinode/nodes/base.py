@@ -16,6 +16,47 @@ class ClosedRenderable(ABC):
         "Disallow inserting auto newline after this renderable."
         return False
 
+    @property
+    def auto_indent_for_me(self):
+        """Insert indentation after each newline in the render result.
+
+        If False, the render result is output verbatim even when auto
+        indentation is enabled in the current context.
+        """
+
+        return True
+
+    @property
+    def renders_in_chunks(self):
+        """Render with iter_render() instead of render().
+
+        If True, the render result is consumed chunk by chunk as it is
+        produced, so it never needs to be held in memory as a whole when
+        the output is streamed.
+        """
+
+        return False
+
+    def iter_render(self, context: "ophinode.site.BuildContext"):
+        "Yield the render result in chunks."
+        yield self.render(context)
+
+    def iter_render_with_state(
+        self,
+        context: "ophinode.site.BuildContext",
+        state: tuple,
+    ):
+        """Yield the render result in chunks, given the render state.
+
+        state is a tuple of whether auto newline and auto indentation are
+        enabled where this renderable is rendered, and a tuple of the
+        indentation strings of the open renderables enclosing it. It lets
+        renderables that render nodes of their own render them as if they
+        were in place of this renderable, and is ignored by default.
+        """
+
+        return self.iter_render(context)
+
 class OpenRenderable(ABC):
     @abstractmethod
     def render_start(self, context: "ophinode.site.BuildContext"):
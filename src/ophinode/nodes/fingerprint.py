@@ -0,0 +1,157 @@
+import sys
+import pickle
+import hashlib
+if sys.version_info.major == 3 and sys.version_info.minor < 9:
+    from typing import Mapping
+else:
+    from collections.abc import Mapping
+from typing import Any, Union
+
+_SCALAR_TYPES = (bool, int, float, complex, bytes, type(None))
+
+# methods that are given the build context, through which a node can read
+# site data and render differently without any change of its own state
+_CONTEXT_METHOD_NAMES = (
+    "prepare",
+    "expand",
+    "render",
+    "iter_render",
+    "iter_render_with_state",
+    "render_start",
+    "render_end",
+)
+_reads_build_context_by_type = {}
+
+def digest(*parts: Union[str, bytes]) -> str:
+    """Return a digest of the given parts.
+
+    The parts are hashed through their repr(), which quotes and escapes
+    each part, so different sequences of parts never produce the same input
+    to the hash function.
+    """
+
+    data = repr(parts).encode("utf-8", "backslashreplace")
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def _type_name(value: Any) -> str:
+    cls = value.__class__
+    return "{}.{}".format(cls.__module__, cls.__qualname__)
+
+def _is_ophinode_type(cls: type) -> bool:
+    return cls.__module__ == "ophinode" or cls.__module__.startswith(
+        "ophinode."
+    )
+
+def _reads_build_context(cls: type) -> bool:
+    """Return whether instances of cls may render from the build context.
+
+    This is the case if a class outside ophinode defines one of the
+    methods that are given the build context, and fingerprint() is not
+    defined outside ophinode as well.
+    """
+
+    try:
+        return _reads_build_context_by_type[cls]
+    except KeyError:
+        pass
+    result = False
+    for base in cls.__mro__:
+        if "fingerprint" in base.__dict__:
+            if not _is_ophinode_type(base):
+                # an explicit fingerprint() describes what the methods read
+                break
+        if not _is_ophinode_type(base) and any(
+            name in base.__dict__ for name in _CONTEXT_METHOD_NAMES
+        ):
+            result = True
+            break
+    _reads_build_context_by_type[cls] = result
+    return result
+
+def fingerprint(value: Any, memo: Union[dict, None] = None):
+    """Return a structural fingerprint of a value, or None.
+
+    Nodes provide their own fingerprint() method. Strings, scalars,
+    sequences and mappings are fingerprinted by their contents, and other
+    objects by their type and instance attributes. None is returned if a
+    value (or any value it contains) cannot be fingerprinted, e.g. a
+    callable, a generator, or an object of a class outside ophinode that
+    defines prepare(), expand() or a render method but no fingerprint().
+
+    memo maps ids of already fingerprinted objects to their fingerprints,
+    so that subtrees shared in a tree are fingerprinted only once.
+    """
+
+    if memo is None:
+        memo = {}
+    try:
+        return _fingerprint(value, memo)
+    except RecursionError:
+        return None
+
+def _fingerprint(value: Any, memo: dict):
+    if isinstance(value, str):
+        if type(value) is str:
+            return digest("str", value)
+        # str subclasses such as Markup render differently from str
+        return digest(_type_name(value), str(value))
+    if isinstance(value, _SCALAR_TYPES):
+        return digest(_type_name(value), repr(value))
+
+    key = id(value)
+    if key in memo:
+        # memo[key] is None while the value is being fingerprinted, which
+        # means that the value contains itself
+        return memo[key]
+    memo[key] = None
+
+    method = getattr(value, "fingerprint", None)
+    reads_build_context = _reads_build_context_by_type.get(value.__class__)
+    if reads_build_context is None:
+        reads_build_context = _reads_build_context(value.__class__)
+    if reads_build_context:
+        # the output can depend on the build context, e.g. site data
+        result = None
+    elif callable(method) and not isinstance(value, type):
+        result = method(memo)
+    elif isinstance(value, (list, tuple)):
+        result = fingerprint_sequence(_type_name(value), value, memo)
+    elif isinstance(value, Mapping):
+        result = fingerprint_mapping(_type_name(value), value, memo)
+    elif callable(value):
+        # the result of calling a callable can differ on every build
+        result = None
+    elif not hasattr(value, "__dict__"):
+        result = _fingerprint_by_pickling(value)
+    else:
+        result = fingerprint_mapping(_type_name(value), vars(value), memo)
+
+    memo[key] = result
+    return result
+
+def fingerprint_sequence(type_name: str, values, memo: dict):
+    parts = [type_name]
+    for v in values:
+        fp = _fingerprint(v, memo)
+        if fp is None:
+            return None
+        parts.append(fp)
+    return digest(*parts)
+
+def fingerprint_mapping(type_name: str, mapping, memo: dict):
+    parts = [type_name]
+    for k, v in mapping.items():
+        fp_k = _fingerprint(k, memo)
+        fp_v = _fingerprint(v, memo)
+        if fp_k is None or fp_v is None:
+            return None
+        parts.append(fp_k)
+        parts.append(fp_v)
+    return digest(*parts)
+
+def _fingerprint_by_pickling(value: Any):
+    try:
+        data = pickle.dumps(value, protocol=4)
+    except Exception:
+        return None
+    return digest("pickle", data)
@@ -3,6 +3,13 @@ __all__ = [
     "HTML5Layout",
     "Node",
     "TextNode",
+    "Markup",
+    "RawHTML",
+    "LazyChildren",
+    "FileText",
+    "ForEach",
+    "Field",
+    "ColumnarTable",
     "HTML5Doctype",
     "CDATASection",
     "Comment",
@@ -400,6 +407,10 @@ __all__ = [
 from .core import (
     Node,
     TextNode,
+    Markup,
+    RawHTML,
+    LazyChildren,
+    FileText,
     HTML5Doctype,
     CDATASection,
     Comment,
@@ -408,6 +419,13 @@ from .core import (
     ClosedElement,
 )
 
+from .for_each import (
+    ForEach,
+    Field,
+)
+
+from .columnar_table import ColumnarTable
+
 from .templates import (
     HTML5Page,
     HTML5Layout,
@@ -0,0 +1,276 @@
+import sys
+if sys.version_info.major == 3 and sys.version_info.minor < 9:
+    from typing import Iterator, Mapping, Sequence
+else:
+    from collections.abc import Iterator, Mapping, Sequence
+from typing import Any, Union
+
+from ..fingerprint import digest, fingerprint, fingerprint_sequence
+from .core import Markup, is_markup, _type_name
+from .elements.fullname import (
+    TableElement,
+    TableHeadElement,
+    TableBodyElement,
+    TableRowElement,
+    TableHeaderCellElement,
+    TableDataCellElement,
+)
+from .for_each import ForEach, Field, _convert_value
+from ophinode.rendering.render_node import render_events
+
+# rows whose cells are converted and escaped together
+_ROWS_PER_BATCH = 4096
+
+class ColumnarTable(TableElement):
+    """A table rendered from columns of data.
+
+    columns is a sequence of columns, or a mapping of headers to columns.
+    A column can be any sequence, such as a list, an array.array or a
+    one-dimensional NumPy array. Values are passed to the formatter of
+    their column if there is one, and numbers are converted to str. None
+    renders as an empty cell.
+
+    The output is the same as a table of TableRowElement and
+    TableDataCellElement objects, but no element is created for a row or
+    a cell. Rows are rendered in batches: the values of each column in a
+    batch are escaped at once, and each row is rendered with a format
+    string compiled from the row template (see ForEach).
+
+    formatters is a sequence of callables (or None) for each column, or a
+    mapping of column indices or headers to callables. Other arguments
+    are the same as TableElement's, and children given as arguments are
+    rendered before the header row.
+    """
+
+    def __init__(
+        self,
+        columns: Union[Sequence[Sequence], Mapping[Any, Sequence]],
+        *args,
+        headers: Union[Sequence, None] = None,
+        formatters: Union[Sequence, Mapping, None] = None,
+        **kwargs
+    ):
+        super().__init__(*args, **kwargs)
+        if isinstance(columns, Mapping):
+            if headers is None:
+                headers = list(columns.keys())
+            columns = list(columns.values())
+        else:
+            columns = list(columns)
+        if len(set(len(column) for column in columns)) > 1:
+            raise ValueError("all columns must have the same length")
+        if headers is not None:
+            headers = list(headers)
+            if len(headers) != len(columns):
+                raise ValueError(
+                    "number of headers must equal the number of columns"
+                )
+        self._columns = columns
+        self._headers = headers
+        self._formatters = _resolve_formatters(formatters, columns, headers)
+
+    def fingerprint(self, memo: dict = None):
+        if memo is None:
+            memo = {}
+        fp_element = super().fingerprint(memo)
+        fp_columns = fingerprint_sequence("columns", self._columns, memo)
+        fp_headers = fingerprint(self._headers, memo)
+        fp_formatters = fingerprint(self._formatters, memo)
+        if (
+            fp_element is None
+            or fp_columns is None
+            or fp_headers is None
+            or fp_formatters is None
+        ):
+            return None
+        return digest(
+            _type_name(self),
+            fp_element,
+            fp_columns,
+            fp_headers,
+            fp_formatters,
+        )
+
+    def expand(self, context: "ophinode.site.BuildContext"):
+        expansion = super().expand(context)
+        if self._headers is not None:
+            expansion.append(
+                TableHeadElement(
+                    TableRowElement([
+                        TableHeaderCellElement(_convert_value(header))
+                        for header in self._headers
+                    ])
+                )
+            )
+        expansion.append(
+            TableBodyElement(_ColumnarRows(self._columns, self._formatters))
+        )
+        return expansion
+
+    @property
+    def columns(self):
+        return self._columns
+
+    @property
+    def headers(self):
+        return self._headers
+
+class _ColumnarRows(ForEach):
+    # the rows of a ColumnarTable, as a ForEach over row tuples whose
+    # template has a field for each column
+    def __init__(self, columns: list, formatters: list):
+        template = TableRowElement([
+            TableDataCellElement(Field(i)) for i in range(len(columns))
+        ])
+        super().__init__(template, ())
+        self._columns = columns
+        self._formatters = formatters
+        self._row_count = len(columns[0]) if columns else 0
+
+    @property
+    def rows(self):
+        return self._iter_rows()
+
+    def _iter_rows(self) -> Iterator[tuple]:
+        for start in range(0, self._row_count, _ROWS_PER_BATCH):
+            yield from zip(*self._get_batch_values(start))
+
+    def _get_batch_values(self, start: int) -> list:
+        end = start + _ROWS_PER_BATCH
+        batch_values = []
+        for column, formatter in zip(self._columns, self._formatters):
+            values = column[start:end]
+            if hasattr(values, "tolist"):
+                # array.array and NumPy arrays convert their items to
+                # Python objects at once
+                values = values.tolist()
+            if formatter is not None:
+                values = [formatter(v) for v in values]
+            batch_values.append(_convert_column(values))
+        return batch_values
+
+    def iter_render_with_state(
+        self,
+        context: "ophinode.site.BuildContext",
+        state: tuple,
+    ) -> Iterator[str]:
+        compiled = self._get_compiled_template(context, state)
+        if compiled is None:
+            yield from render_events(
+                context._iter_expansion_events(
+                    map(self._instantiate, self._iter_rows())
+                ),
+                context,
+                None,
+                state,
+            )
+            return
+
+        head, fields, separator = compiled
+        row_format = _make_row_format(head, fields)
+        tables = {}
+        for key, is_text, is_asset_url, table, markup_table, tail in fields:
+            tables[key] = (table, markup_table)
+
+        for start in range(0, self._row_count, _ROWS_PER_BATCH):
+            batch_values = self._get_batch_values(start)
+            batch_cells = []
+            irregular_rows = set()
+            for key, values in enumerate(batch_values):
+                table, markup_table = tables[key]
+                batch_cells.append(
+                    _escape_column(values, table, markup_table, irregular_rows)
+                )
+            rendered_rows = list(map(row_format.format, *batch_cells))
+            for i in sorted(irregular_rows):
+                row = tuple(values[i] for values in batch_values)
+                rendered_rows[i] = self._render_irregular_row(
+                    context, state, fields, row
+                )
+            if start:
+                yield separator
+            yield separator.join(rendered_rows)
+
+def _escape_column(
+    values: list,
+    table: dict,
+    markup_table: dict,
+    irregular_rows: set,
+) -> list:
+    # escapes the values of a column at once, and adds the rows with cells
+    # that the row format string cannot render to irregular_rows
+    if all(type(v) is str and v for v in values):
+        joined = "\x00".join(values)
+        if table:
+            joined = joined.translate(table)
+        cells = joined.split("\x00")
+        if len(cells) == len(values):
+            return cells
+    cells = []
+    for i, v in enumerate(values):
+        if type(v) is not str:
+            if not isinstance(v, str):
+                irregular_rows.add(i)
+                cells.append("")
+                continue
+            if is_markup(v):
+                if not isinstance(v, Markup):
+                    v = v.__html__()
+                v = str(v)
+                if not v:
+                    irregular_rows.add(i)
+                cells.append(v.translate(markup_table))
+                continue
+            v = str(v)
+        if not v:
+            irregular_rows.add(i)
+        cells.append(v.translate(table))
+    return cells
+
+def _make_row_format(head: str, fields: list) -> str:
+    parts = [head.replace("{", "{{").replace("}", "}}")]
+    for key, is_text, is_asset_url, table, markup_table, tail in fields:
+        parts.append("{" + str(key) + "}")
+        parts.append(tail.replace("{", "{{").replace("}", "}}"))
+    return "".join(parts)
+
+def _convert_column(values: list) -> list:
+    if all(type(v) is str for v in values):
+        return values
+    if all(type(v) is int or type(v) is float for v in values):
+        return list(map(str, values))
+    return [v if type(v) is str else _convert_cell_value(v) for v in values]
+
+def _convert_cell_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    return _convert_value(value)
+
+def _resolve_formatters(
+    formatters: Union[Sequence, Mapping, None],
+    columns: list,
+    headers: Union[list, None],
+) -> list:
+    resolved = [None] * len(columns)
+    if formatters is None:
+        return resolved
+    if isinstance(formatters, Mapping):
+        for k, formatter in formatters.items():
+            if headers is not None and k in headers:
+                index = headers.index(k)
+            elif isinstance(k, int) and 0 <= k < len(columns):
+                index = k
+            else:
+                raise ValueError("unknown column: {!r}".format(k))
+            resolved[index] = formatter
+    else:
+        formatters = list(formatters)
+        if len(formatters) != len(columns):
+            raise ValueError(
+                "number of formatters must equal the number of columns"
+            )
+        resolved = formatters
+    for formatter in resolved:
+        if formatter is not None and not callable(formatter):
+            raise TypeError("formatters must be callable or None")
+    return resolved
@@ -1,13 +1,48 @@
+import os
+import sys
+import mmap
+import codecs
+if sys.version_info.major == 3 and sys.version_info.minor < 9:
+    from typing import Iterator
+else:
+    from collections.abc import Iterator
+from typing import Union
+
 from ..base import (
     ClosedRenderable,
     OpenRenderable,
     Expandable,
     Preparable,
 )
+from ..fingerprint import (
+    digest,
+    fingerprint,
+    fingerprint_sequence,
+    fingerprint_mapping,
+    _is_ophinode_type,
+    _reads_build_context,
+)
 from ophinode.exceptions import InvalidAttributeNameError
 
 class Node:
-    pass
+    def fingerprint(self, memo: dict = None):
+        """Return a structural fingerprint of this node, or None.
+
+        Two nodes with the same fingerprint render the same output. None is
+        returned if this node contains a value that cannot be fingerprinted,
+        or if its class can render from the build context (see
+        ophinode.nodes.fingerprint.fingerprint()).
+        """
+
+        if _reads_build_context(type(self)):
+            return None
+        if memo is None:
+            memo = {}
+        return fingerprint_mapping(_type_name(self), vars(self), memo)
+
+def _type_name(value):
+    cls = value.__class__
+    return "{}.{}".format(cls.__module__, cls.__qualname__)
 
 class TextNode(Node, ClosedRenderable):
     def __init__(
@@ -20,6 +55,19 @@ class TextNode(Node, ClosedRenderable):
         self._text_content = text_content
         self._escape_ampersands = escape_ampersands
         self._escape_tag_delimiters = escape_tag_delimiters
+        self._fingerprint = None
+
+    def fingerprint(self, memo: dict = None):
+        # text nodes only change through escape_*() methods, which reset
+        # the memoized fingerprint
+        if getattr(self, "_fingerprint", None) is None:
+            self._fingerprint = digest(
+                _type_name(self),
+                self._text_content,
+                repr(self._escape_ampersands),
+                repr(self._escape_tag_delimiters),
+            )
+        return self._fingerprint
 
     def render(self, context: "ophinode.site.BuildContext"):
         text_content = self._text_content
@@ -44,12 +92,230 @@ class TextNode(Node, ClosedRenderable):
 
     def escape_ampersands(self, value: bool = True):
         self._escape_ampersands = bool(value)
+        self._fingerprint = None
         return self
 
     def escape_tag_delimiters(self, value: bool = True):
         self._escape_tag_delimiters = bool(value)
+        self._fingerprint = None
+        return self
+
+    @property
+    def prevent_auto_newline_before_me(self):
+        return True
+
+    @property
+    def prevent_auto_newline_after_me(self):
+        return False
+
+class Markup(str):
+    """A str of HTML that is output verbatim instead of being escaped.
+
+    Markup objects can be given wherever text is accepted, and are
+    expanded into RawHTML nodes. Note that str operations on Markup
+    objects, such as concatenation, return plain str objects.
+    """
+
+    __slots__ = ()
+
+    def __repr__(self):
+        return "Markup({})".format(str.__repr__(self))
+
+    def __html__(self):
         return self
 
+def is_markup(value: str) -> bool:
+    """Return whether a str is pre-escaped HTML.
+
+    Besides Markup, this accepts str subclasses from other libraries that
+    implement __html__(), such as markupsafe.Markup.
+    """
+
+    return type(value) is not str and hasattr(value, "__html__")
+
+class RawHTML(Node, ClosedRenderable):
+    """A node of pre-escaped HTML, which is rendered as is.
+
+    The HTML is never escaped or otherwise processed, so rendering it
+    costs a single append. If auto_indent is False, it is also exempt
+    from auto indentation, so newlines in it are output verbatim.
+    """
+
+    def __init__(self, html: str, *, auto_indent: bool = True):
+        if not isinstance(html, str):
+            raise TypeError(
+                "html must be a str, not {}".format(html.__class__.__name__)
+            )
+        if is_markup(html) and not isinstance(html, Markup):
+            html = html.__html__()
+        self._html = html
+        self._auto_indent = auto_indent
+
+    def fingerprint(self, memo: dict = None):
+        return digest(
+            _type_name(self),
+            str(self._html),
+            repr(self._auto_indent),
+        )
+
+    def render(self, context: "ophinode.site.BuildContext"):
+        return self._html
+
+    @property
+    def html(self):
+        return self._html
+
+    @property
+    def prevent_auto_newline_before_me(self):
+        return True
+
+    @property
+    def prevent_auto_newline_after_me(self):
+        return False
+
+    @property
+    def auto_indent_for_me(self):
+        return self._auto_indent
+
+class LazyChildren:
+    """Children of an OpenElement that are created as they are expanded.
+
+    factory is a callable that returns an iterable of children, such as
+    a generator function. It is called each time the children are needed,
+    so the element can be rendered more than once, and the items are
+    consumed one at a time instead of being stored in the element. Items
+    are converted the same way as other children of the element.
+    """
+
+    __slots__ = ("_factory",)
+
+    def __init__(self, factory):
+        if not callable(factory):
+            raise TypeError(
+                "factory must be callable, not {}".format(
+                    factory.__class__.__name__
+                )
+            )
+        self._factory = factory
+
+    def __iter__(self):
+        return iter(self._factory())
+
+    def fingerprint(self, memo: dict = None):
+        # the children are unknown until the factory is called
+        return None
+
+    @property
+    def factory(self):
+        return self._factory
+
+class FileText(Node, ClosedRenderable):
+    """A text node whose content is read from a file when rendered.
+
+    Only the path of the file is kept in the node, and the file is
+    memory-mapped and decoded, escaped and rendered in chunks of
+    read_size bytes, so its content is never held in memory as a whole
+    when the output is streamed. The text is escaped like TextNode does.
+
+    The fingerprint of the node is computed from the path, size and
+    modification time of the file, and is None if the file does not
+    exist.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, "os.PathLike"],
+        *,
+        encoding: str = "utf-8",
+        errors: str = "strict",
+        escape_ampersands: bool = None,
+        escape_tag_delimiters: bool = None,
+        read_size: int = 1 << 20,
+    ):
+        if not isinstance(path, (str, os.PathLike)):
+            raise TypeError(
+                "path must be a str or a path-like object, not {}".format(
+                    path.__class__.__name__
+                )
+            )
+        if read_size <= 0:
+            raise ValueError("read_size must be a positive int")
+        codecs.lookup(encoding)
+        self._path = os.fspath(path)
+        self._encoding = encoding
+        self._errors = errors
+        self._escape_ampersands = escape_ampersands
+        self._escape_tag_delimiters = escape_tag_delimiters
+        self._read_size = read_size
+
+    def fingerprint(self, memo: dict = None):
+        try:
+            stat_result = os.stat(self._path)
+        except OSError:
+            return None
+        return digest(
+            _type_name(self),
+            self._path,
+            str(stat_result.st_size),
+            str(stat_result.st_mtime_ns),
+            self._encoding,
+            self._errors,
+            repr(self._escape_ampersands),
+            repr(self._escape_tag_delimiters),
+        )
+
+    def render(self, context: "ophinode.site.BuildContext"):
+        return "".join(self.iter_render(context))
+
+    def iter_render(self, context: "ophinode.site.BuildContext"):
+        escape_ampersands = self._escape_ampersands
+        if escape_ampersands is None:
+            escape_ampersands = context.get_config_value(
+                "html_default_escape_ampersands"
+            )
+        escape_tag_delimiters = self._escape_tag_delimiters
+        if escape_tag_delimiters is None:
+            escape_tag_delimiters = context.get_config_value(
+                "html_default_escape_tag_delimiters"
+            )
+
+        for text_content in self._iter_decode():
+            if escape_ampersands:
+                text_content = text_content.replace("&", "&amp;")
+            if escape_tag_delimiters:
+                text_content = (
+                    text_content.replace("<", "&lt;").replace(">", "&gt;")
+                )
+            yield text_content
+
+    def _iter_decode(self):
+        # the incremental decoder keeps multibyte sequences that are split
+        # between two chunks until the rest of them is read
+        decoder = codecs.getincrementaldecoder(self._encoding)(self._errors)
+        for data in self._iter_read():
+            yield decoder.decode(data)
+        yield decoder.decode(b"", True)
+
+    def _iter_read(self):
+        with open(self._path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            # empty files cannot be memory-mapped
+            if size > 0:
+                read_size = self._read_size
+                with mmap.mmap(
+                    f.fileno(), 0, access=mmap.ACCESS_READ
+                ) as m:
+                    for offset in range(0, size, read_size):
+                        yield m[offset:offset + read_size]
+
+    @property
+    def path(self):
+        return self._path
+
+    @property
+    def renders_in_chunks(self):
+        return True
+
     @property
     def prevent_auto_newline_before_me(self):
         return True
@@ -59,6 +325,9 @@ class TextNode(Node, ClosedRenderable):
         return False
 
 class HTML5Doctype(Node, ClosedRenderable):
+    def fingerprint(self, memo: dict = None):
+        return digest(_type_name(self))
+
     def render(self, context: "ophinode.site.BuildContext"):
         return "<!doctype html>"
 
@@ -74,6 +343,11 @@ class CDATASection(Node, OpenRenderable, Expandable, Preparable):
     def __init__(self, *args):
         self._children = list(args)
 
+    def fingerprint(self, memo: dict = None):
+        if memo is None:
+            memo = {}
+        return fingerprint_sequence(_type_name(self), self._children, memo)
+
     def prepare(self, context: "ophinode.site.BuildContext"):
         for c in self._children:
             if isinstance(c, Preparable):
@@ -83,10 +357,10 @@ class CDATASection(Node, OpenRenderable, Expandable, Preparable):
         return self._children.copy()
 
     def render_start(self, context: "ophinode.site.BuildContext"):
-        return "<![CDATA[".format(self.tag)
+        return "<![CDATA["
 
     def render_end(self, context: "ophinode.site.BuildContext"):
-        return "]]>".format(self.tag)
+        return "]]>"
 
     @property
     def children(self):
@@ -120,6 +394,11 @@ class Comment(Node, OpenRenderable, Expandable, Preparable):
     def __init__(self, *args):
         self._children = list(args)
 
+    def fingerprint(self, memo: dict = None):
+        if memo is None:
+            memo = {}
+        return fingerprint_sequence(_type_name(self), self._children, memo)
+
     def prepare(self, context: "ophinode.site.BuildContext"):
         for c in self._children:
             if isinstance(c, Preparable):
@@ -129,10 +408,10 @@ class Comment(Node, OpenRenderable, Expandable, Preparable):
         return self._children.copy()
 
     def render_start(self, context: "ophinode.site.BuildContext"):
-        return "<!--".format(self.tag)
+        return "<!--"
 
     def render_end(self, context: "ophinode.site.BuildContext"):
-        return "-->".format(self.tag)
+        return "-->"
 
     @property
     def auto_newline_for_children(self):
@@ -158,7 +437,80 @@ class Comment(Node, OpenRenderable, Expandable, Preparable):
     def auto_indent_for_children(self):
         return False
 
+# values of these attributes are rewritten to fingerprinted asset URLs
+_ASSET_URL_ATTRIBUTE_NAMES = frozenset(("href", "src", "poster"))
+
 class Element(Node):
+    # "<tag", "<tag>" and "</tag>", set for each subclass that defines a tag,
+    # and the tag they were created from
+    _start_tag_prefix = None
+    _start_tag = None
+    _end_tag = None
+    _cached_tag = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if "tag" not in cls.__dict__:
+            return
+        tag = cls.__dict__["tag"]
+        if isinstance(tag, str):
+            cls._start_tag_prefix = "<" + tag
+            cls._start_tag = "<" + tag + ">"
+            cls._end_tag = "</" + tag + ">"
+            cls._cached_tag = tag
+        else:
+            # e.g. a property, which must be evaluated for every render
+            cls._start_tag_prefix = None
+            cls._start_tag = None
+            cls._end_tag = None
+            cls._cached_tag = None
+
+    def _render_start_tag(self, context: "ophinode.site.BuildContext"):
+        start_tag_prefix = self._start_tag_prefix
+        if (
+            start_tag_prefix is None
+            or self._cached_tag != self.tag
+            or type(self).render_attributes is not Element.render_attributes
+        ):
+            # the tag was reassigned, or attributes are rendered by a
+            # subclass even if there are none
+            rendered_attributes = self.render_attributes(context)
+            if rendered_attributes:
+                return "<{} {}>".format(self.tag, rendered_attributes)
+            return "<{}>".format(self.tag)
+        if not self._attributes:
+            return self._start_tag
+        rendered_attributes = self.render_attributes(context)
+        if rendered_attributes:
+            return start_tag_prefix + " " + rendered_attributes + ">"
+        return self._start_tag
+
+    def fingerprint(self, memo: dict = None):
+        if memo is None:
+            memo = {}
+        if not _is_ophinode_type(type(self)):
+            # subclasses outside ophinode may render from state of their own
+            return Node.fingerprint(self, memo)
+        parts = [
+            _type_name(self),
+            self.tag,
+            repr(self._escape_ampersands),
+            repr(self._escape_tag_delimiters),
+        ]
+        for k in sorted(self._attributes, key=str):
+            fp = fingerprint(self._attributes[k], memo)
+            if fp is None:
+                return None
+            parts.append(str(k))
+            parts.append(fp)
+        children = getattr(self, "_children", None)
+        if children is not None:
+            fp = fingerprint_sequence("children", children, memo)
+            if fp is None:
+                return None
+            parts.append(fp)
+        return digest(*parts)
+
     def render_attributes(self, context: "ophinode.site.BuildContext"):
         attribute_order = []
         keys = set(self._attributes)
@@ -180,6 +532,8 @@ class Element(Node):
                 if v:
                     rendered.append("{}".format(k))
             else:
+                if k in _ASSET_URL_ATTRIBUTE_NAMES and isinstance(v, str):
+                    v = context.get_asset_url(v)
                 escaped = str(v)
 
                 escape_ampersands = self._escape_ampersands
@@ -244,11 +598,19 @@ class OpenElement(Element, OpenRenderable, Expandable, Preparable):
             if isinstance(arg, dict):
                 for k, v in arg.items():
                     self._attributes[k] = v
+            elif isinstance(arg, Iterator):
+                # iterators and generators can only be consumed once, so
+                # their items are stored to render this element again
+                for c in arg:
+                    self._children.append(c)
             else:
                 self._children.append(arg)
         if children is not None:
-            for c in children:
-                self._children.append(c)
+            if isinstance(children, LazyChildren):
+                self._children.append(children)
+            else:
+                for c in children:
+                    self._children.append(c)
         if attributes is not None:
             for k, v in attributes.items():
                 self._attributes[k] = v
@@ -280,31 +642,50 @@ class OpenElement(Element, OpenRenderable, Expandable, Preparable):
 
     def prepare(self, context: "ophinode.site.BuildContext"):
         for c in self._children:
-            if isinstance(c, Preparable):
+            if isinstance(c, LazyChildren):
+                for item in c:
+                    if isinstance(item, Preparable):
+                        item.prepare(context)
+            elif isinstance(c, Preparable):
                 c.prepare(context)
 
     def expand(self, context: "ophinode.site.BuildContext"):
         expansion = []
         for c in self._children:
-            if isinstance(c, str):
-                node = TextNode(c)
-                if self._escape_ampersands is not None:
-                    node.escape_ampersands(self._escape_ampersands)
-                if self._escape_tag_delimiters is not None:
-                    node.escape_tag_delimiters(self._escape_tag_delimiters)
-                expansion.append(node)
+            if isinstance(c, LazyChildren):
+                # items are converted as they are consumed
+                expansion.append(map(self._expand_child, c))
             else:
-                expansion.append(c)
+                expansion.append(self._expand_child(c))
         return expansion
 
+    def _expand_child(self, c):
+        """Return the node that a child of this element is expanded into.
+
+        Subclasses that convert str children differently override this
+        instead of expand(), so that items of LazyChildren are converted
+        the same way.
+        """
+
+        if not isinstance(c, str):
+            return c
+        if is_markup(c):
+            return RawHTML(c)
+        node = TextNode(c)
+        if self._escape_ampersands is not None:
+            node.escape_ampersands(self._escape_ampersands)
+        if self._escape_tag_delimiters is not None:
+            node.escape_tag_delimiters(self._escape_tag_delimiters)
+        return node
+
     def render_start(self, context: "ophinode.site.BuildContext"):
-        rendered_attributes = self.render_attributes(context)
-        if rendered_attributes:
-            return "<{} {}>".format(self.tag, rendered_attributes)
-        return "<{}>".format(self.tag)
+        return self._render_start_tag(context)
 
     def render_end(self, context: "ophinode.site.BuildContext"):
-        return "</{}>".format(self.tag)
+        end_tag = self._end_tag
+        if end_tag is None or self._cached_tag != self.tag:
+            return "</{}>".format(self.tag)
+        return end_tag
 
     @property
     def children(self):
@@ -395,10 +776,7 @@ class ClosedElement(Element, ClosedRenderable):
         self._escape_tag_delimiters = escape_tag_delimiters
 
     def render(self, context: "ophinode.site.BuildContext"):
-        rendered_attributes = self.render_attributes(context)
-        if rendered_attributes:
-            return "<{} {}>".format(self.tag, rendered_attributes)
-        return "<{}>".format(self.tag)
+        return self._render_start_tag(context)
 
     @property
     def prevent_auto_newline_before_me(self):
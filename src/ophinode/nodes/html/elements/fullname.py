@@ -221,21 +221,17 @@ class StyleElement(OpenElement):
             **kwargs
         )
 
-    def expand(self, context: "ophinode.site.BuildContext"):
-        expansion = []
-        for c in self._children:
-            if isinstance(c, str):
-                # Stylesheets might contain "</style", so it must be escaped
-                content = c.replace("</style", "\\3C/style")
-                node = TextNode(content)
-                if self._escape_ampersands is not None:
-                    node.escape_ampersands(self._escape_ampersands)
-                if self._escape_tag_delimiters is not None:
-                    node.escape_tag_delimiters(self._escape_tag_delimiters)
-                expansion.append(node)
-            else:
-                expansion.append(c)
-        return expansion
+    def _expand_child(self, c):
+        if not isinstance(c, str):
+            return c
+        # Stylesheets might contain "</style", so it must be escaped
+        content = c.replace("</style", "\\3C/style")
+        node = TextNode(content)
+        if self._escape_ampersands is not None:
+            node.escape_ampersands(self._escape_ampersands)
+        if self._escape_tag_delimiters is not None:
+            node.escape_tag_delimiters(self._escape_tag_delimiters)
+        return node
 
 # --- Sections ---
 
@@ -670,43 +666,39 @@ class ScriptElement(OpenElement):
             **kwargs
         )
 
-    def expand(self, context: "ophinode.site.BuildContext"):
-        expansion = []
-        for c in self._children:
-            if isinstance(c, str):
-                # Due to restrictions for contents of script elements, some
-                # sequences of characters must be replaced before constructing
-                # a script element.
-                # 
-                # Unfortunately, correctly replacing such character sequences
-                # require a full lexical analysis on the script content, but
-                # ophinode is currently incapable of doing so.
-                #
-                # However, the sequences are expected to be rarely seen
-                # outside literals, so replacements are done nonetheless.
-                #
-                # This behavior might change in the later versions of ophinode
-                # when it starts to better support inline scripting.
-                #
-                # Read https://html.spec.whatwg.org/multipage/scripting.html#restrictions-for-contents-of-script-elements
-                # for more information.
-                #
-                content = c.replace(
-                    "<!--", "\\x3C!--"
-                ).replace(
-                    "<script", "\\x3Cscript"
-                ).replace(
-                    "</script", "\\x3C/script"
-                )
-                node = TextNode(content)
-                if self._escape_ampersands is not None:
-                    node.escape_ampersands(self._escape_ampersands)
-                if self._escape_tag_delimiters is not None:
-                    node.escape_tag_delimiters(self._escape_tag_delimiters)
-                expansion.append(node)
-            else:
-                expansion.append(c)
-        return expansion
+    def _expand_child(self, c):
+        if not isinstance(c, str):
+            return c
+        # Due to restrictions for contents of script elements, some
+        # sequences of characters must be replaced before constructing
+        # a script element.
+        # 
+        # Unfortunately, correctly replacing such character sequences
+        # require a full lexical analysis on the script content, but
+        # ophinode is currently incapable of doing so.
+        #
+        # However, the sequences are expected to be rarely seen
+        # outside literals, so replacements are done nonetheless.
+        #
+        # This behavior might change in the later versions of ophinode
+        # when it starts to better support inline scripting.
+        #
+        # Read https://html.spec.whatwg.org/multipage/scripting.html#restrictions-for-contents-of-script-elements
+        # for more information.
+        #
+        content = c.replace(
+            "<!--", "\\x3C!--"
+        ).replace(
+            "<script", "\\x3Cscript"
+        ).replace(
+            "</script", "\\x3C/script"
+        )
+        node = TextNode(content)
+        if self._escape_ampersands is not None:
+            node.escape_ampersands(self._escape_ampersands)
+        if self._escape_tag_delimiters is not None:
+            node.escape_tag_delimiters(self._escape_tag_delimiters)
+        return node
 
 class NoScriptElement(OpenElement):
     tag = "noscript"
@@ -0,0 +1,434 @@
+import re
+import sys
+import copy
+if sys.version_info.major == 3 and sys.version_info.minor < 9:
+    from typing import Iterable, Iterator
+else:
+    from collections.abc import Iterable, Iterator
+from typing import Any, Union
+
+from ..base import ClosedRenderable, OpenRenderable, Expandable, Preparable
+from ..fingerprint import digest, fingerprint
+from .core import (
+    Node,
+    TextNode,
+    Markup,
+    Element,
+    OpenElement,
+    is_markup,
+    LazyChildren,
+    _type_name,
+    _ASSET_URL_ATTRIBUTE_NAMES,
+)
+from ophinode.rendering.render_node import render_events
+from ophinode.exceptions import UnresolvedFieldError
+
+# Fields are compiled by rendering the template with a marker in place of
+# each field. The probe in a marker shows how the characters that are
+# escaped or indented are rendered where the field is.
+_PROBE_CHARACTERS = "&<>\"\n"
+_PROBE = "\x01".join(_PROBE_CHARACTERS)
+_MARKER_PATTERN = re.compile("\x00([0-9]+)\x01([^\x00]*)\x00")
+
+# rows rendered before a chunk is yielded
+_ROWS_PER_CHUNK = 256
+
+# templates compiled for each ForEach, including ones compiled for rows with
+# empty values
+_MAX_COMPILED_TEMPLATES = 64
+
+class Field(Expandable):
+    """A placeholder for a value of each row in a ForEach template.
+
+    A field is replaced with row[key] of each row, and can be a child or
+    an attribute value of an element in the template, or an item of a
+    list or LazyChildren in it. Fields elsewhere, such as in attributes of
+    a custom node, are not replaced, and raise UnresolvedFieldError when
+    they are expanded.
+    """
+
+    __slots__ = ("_key",)
+
+    def __init__(self, key: Any):
+        self._key = key
+
+    def __repr__(self):
+        return "Field({!r})".format(self._key)
+
+    def fingerprint(self, memo: dict = None):
+        fp = fingerprint(self._key, memo)
+        if fp is None:
+            return None
+        return digest(_type_name(self), fp)
+
+    def expand(self, context: "ophinode.site.BuildContext"):
+        raise UnresolvedFieldError(
+            "{!r} is not in a place of a ForEach template where it can be "
+            "replaced".format(self)
+        )
+
+    @property
+    def key(self):
+        return self._key
+
+class ForEach(Node, ClosedRenderable, Preparable):
+    """Renders a template once for each row of data.
+
+    The output is the same as rendering a copy of template for each row,
+    with each Field in the copy replaced by the value of the row. Numbers
+    are converted to str first.
+
+    Instead of creating and rendering the copies, the template is
+    rendered once with markers in place of fields, and the rendered
+    strings between the markers are reused for every row, so rendering a
+    row only escapes and joins strings. Rows that the compiled template
+    cannot render exactly, such as rows with an empty string or a node in
+    a text field, are rendered from a copy of the template.
+    """
+
+    def __init__(self, template: Any, rows: Iterable):
+        self._template = template
+        self._rows = rows
+        self._first_renderable = _find_edge_renderable(template, False)
+        self._last_renderable = _find_edge_renderable(template, True)
+        self._compiled_templates = {}
+
+    def fingerprint(self, memo: dict = None):
+        if memo is None:
+            memo = {}
+        fp_template = fingerprint(self._template, memo)
+        fp_rows = fingerprint(self._rows, memo)
+        if fp_template is None or fp_rows is None:
+            return None
+        return digest(_type_name(self), fp_template, fp_rows)
+
+    def prepare(self, context: "ophinode.site.BuildContext"):
+        if isinstance(self._template, Preparable):
+            self._template.prepare(context)
+
+    def render(self, context: "ophinode.site.BuildContext"):
+        return "".join(self.iter_render(context))
+
+    def iter_render(self, context: "ophinode.site.BuildContext"):
+        state = (
+            not context.get_config_value(
+                "disable_auto_newline_when_rendering"
+            ),
+            not context.get_config_value(
+                "disable_auto_indent_when_rendering"
+            ),
+            (),
+        )
+        return self.iter_render_with_state(context, state)
+
+    def iter_render_with_state(
+        self,
+        context: "ophinode.site.BuildContext",
+        state: tuple,
+    ) -> Iterator[str]:
+        compiled = self._get_compiled_template(context, state)
+        if compiled is None:
+            yield from render_events(
+                context._iter_expansion_events(
+                    map(self._instantiate, self._rows)
+                ),
+                context,
+                None,
+                state,
+            )
+            return
+
+        head, fields, separator = compiled
+        render_out = []
+        for i, row in enumerate(self._rows):
+            text_content = _render_row(head, fields, row, context)
+            if text_content is None:
+                text_content = self._render_irregular_row(
+                    context, state, fields, row
+                )
+            if i:
+                render_out.append(separator)
+            render_out.append(text_content)
+            if len(render_out) >= 2 * _ROWS_PER_CHUNK:
+                yield "".join(render_out)
+                render_out = []
+        if render_out:
+            yield "".join(render_out)
+
+    def _render_irregular_row(
+        self,
+        context: "ophinode.site.BuildContext",
+        state: tuple,
+        fields: list,
+        row: Any,
+    ) -> str:
+        # rows with empty text values are rendered with a template compiled
+        # for those values being empty, and other rows that the compiled
+        # template cannot render are rendered from a copy of the template
+        empty_keys = frozenset(
+            field[0] for field in fields
+            if field[1] and _is_empty_text(_convert_value(row[field[0]]))
+        )
+        if empty_keys:
+            compiled = self._get_compiled_template(context, state, empty_keys)
+            if compiled is not None:
+                text_content = _render_row(
+                    compiled[0], compiled[1], row, context
+                )
+                if text_content is not None:
+                    return text_content
+        return "".join(
+            render_events(
+                context._iter_expansion_events(self._instantiate(row)),
+                context,
+                None,
+                state,
+            )
+        )
+
+    def _instantiate(self, row: Any):
+        return _substitute(
+            self._template,
+            lambda field, attribute_name: _convert_value(row[field._key]),
+        )
+
+    def _get_compiled_template(
+        self,
+        context: "ophinode.site.BuildContext",
+        state: tuple,
+        empty_keys: frozenset = frozenset(),
+    ) -> Union[tuple, None]:
+        """Return the template compiled for state, or None.
+
+        Text fields whose keys are in empty_keys are compiled as empty.
+        The result is a tuple of the string before the first field, a
+        list of fields and the string between rows, and is None if the
+        template cannot be compiled.
+        """
+
+        key = (
+            state,
+            context.get_config_value("html_default_escape_ampersands"),
+            context.get_config_value("html_default_escape_tag_delimiters"),
+            empty_keys,
+        )
+        compiled_templates = self._compiled_templates
+        if key not in compiled_templates:
+            if (
+                empty_keys
+                and len(compiled_templates) >= _MAX_COMPILED_TEMPLATES
+            ):
+                return None
+            compiled_templates[key] = self._compile(
+                context, state, empty_keys
+            )
+        return compiled_templates[key]
+
+    def _compile(
+        self,
+        context: "ophinode.site.BuildContext",
+        state: tuple,
+        empty_keys: frozenset,
+    ) -> Union[tuple, None]:
+        if _has_field_with_custom_expansion(self._template, False):
+            # only escapes of single characters can be compiled, so values
+            # of fields in e.g. a ScriptElement are converted by rendering
+            # a copy of the template
+            return None
+        occurrences = []
+
+        def replace(field, attribute_name):
+            if attribute_name is None and field._key in empty_keys:
+                return ""
+            occurrences.append((field, attribute_name))
+            return "\x00{}\x01{}\x00".format(len(occurrences) - 1, _PROBE)
+
+        instance = _substitute(self._template, replace)
+        rendered = "".join(
+            render_events(
+                context._iter_expansion_events(instance),
+                context,
+                None,
+                state,
+            )
+        )
+        rendered_twice = "".join(
+            render_events(
+                context._iter_expansion_events([instance, instance]),
+                context,
+                None,
+                state,
+            )
+        )
+        if (
+            len(rendered_twice) < 2 * len(rendered)
+            or not rendered_twice.startswith(rendered)
+            or not rendered_twice.endswith(rendered)
+        ):
+            return None
+        separator = rendered_twice[len(rendered):-len(rendered) or None]
+
+        pieces = _MARKER_PATTERN.split(rendered)
+        indices = [int(i) for i in pieces[1::3]]
+        if sorted(indices) != list(range(len(occurrences))):
+            # markers were dropped or altered by a node in the template
+            return None
+        fields = []
+        for i, index in enumerate(indices):
+            probe = pieces[3*i + 2].split("\x01")
+            if len(probe) != len(_PROBE_CHARACTERS):
+                return None
+            table = {}
+            for c, rendered_c in zip(_PROBE_CHARACTERS, probe):
+                if rendered_c != c:
+                    table[ord(c)] = rendered_c
+            field, attribute_name = occurrences[index]
+            fields.append((
+                field._key,
+                attribute_name is None,
+                attribute_name in _ASSET_URL_ATTRIBUTE_NAMES,
+                table,
+                {k: v for k, v in table.items() if k == ord("\n")},
+                pieces[3*i + 3],
+            ))
+        return pieces[0], fields, separator
+
+    @property
+    def template(self):
+        return self._template
+
+    @property
+    def rows(self):
+        return self._rows
+
+    @property
+    def prevent_auto_newline_before_me(self):
+        if self._first_renderable is None:
+            return False
+        return self._first_renderable.prevent_auto_newline_before_me
+
+    @property
+    def prevent_auto_newline_after_me(self):
+        if self._last_renderable is None:
+            return False
+        return self._last_renderable.prevent_auto_newline_after_me
+
+    @property
+    def renders_in_chunks(self):
+        return True
+
+    @property
+    def auto_indent_for_me(self):
+        # rows are rendered with the indentation of where they are
+        return False
+
+def _render_row(
+    head: str,
+    fields: list,
+    row: Any,
+    context: "ophinode.site.BuildContext",
+) -> Union[str, None]:
+    # returns None if the row must be rendered from a copy of the template
+    render_out = [head]
+    for key, is_text, is_asset_url, table, markup_table, tail in fields:
+        value = row[key]
+        if type(value) is not str:
+            value = _convert_value(value)
+            if not isinstance(value, str):
+                return None
+            if is_text and is_markup(value):
+                if not isinstance(value, Markup):
+                    value = value.__html__()
+                value = str(value)
+                if not value:
+                    return None
+                render_out.append(value.translate(markup_table))
+                render_out.append(tail)
+                continue
+            value = str(value)
+        if is_text:
+            if not value:
+                # an empty text node renders differently from the marker,
+                # e.g. no newline is padded after the opening tag
+                return None
+        elif is_asset_url:
+            value = context.get_asset_url(value)
+        render_out.append(value.translate(table))
+        render_out.append(tail)
+    return "".join(render_out)
+
+def _is_empty_text(value: Any) -> bool:
+    return isinstance(value, str) and not value
+
+def _convert_value(value: Any) -> Any:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    return value
+
+def _substitute(value: Any, replace, attribute_name: Union[str, None] = None):
+    if isinstance(value, Field):
+        return replace(value, attribute_name)
+    if isinstance(value, (list, tuple)):
+        return [_substitute(v, replace) for v in value]
+    if isinstance(value, LazyChildren):
+        children = [_substitute(c, replace) for c in value]
+        return LazyChildren(lambda: children)
+    if isinstance(value, Node):
+        # nodes with children, such as elements and comments, are copied
+        # with fields in their children and attributes replaced
+        children = getattr(value, "_children", None)
+        if children is None and not isinstance(value, Element):
+            return value
+        node = copy.copy(value)
+        if children is not None:
+            node._children = [_substitute(c, replace) for c in children]
+        if isinstance(value, Element):
+            node._attributes = {
+                k: _substitute(v, replace, k)
+                for k, v in value._attributes.items()
+            }
+        return node
+    return value
+
+def _has_custom_expansion(element: OpenElement) -> bool:
+    cls = type(element)
+    return (
+        cls.expand is not OpenElement.expand
+        or cls._expand_child is not OpenElement._expand_child
+    )
+
+def _has_field_with_custom_expansion(value: Any, in_custom: bool) -> bool:
+    # whether a field is a child of an element that converts its children
+    # differently from OpenElement
+    if isinstance(value, Field):
+        return in_custom
+    if isinstance(value, (list, tuple, LazyChildren)):
+        return any(
+            _has_field_with_custom_expansion(v, in_custom) for v in value
+        )
+    if isinstance(value, Node):
+        children = getattr(value, "_children", None)
+        if children is None:
+            return False
+        if isinstance(value, OpenElement):
+            in_custom = _has_custom_expansion(value)
+        return any(
+            _has_field_with_custom_expansion(c, in_custom) for c in children
+        )
+    return False
+
+_TEXT_NODE = TextNode("")
+
+def _find_edge_renderable(value: Any, last: bool):
+    # the first or last renderable in the template, which decides whether
+    # auto newlines are inserted around the rendered rows
+    if isinstance(value, (str, Field)):
+        return _TEXT_NODE
+    if isinstance(value, (OpenRenderable, ClosedRenderable)):
+        return value
+    if isinstance(value, (list, tuple)):
+        for v in (reversed(value) if last else value):
+            renderable = _find_edge_renderable(v, last)
+            if renderable is not None:
+                return renderable
+    return None
@@ -1 +1,2 @@
 from .render_node import RenderNode
+from .flat_tree import FlatTree, FlatTreeNode
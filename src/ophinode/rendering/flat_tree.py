@@ -0,0 +1,225 @@
+import sys
+import array
+if sys.version_info.major == 3 and sys.version_info.minor < 9:
+    from typing import Iterator
+else:
+    from collections.abc import Iterator
+from typing import Union
+
+from ophinode.nodes.base import *
+from .render_node import RenderNode, render_events
+
+# bits of FlatTree.flags
+FLAG_OPEN_RENDERABLE = 1
+FLAG_CLOSED_RENDERABLE = 2
+
+class FlatTree:
+    """An expanded page stored as flat parallel arrays.
+
+    Nodes are stored in document order. For the node at index i,
+    values[i] is the node value, subtree_ends[i] is the index right after
+    its last descendant, depths[i] is its depth and flags[i] tells
+    whether the value is an open or closed renderable. Index 0 is the
+    root, whose value is None.
+
+    Compared to a tree of RenderNode objects, a FlatTree needs a handful
+    of objects per page instead of one per node, is rendered by a linear
+    scan, and skips a subtree by jumping to its end. The value, children
+    and parent properties of the tree are those of its root node, so code
+    that walks an expanded page from its root works with both kinds of
+    trees. node() and to_render_node() give RenderNode-like views of any
+    node.
+    """
+
+    def __init__(self):
+        self.values = [None]
+        self.subtree_ends = array.array("q", [1])
+        self.depths = array.array("l", [0])
+        self.flags = bytearray(1)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getstate__(self):
+        return (
+            self.values,
+            self.subtree_ends.tobytes(),
+            self.depths.tobytes(),
+            bytes(self.flags),
+        )
+
+    def __setstate__(self, state):
+        values, subtree_ends, depths, flags = state
+        self.values = values
+        self.subtree_ends = array.array("q")
+        self.subtree_ends.frombytes(subtree_ends)
+        self.depths = array.array("l")
+        self.depths.frombytes(depths)
+        self.flags = bytearray(flags)
+
+    @property
+    def value(self):
+        return self.node(0).value
+
+    @property
+    def children(self):
+        return self.node(0).children
+
+    @property
+    def parent(self):
+        return self.node(0).parent
+
+    def append(self, value, depth: int) -> int:
+        """Append a node and return its index.
+
+        The subtree of the node ends right after it until end_subtree()
+        is called for it.
+        """
+
+        index = len(self.values)
+        self.values.append(value)
+        self.subtree_ends.append(index + 1)
+        self.depths.append(depth)
+        if isinstance(value, OpenRenderable):
+            self.flags.append(FLAG_OPEN_RENDERABLE)
+        elif isinstance(value, ClosedRenderable):
+            self.flags.append(FLAG_CLOSED_RENDERABLE)
+        else:
+            self.flags.append(0)
+        return index
+
+    def end_subtree(self, index: int):
+        """Mark the nodes appended since index as its descendants."""
+        self.subtree_ends[index] = len(self.values)
+
+    def iter_render_events(self) -> Iterator[tuple]:
+        """Yield (value, revisited) for each node, like RenderNode does."""
+        return FlatTreeNode(self, 0).iter_render_events()
+
+    def render(self, context: "ophinode.site.BuildContext"):
+        return "".join(self.iter_render(context))
+
+    def iter_render(
+        self,
+        context: "ophinode.site.BuildContext",
+        chunk_size: Union[int, None] = None,
+    ) -> Iterator[str]:
+        """Render the tree, yielding the result in chunks.
+
+        See RenderNode.iter_render() for chunk_size.
+        """
+
+        return render_events(self.iter_render_events(), context, chunk_size)
+
+    def node(self, index: int = 0) -> "FlatTreeNode":
+        if not 0 <= index < len(self.values):
+            raise IndexError("node index out of range")
+        return FlatTreeNode(self, index)
+
+    def to_render_node(self) -> RenderNode:
+        """Return the tree as a tree of RenderNode objects."""
+        values = self.values
+        depths = self.depths
+        root = RenderNode(None)
+        parents = [root]
+        for i in range(1, len(values)):
+            del parents[depths[i]:]
+            render_node = RenderNode(values[i])
+            render_node._parent = parents[-1]
+            parents[-1]._children.append(render_node)
+            parents.append(render_node)
+        return root
+
+    @classmethod
+    def from_render_node(cls, root_node: RenderNode) -> "FlatTree":
+        """Return a FlatTree with the nodes under root_node."""
+        tree = cls()
+        stack = [(child, 1) for child in reversed(root_node._children)]
+        pending = []
+        while stack:
+            render_node, depth = stack.pop()
+            while pending and pending[-1][1] >= depth:
+                tree.end_subtree(pending.pop()[0])
+            index = tree.append(render_node._value, depth)
+            if render_node._children:
+                pending.append((index, depth))
+                for child in reversed(render_node._children):
+                    stack.append((child, depth + 1))
+        while pending:
+            tree.end_subtree(pending.pop()[0])
+        tree.end_subtree(0)
+        return tree
+
+class FlatTreeNode:
+    """A read-only RenderNode-like view of a node in a FlatTree."""
+
+    __slots__ = ("_tree", "_index")
+
+    def __init__(self, tree: FlatTree, index: int):
+        self._tree = tree
+        self._index = index
+
+    def __eq__(self, other):
+        if not isinstance(other, FlatTreeNode):
+            return NotImplemented
+        return self._tree is other._tree and self._index == other._index
+
+    def __hash__(self):
+        return hash((id(self._tree), self._index))
+
+    @property
+    def index(self):
+        return self._index
+
+    @property
+    def value(self):
+        return self._tree.values[self._index]
+
+    @property
+    def children(self):
+        tree = self._tree
+        subtree_ends = tree.subtree_ends
+        children = []
+        i = self._index + 1
+        end = subtree_ends[self._index]
+        while i < end:
+            children.append(FlatTreeNode(tree, i))
+            i = subtree_ends[i]
+        return children
+
+    @property
+    def parent(self):
+        if self._index == 0:
+            return None
+        depths = self._tree.depths
+        parent_depth = depths[self._index] - 1
+        i = self._index - 1
+        while depths[i] != parent_depth:
+            i -= 1
+        return FlatTreeNode(self._tree, i)
+
+    def render(self, context: "ophinode.site.BuildContext"):
+        return "".join(self.iter_render(context))
+
+    def iter_render(
+        self,
+        context: "ophinode.site.BuildContext",
+        chunk_size: Union[int, None] = None,
+    ) -> Iterator[str]:
+        return render_events(self.iter_render_events(), context, chunk_size)
+
+    def iter_render_events(self) -> Iterator[tuple]:
+        tree = self._tree
+        values = tree.values
+        subtree_ends = tree.subtree_ends
+        flags = tree.flags
+        closing_stk = []
+        for i in range(self._index, subtree_ends[self._index]):
+            while closing_stk and closing_stk[-1][0] <= i:
+                yield closing_stk.pop()[1], True
+            v = values[i]
+            yield v, False
+            if flags[i] & FLAG_OPEN_RENDERABLE:
+                closing_stk.append((subtree_ends[i], v))
+        while closing_stk:
+            yield closing_stk.pop()[1], True
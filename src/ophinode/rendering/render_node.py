@@ -1,4 +1,9 @@
 import collections
+import sys
+if sys.version_info.major == 3 and sys.version_info.minor < 9:
+    from typing import Iterable, Iterator
+else:
+    from collections.abc import Iterable, Iterator
 from typing import Union
 
 from ophinode.nodes.base import *
@@ -22,108 +27,134 @@ class RenderNode:
         return self._parent
 
     def render(self, context: "ophinode.site.BuildContext"):
-        depth = 0
+        return "".join(self.iter_render(context))
 
-        render_stk = collections.deque()
-        current_render = []
+    def iter_render(
+        self,
+        context: "ophinode.site.BuildContext",
+        chunk_size: Union[int, None] = None,
+    ) -> Iterator[str]:
+        """Render this node, yielding the result in chunks.
 
-        renderables_stk = collections.deque()
-        renderables_stk.append((self, False))
+        A chunk is yielded whenever at least chunk_size characters are
+        rendered, so the rendered document never needs to be held in
+        memory as a whole. If chunk_size is None, the result is yielded
+        as a single chunk.
+        """
 
-        no_auto_newline_count = 0
-        no_auto_indent_count = 0
-        auto_indent_string_stk = collections.deque()
+        return render_events(self.iter_render_events(), context, chunk_size)
 
+    def iter_render_events(self) -> Iterator[tuple]:
+        """Yield (value, revisited) for each node of this tree in order.
+
+        Values of open renderables are yielded once before their children
+        with revisited set to False, and once after them with revisited
+        set to True.
+        """
+
+        renderables_stk = [(self, False)]
+        while renderables_stk:
+            render_node, revisited = renderables_stk.pop()
+            v = render_node._value
+            yield v, revisited
+            if not revisited:
+                if isinstance(v, OpenRenderable):
+                    renderables_stk.append((render_node, True))
+                c = render_node._children
+                if c:
+                    for i in reversed(c):
+                        renderables_stk.append((i, False))
+
+def render_events(
+    events: Iterable[tuple],
+    context: "ophinode.site.BuildContext",
+    chunk_size: Union[int, None] = None,
+    state: Union[tuple, None] = None,
+) -> Iterator[str]:
+    """Render (value, revisited) events, yielding the result in chunks.
+
+    See RenderNode.iter_render_events() for events and
+    RenderNode.iter_render() for chunk_size. If state is given, the
+    events are rendered as a part of an enclosing render in that state
+    (see ClosedRenderable.iter_render_with_state()), and no newline is
+    appended to the result.
+    """
+
+    render_out = []
+    render_out_length = 0
+
+    no_auto_newline_count = 0
+    no_auto_indent_count = 0
+    auto_indent_string_stk = collections.deque()
+
+    top_level_indent_string = context.get_config_value(
+        "auto_indent_string_for_top_level"
+    )
+    if state is None:
         if context.get_config_value("disable_auto_newline_when_rendering"):
             no_auto_newline_count += 1
         if context.get_config_value("disable_auto_indent_when_rendering"):
             no_auto_indent_count += 1
+        append_newline = context.get_config_value(
+            "append_newline_to_render_result"
+        )
+    else:
+        auto_newline, auto_indent, indent_strings = state
+        if not auto_newline:
+            no_auto_newline_count += 1
+        if not auto_indent:
+            no_auto_indent_count += 1
+        auto_indent_string_stk.extend(indent_strings)
+        append_newline = False
 
-        first_child = True
-        auto_newline_blocked = False
-        auto_indent_string = "".join(auto_indent_string_stk)
-        while renderables_stk:
-            render_node, revisited = renderables_stk.pop()
-            v, c = render_node._value, render_node._children
-            if isinstance(v, OpenRenderable):
-                if revisited:
-                    # flush the render result of children
-                    children_content = "".join(current_render)
-                    if (
-                        children_content
-                        and no_auto_newline_count == 0
-                        and v.pad_newline_after_opening
-                    ):
-                        if no_auto_indent_count == 0:
-                            prefix = "\n" + auto_indent_string
-                        else:
-                            prefix = "\n"
-                        children_content = prefix + children_content
-                    current_render = render_stk.pop()
-                    current_render.append(children_content)
-                    depth -= 1
-                    auto_indent_string_stk.pop()
-                    auto_indent_string = "".join(auto_indent_string_stk)
-
-                    # render closing
-                    text_content = v.render_end(context)
-                    if (
-                        text_content
-                        and no_auto_newline_count == 0
-                        and v.pad_newline_before_closing
-                        and children_content
-                    ):
-                        text_content = "\n" + text_content
-                    if not v.auto_newline_for_children:
-                        no_auto_newline_count -= 1
-                    if not v.auto_indent_for_children:
-                        no_auto_indent_count -= 1
-                    if no_auto_indent_count == 0 and text_content:
-                        prefix = "\n" + auto_indent_string
-                        text_content = prefix.join(text_content.split("\n"))
-                    current_render.append(text_content)
-                    first_child = False
-                    if v.prevent_auto_newline_after_me:
-                        auto_newline_blocked = True
-                    else:
-                        auto_newline_blocked = False
+    # The newline that follows an opening tag is only rendered if the
+    # children render to a non-empty string. It is kept pending in
+    # opening_prefix_stk until a child renders something, and
+    # has_content_stk records which open renderables have non-empty
+    # children. Open renderables from first_pending_depth onwards
+    # have had no non-empty children yet.
+    opening_prefix_stk = []
+    has_content_stk = []
+    first_pending_depth = 0
+
+    first_child = True
+    auto_newline_blocked = False
+    auto_indent_string = "".join(auto_indent_string_stk)
+    for v, revisited in events:
+        if isinstance(v, OpenRenderable):
+            if revisited:
+                children_rendered = has_content_stk.pop()
+                opening_prefix_stk.pop()
+                depth = len(has_content_stk)
+                if first_pending_depth > depth:
+                    first_pending_depth = depth
+                auto_indent_string_stk.pop()
+                auto_indent_string = "".join(auto_indent_string_stk)
+
+                # render closing
+                text_content = v.render_end(context)
+                if (
+                    text_content
+                    and no_auto_newline_count == 0
+                    and v.pad_newline_before_closing
+                    and children_rendered
+                ):
+                    text_content = "\n" + text_content
+                if not v.auto_newline_for_children:
+                    no_auto_newline_count -= 1
+                if not v.auto_indent_for_children:
+                    no_auto_indent_count -= 1
+                if no_auto_indent_count == 0 and text_content:
+                    prefix = "\n" + auto_indent_string
+                    text_content = prefix.join(text_content.split("\n"))
+                first_child = False
+                if v.prevent_auto_newline_after_me:
+                    auto_newline_blocked = True
                 else:
-                    # render opening
-                    text_content = v.render_start(context)
-                    if (
-                        text_content
-                        and not first_child
-                        and no_auto_newline_count == 0
-                        and not v.prevent_auto_newline_before_me
-                        and not auto_newline_blocked
-                    ):
-                        text_content = "\n" + text_content
-                    if no_auto_indent_count == 0 and text_content:
-                        prefix = "\n" + auto_indent_string
-                        text_content = prefix.join(text_content.split("\n"))
-                    current_render.append(text_content)
-                    render_stk.append(current_render)
-                    current_render = []
-                    if not v.auto_newline_for_children:
-                        no_auto_newline_count += 1
-                    if not v.auto_indent_for_children:
-                        no_auto_indent_count += 1
-                    renderables_stk.append((render_node, True))
-                    depth += 1
-                    first_child = True
                     auto_newline_blocked = False
-                    child_indent_string = v.auto_indent_string
-                    if child_indent_string is None:
-                        if auto_indent_string_stk:
-                            child_indent_string = auto_indent_string_stk[-1]
-                        else:
-                            child_indent_string = context.get_config_value(
-                                "auto_indent_string_for_top_level"
-                            )
-                    auto_indent_string_stk.append(child_indent_string)
-                    auto_indent_string = "".join(auto_indent_string_stk)
-            elif isinstance(v, ClosedRenderable):
-                text_content = v.render(context)
+            else:
+                # render opening
+                text_content = v.render_start(context)
                 if (
                     text_content
                     and not first_child
@@ -135,18 +166,144 @@ class RenderNode:
                 if no_auto_indent_count == 0 and text_content:
                     prefix = "\n" + auto_indent_string
                     text_content = prefix.join(text_content.split("\n"))
-                current_render.append(text_content)
+                if text_content:
+                    # the opening itself is content of the parent
+                    if first_pending_depth < len(has_content_stk):
+                        for i in range(
+                            first_pending_depth, len(has_content_stk)
+                        ):
+                            has_content_stk[i] = True
+                            if opening_prefix_stk[i]:
+                                render_out.append(opening_prefix_stk[i])
+                        first_pending_depth = len(has_content_stk)
+                    render_out.append(text_content)
+                    render_out_length += len(text_content)
+                if not v.auto_newline_for_children:
+                    no_auto_newline_count += 1
+                if not v.auto_indent_for_children:
+                    no_auto_indent_count += 1
+                first_child = True
+                auto_newline_blocked = False
+                child_indent_string = v.auto_indent_string
+                if child_indent_string is None:
+                    if auto_indent_string_stk:
+                        child_indent_string = auto_indent_string_stk[-1]
+                    else:
+                        child_indent_string = top_level_indent_string
+                auto_indent_string_stk.append(child_indent_string)
+                auto_indent_string = "".join(auto_indent_string_stk)
+                if (
+                    no_auto_newline_count == 0
+                    and v.pad_newline_after_opening
+                ):
+                    if no_auto_indent_count == 0:
+                        opening_prefix = "\n" + auto_indent_string
+                    else:
+                        opening_prefix = "\n"
+                else:
+                    opening_prefix = None
+                opening_prefix_stk.append(opening_prefix)
+                has_content_stk.append(False)
+                text_content = None
+        elif isinstance(v, ClosedRenderable):
+            if v.renders_in_chunks:
+                if (
+                    not first_child
+                    and no_auto_newline_count == 0
+                    and not v.prevent_auto_newline_before_me
+                    and not auto_newline_blocked
+                ):
+                    if no_auto_indent_count == 0:
+                        pad_newline = "\n" + auto_indent_string
+                    else:
+                        pad_newline = "\n"
+                else:
+                    pad_newline = None
+                indent = no_auto_indent_count == 0 and v.auto_indent_for_me
+                prefix = "\n" + auto_indent_string
+                chunks = v.iter_render_with_state(
+                    context,
+                    (
+                        no_auto_newline_count == 0,
+                        no_auto_indent_count == 0,
+                        tuple(auto_indent_string_stk),
+                    ),
+                )
+                for text_content in chunks:
+                    if not text_content:
+                        continue
+                    if indent and "\n" in text_content:
+                        text_content = prefix.join(text_content.split("\n"))
+                    if pad_newline:
+                        text_content = pad_newline + text_content
+                        pad_newline = None
+                    if first_pending_depth < len(has_content_stk):
+                        for i in range(
+                            first_pending_depth, len(has_content_stk)
+                        ):
+                            has_content_stk[i] = True
+                            if opening_prefix_stk[i]:
+                                render_out.append(opening_prefix_stk[i])
+                        first_pending_depth = len(has_content_stk)
+                    render_out.append(text_content)
+                    render_out_length += len(text_content)
+                    if (
+                        chunk_size is not None
+                        and render_out_length >= chunk_size
+                    ):
+                        yield "".join(render_out)
+                        render_out = []
+                        render_out_length = 0
                 first_child = False
                 if v.prevent_auto_newline_after_me:
                     auto_newline_blocked = True
                 else:
                     auto_newline_blocked = False
+                continue
+            text_content = v.render(context)
+            if (
+                no_auto_indent_count == 0
+                and text_content
+                and "\n" in text_content
+                and v.auto_indent_for_me
+            ):
+                prefix = "\n" + auto_indent_string
+                text_content = prefix.join(text_content.split("\n"))
+            if (
+                text_content
+                and not first_child
+                and no_auto_newline_count == 0
+                and not v.prevent_auto_newline_before_me
+                and not auto_newline_blocked
+            ):
+                # the inserted newline is indented even if the render
+                # result itself is output verbatim
+                if no_auto_indent_count == 0:
+                    text_content = "\n" + auto_indent_string + text_content
+                else:
+                    text_content = "\n" + text_content
+            first_child = False
+            if v.prevent_auto_newline_after_me:
+                auto_newline_blocked = True
             else:
                 auto_newline_blocked = False
-            if not revisited and c:
-                for i in reversed(c):
-                    renderables_stk.append((i, False))
-        if context.get_config_value("append_newline_to_render_result"):
-            current_render.append("\n")
-        return "".join(current_render)
-
+        else:
+            text_content = None
+            auto_newline_blocked = False
+        if text_content:
+            if first_pending_depth < len(has_content_stk):
+                for i in range(first_pending_depth, len(has_content_stk)):
+                    has_content_stk[i] = True
+                    if opening_prefix_stk[i]:
+                        render_out.append(opening_prefix_stk[i])
+                first_pending_depth = len(has_content_stk)
+            render_out.append(text_content)
+            render_out_length += len(text_content)
+            if chunk_size is not None and render_out_length >= chunk_size:
+                yield "".join(render_out)
+                render_out = []
+                render_out_length = 0
+    if append_newline:
+        render_out.append("\n")
+    if render_out or chunk_size is None:
+        yield "".join(render_out)
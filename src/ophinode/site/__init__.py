@@ -1,3 +1,6 @@
 from .core import Site, render_page, render_nodes, render_html
 from .page import Page
 from .layout import Layout
+from .page_source import PageSource, PagedPageSource
+from .renderer import Renderer
+from .ssr import RenderingApp
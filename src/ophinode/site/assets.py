@@ -0,0 +1,55 @@
+import hashlib
+import posixpath
+
+from .export import encode_file_content, normalize_export_path
+
+def get_fingerprinted_path(export_path: str, content_hash: str) -> str:
+    """Insert a content hash into the file name of an export path.
+
+    For example, "/css/main.css" becomes "/css/main.<hash>.css".
+    """
+
+    directory, file_name = posixpath.split(export_path)
+    stem, extension = posixpath.splitext(file_name)
+    if not stem:
+        # file names such as ".htaccess" have no extension
+        stem, extension = extension, ""
+    return posixpath.join(
+        directory, "{}.{}{}".format(stem, content_hash, extension)
+    )
+
+def fingerprint_assets(assets: dict, hash_length: int) -> dict:
+    """Return a mapping of asset export paths to fingerprinted paths."""
+
+    fingerprinted_paths = {}
+    for export_path, data in assets.items():
+        content_hash = hashlib.sha256(
+            encode_file_content(data)
+        ).hexdigest()[:hash_length]
+        fingerprinted_paths[export_path] = get_fingerprinted_path(
+            export_path, content_hash
+        )
+    return fingerprinted_paths
+
+def create_asset_url_mapping(
+    fingerprinted_paths: dict,
+    url_prefix: str,
+) -> dict:
+    """Return a mapping of asset URLs to fingerprinted asset URLs.
+
+    Both the bare export path and the export path with url_prefix are
+    mapped, so that references written with or without the prefix are
+    rewritten.
+    """
+
+    url_prefix = (url_prefix or "").rstrip("/")
+    asset_urls = {}
+    for export_path, fingerprinted_path in fingerprinted_paths.items():
+        export_path = normalize_export_path(export_path)
+        fingerprinted_url = url_prefix + normalize_export_path(
+            fingerprinted_path
+        )
+        asset_urls[export_path] = fingerprinted_url
+        if url_prefix:
+            asset_urls[url_prefix + export_path] = fingerprinted_url
+    return asset_urls
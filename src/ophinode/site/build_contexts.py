@@ -1,59 +1,199 @@
 import sys
 if sys.version_info.major == 3 and sys.version_info.minor < 9:
-    from typing import Mapping, Iterable
+    from typing import Mapping, Iterable, Iterator, Reversible
 else:
-    from collections.abc import Mapping, Iterable
-import json
+    from collections.abc import Mapping, Iterable, Iterator, Reversible
+import time
 import os.path
-import pathlib
+import itertools
 import collections
 import multiprocessing
+import multiprocessing.pool
 from typing import Any, Union
-from enum import Enum
 
 from .page import Page
+from .build_phase import BuildPhase
+from .processors import ProcessorRegistry
 from .layout import Layout
 from ophinode.exceptions.site import (
     RootPathUndefinedError,
     RootPathIsNotADirectoryError,
     NoCurrentPageError,
 )
-from ophinode.nodes.base import Preparable, Expandable
-from ophinode.nodes.html import TextNode, HTML5Layout
+from ophinode.nodes.base import (
+    ClosedRenderable,
+    OpenRenderable,
+    Preparable,
+    Expandable,
+)
+from ophinode.nodes.html import TextNode, RawHTML, HTML5Layout
+from ophinode.nodes.html.core import is_markup
 from ophinode.rendering.render_node import RenderNode
+from ophinode.rendering.flat_tree import FlatTree
+from .page_cache import PageCache
+from .export import (
+    write_exported_files,
+    get_export_root_path,
+    load_export_manifest,
+    save_export_manifest,
+    normalize_export_path,
+)
+from .assets import fingerprint_assets, create_asset_url_mapping
+from .static_file import StaticFile
 
 class _StackDelimiter:
     pass
 
-class BuildPhase(Enum):
-    INIT                        = 0
-    PRE_PREPARE_SITE_BUILD      = 1
-    PREPARE_SITE_BUILD          = 2
-    POST_PREPARE_SITE_BUILD     = 3
-    PRE_PREPARE_PAGE_BUILD      = 4
-    PREPARE_PAGE_BUILD          = 5
-    POST_PREPARE_PAGE_BUILD     = 6
-    PRE_BUILD_PAGES             = 7
-    BUILD_PAGES                 = 8
-    POST_BUILD_PAGES            = 9
-    PRE_PREPARE_PAGE_EXPANSION  = 10
-    PREPARE_PAGE_EXPANSION      = 11
-    POST_PREPARE_PAGE_EXPANSION = 12
-    PRE_EXPAND_PAGES            = 13
-    EXPAND_PAGES                = 14
-    POST_EXPAND_PAGES           = 15
-    PRE_RENDER_PAGES            = 16
-    RENDER_PAGES                = 17
-    POST_RENDER_PAGES           = 18
-    PRE_EXPORT_PAGES            = 19
-    EXPORT_PAGES                = 20
-    POST_EXPORT_PAGES           = 21
-    PRE_FINALIZE_PAGE_BUILD     = 22
-    FINALIZE_PAGE_BUILD         = 23
-    POST_FINALIZE_PAGE_BUILD    = 24
-    PRE_FINALIZE_SITE_BUILD     = 25
-    FINALIZE_SITE_BUILD         = 26
-    POST_FINALIZE_SITE_BUILD    = 27
+class _Revisit:
+    __slots__ = ("value",)
+
+    def __init__(self, value: OpenRenderable):
+        self.value = value
+
+# returned by next() when a lazily consumed iterable is exhausted
+_EXHAUSTED = object()
+
+class _SubtreeEnd:
+    __slots__ = ("index",)
+
+    def __init__(self, index: int):
+        self.index = index
+
+def _can_coalesce(value: Any, text_node: TextNode) -> bool:
+    return (
+        type(value) is TextNode
+        and value._escape_ampersands == text_node._escape_ampersands
+        and value._escape_tag_delimiters == text_node._escape_tag_delimiters
+    )
+
+def _is_followed_by_nothing(value: Any) -> bool:
+    # an empty text node after this value renders nothing and leaves the
+    # auto newline state as this value leaves it, so it can be dropped
+    return (
+        isinstance(value, (OpenRenderable, ClosedRenderable))
+        and not value.prevent_auto_newline_after_me
+    )
+
+class _TextNodeCoalescer:
+    """Merges adjacent sibling text nodes while a page is expanded.
+
+    Runs of text nodes with the same escape settings are merged into one
+    text node, and empty text nodes are dropped where that does not change
+    the render result. Merged text nodes are created when the run ends, so
+    a run of n text nodes is joined once.
+    """
+
+    def __init__(self):
+        self.coalesced_text_nodes = 0
+        self.dropped_empty_text_nodes = 0
+        self.last_subtree_index = None
+        self._run_owner = None
+        self._run_value = None
+        self._run_parts = None
+        self._run_tree = None
+
+    def add_to_render_node(
+        self,
+        parent: RenderNode,
+        text_node: TextNode,
+    ) -> bool:
+        """Add text_node to the children of parent if it can be merged.
+
+        Returns False if text_node must be added as a new node instead.
+        """
+
+        children = parent._children
+        if not children:
+            return False
+        last = children[-1]
+        if not text_node._text_content:
+            if _is_followed_by_nothing(last._value):
+                self.dropped_empty_text_nodes += 1
+                return True
+            return False
+        if last is self._run_owner:
+            value = self._run_value
+        else:
+            value = last._value
+            if last._children:
+                return False
+        if not _can_coalesce(value, text_node):
+            return False
+        return self._extend_run(last, value, None, text_node)
+
+    def add_to_flat_tree(
+        self,
+        tree: FlatTree,
+        depth: int,
+        text_node: TextNode,
+    ) -> bool:
+        """Append text_node to tree at depth if it can be merged.
+
+        Returns False if text_node must be appended as a new node instead.
+        """
+
+        last = len(tree.values) - 1
+        last_depth = tree.depths[last]
+        if last_depth < depth:
+            # the last node is the parent, so text_node is the first child
+            return False
+        if not text_node._text_content:
+            if last_depth == depth:
+                previous_sibling = last
+            else:
+                previous_sibling = self.last_subtree_index
+            if _is_followed_by_nothing(tree.values[previous_sibling]):
+                self.dropped_empty_text_nodes += 1
+                return True
+            return False
+        if last_depth != depth:
+            return False
+        if last == self._run_owner and tree is self._run_tree:
+            value = self._run_value
+        else:
+            value = tree.values[last]
+        if not _can_coalesce(value, text_node):
+            return False
+        return self._extend_run(last, value, tree, text_node)
+
+    def _extend_run(self, owner, value, tree, text_node) -> bool:
+        if owner is not self._run_owner or tree is not self._run_tree:
+            self.flush()
+            self._run_owner = owner
+            self._run_value = value
+            self._run_parts = [value._text_content]
+            self._run_tree = tree
+        self._run_parts.append(text_node._text_content)
+        self.coalesced_text_nodes += 1
+        return True
+
+    def flush(self):
+        """Replace the first node of the current run with the merged node."""
+        if self._run_owner is None:
+            return
+        value = self._run_value
+        merged = TextNode(
+            "".join(self._run_parts),
+            escape_ampersands=value._escape_ampersands,
+            escape_tag_delimiters=value._escape_tag_delimiters,
+        )
+        if self._run_tree is None:
+            self._run_owner._value = merged
+        else:
+            self._run_tree.values[self._run_owner] = merged
+        self._run_owner = None
+        self._run_value = None
+        self._run_parts = None
+        self._run_tree = None
+
+    def get_stats(self) -> dict:
+        return {
+            "coalesced_text_nodes": self.coalesced_text_nodes,
+            "dropped_empty_text_nodes": self.dropped_empty_text_nodes,
+            "removed_nodes": (
+                self.coalesced_text_nodes + self.dropped_empty_text_nodes
+            ),
+        }
 
 BUILD_CONTEXT_CONFIG_DEFAULT_VALUES = {
     "export_root_path"                       : "./ophinode_exported_files",
@@ -74,6 +214,19 @@ BUILD_CONTEXT_CONFIG_DEFAULT_VALUES = {
     "disable_auto_indent_when_rendering"     : False,
     "auto_indent_string_for_top_level"       : "  ",
     "append_newline_to_render_result"        : False,
+    "page_cache_path"                        : None,
+    "page_cache_max_size"                    : 256 * 1024 * 1024,
+    "export_compression_formats"             : (),
+    "export_compression_min_size"            : 1024,
+    "export_compression_file_suffixes"       : (
+        ".html", ".css", ".js", ".mjs", ".json", ".xml", ".svg", ".txt",
+    ),
+    "export_compression_workers"             : None,
+    "export_manifest_file_name"              : None,
+    "export_pages_as_bytes"                  : False,
+    "export_static_files_as_hardlinks"       : False,
+    "flat_expanded_pages"                    : False,
+    "coalesce_text_nodes"                    : False,
 }
 BUILD_CONTEXT_CONFIG_KEYS = set(BUILD_CONTEXT_CONFIG_DEFAULT_VALUES)
 
@@ -88,7 +241,8 @@ class BuildContext:
         misc_data: dict,
         page_group_data: dict,
         build_config: dict,
-        processors: dict,
+        processors: Union[dict, ProcessorRegistry],
+        asset_urls: Union[dict, None] = None,
     ):
         self._build_phase = BuildPhase.INIT
 
@@ -114,152 +268,51 @@ class BuildContext:
         self._expanded_pages = {}
         self._rendered_pages = {}
         self._exported_files = {}
-
-        self._preprocessors_before_page_build_preparation_stage = []
-        self._postprocessors_after_page_build_preparation_stage = []
-        self._preprocessors_before_page_build_stage = []
-        self._postprocessors_after_page_build_stage = []
-        self._preprocessors_before_page_expansion_preparation_stage = []
-        self._postprocessors_after_page_expansion_preparation_stage = []
-        self._preprocessors_before_page_expansion_stage = []
-        self._postprocessors_after_page_expansion_stage = []
-        self._preprocessors_before_page_rendering_stage = []
-        self._postprocessors_after_page_rendering_stage = []
-        self._preprocessors_before_page_exportation_stage = []
-        self._postprocessors_after_page_exportation_stage = []
-        self._preprocessors_before_page_build_finalization_stage = []
-        self._postprocessors_after_page_build_finalization_stage = []
-
-        if "pre_prepare_page_build" in processors:
-            l = self._preprocessors_before_page_build_preparation_stage
-            for proc in processors["pre_prepare_page_build"]:
-                if not callable(proc):
-                    raise ValueError(
-                        "pre- and post-processors must be callable"
-                    )
-                l.append(proc)
-
-        if "post_prepare_page_build" in processors:
-            l = self._postprocessors_after_page_build_preparation_stage
-            for proc in processors["post_prepare_page_build"]:
-                if not callable(proc):
-                    raise ValueError(
-                        "pre- and post-processors must be callable"
-                    )
-                l.append(proc)
-
-        if "pre_build_pages" in processors:
-            l = self._preprocessors_before_page_build_stage
-            for proc in processors["pre_build_pages"]:
-                if not callable(proc):
-                    raise ValueError(
-                        "pre- and post-processors must be callable"
-                    )
-                l.append(proc)
-
-        if "post_build_pages" in processors:
-            l = self._postprocessors_after_page_build_stage
-            for proc in processors["post_build_pages"]:
-                if not callable(proc):
-                    raise ValueError(
-                        "pre- and post-processors must be callable"
-                    )
-                l.append(proc)
-
-        if "pre_prepare_page_expansion" in processors:
-            l = self._preprocessors_before_page_expansion_preparation_stage
-            for proc in processors["pre_prepare_page_expansion"]:
-                if not callable(proc):
-                    raise ValueError(
-                        "pre- and post-processors must be callable"
-                    )
-                l.append(proc)
-
-        if "post_prepare_page_expansion" in processors:
-            l = self._postprocessors_after_page_expansion_preparation_stage
-            for proc in processors["post_prepare_page_expansion"]:
-                if not callable(proc):
-                    raise ValueError(
-                        "pre- and post-processors must be callable"
-                    )
-                l.append(proc)
-
-        if "pre_expand_pages" in processors:
-            l = self._preprocessors_before_page_expansion_stage
-            for proc in processors["pre_expand_pages"]:
-                if not callable(proc):
-                    raise ValueError(
-                        "pre- and post-processors must be callable"
-                    )
-                l.append(proc)
-
-        if "post_expand_pages" in processors:
-            l = self._postprocessors_after_page_expansion_stage
-            for proc in processors["post_expand_pages"]:
-                if not callable(proc):
-                    raise ValueError(
-                        "pre- and post-processors must be callable"
-                    )
-                l.append(proc)
-
-        if "pre_render_pages" in processors:
-            l = self._preprocessors_before_page_rendering_stage
-            for proc in processors["pre_render_pages"]:
-                if not callable(proc):
-                    raise ValueError(
-                        "pre- and post-processors must be callable"
-                    )
-                l.append(proc)
-
-        if "post_render_pages" in processors:
-            l = self._postprocessors_after_page_rendering_stage
-            for proc in processors["post_render_pages"]:
-                if not callable(proc):
-                    raise ValueError(
-                        "pre- and post-processors must be callable"
-                    )
-                l.append(proc)
-
-        if "pre_export_pages" in processors:
-            l = self._preprocessors_before_page_exportation_stage
-            for proc in processors["pre_export_pages"]:
-                if not callable(proc):
-                    raise ValueError(
-                        "pre- and post-processors must be callable"
-                    )
-                l.append(proc)
-
-        if "post_export_pages" in processors:
-            l = self._postprocessors_after_page_exportation_stage
-            for proc in processors["post_export_pages"]:
-                if not callable(proc):
-                    raise ValueError(
-                        "pre- and post-processors must be callable"
-                    )
-                l.append(proc)
-
-        if "pre_finalize_page_build" in processors:
-            l = self._preprocessors_before_page_build_finalization_stage
-            for proc in processors["pre_finalize_page_build"]:
-                if not callable(proc):
-                    raise ValueError(
-                        "pre- and post-processors must be callable"
-                    )
-                l.append(proc)
-
-        if "post_finalize_page_build" in processors:
-            l = self._postprocessors_after_page_build_finalization_stage
-            for proc in processors["post_finalize_page_build"]:
-                if not callable(proc):
-                    raise ValueError(
-                        "pre- and post-processors must be callable"
-                    )
-                l.append(proc)
+        self._page_cache = None
+        self._page_cache_keys = {}
+        self._page_cache_hits = set()
+        self._input_files = {}
+        self._export_manifest = {}
+        # entries of the previous export manifest for the pages of this
+        # context, or None to load them when exported files are written
+        self._previous_export_manifest = None
+        self._exported_file_pages = {}
+        self._page_build_times = {}
+        self._expansion_stats = {}
+        self._current_page_start_time = None
+        self._asset_urls = asset_urls if asset_urls is not None else {}
+
+        # registries are immutable, so the registry of the page group is
+        # shared instead of copied
+        self._processors = ProcessorRegistry(processors)
+
+    def _reset_pages(self, pages: list):
+        # used by Renderer, which reuses one context for many renders
+        self._build_phase = BuildPhase.INIT
+        self._pages = pages
+        self._pages_dict = {page_def.path: page_def for page_def in pages}
+        self._site_data = {}
+        self._page_data = {page_def.path: {} for page_def in pages}
+        self._misc_data = {}
+        self._page_group_data = {}
+        self._built_pages = {}
+        self._expanded_pages = {}
+        self._rendered_pages = {}
+        self._exported_files = {}
+        self._page_cache_keys = {}
+        self._page_cache_hits = set()
+        self._input_files = {}
+        self._exported_file_pages = {}
+        self._page_build_times = {}
+        self._expansion_stats = {}
+
+    def _run_processors(self, phase: BuildPhase):
+        for processor in self._processors.get(phase):
+            processor(self)
 
     def _run_preprocessors_for_prepare_page_build(self) -> "BuildContext":
         self._set_build_phase(BuildPhase.PRE_PREPARE_PAGE_BUILD)
-        for processor in self._preprocessors_before_page_build_preparation_stage:
-            processor(self)
+        self._run_processors(BuildPhase.PRE_PREPARE_PAGE_BUILD)
         return self
 
     def _prepare_page_build(self) -> "BuildContext":
@@ -268,19 +321,18 @@ class BuildContext:
             path, page = page_def.path, page_def.page
             self._set_current_page(path, page)
             page.prepare_page(self)
+            self._run_processors(BuildPhase.PREPARE_PAGE_BUILD)
             self._unset_current_page()
         return self
 
     def _run_postprocessors_for_prepare_page_build(self) -> "BuildContext":
         self._set_build_phase(BuildPhase.POST_PREPARE_PAGE_BUILD)
-        for processor in self._postprocessors_after_page_build_preparation_stage:
-            processor(self)
+        self._run_processors(BuildPhase.POST_PREPARE_PAGE_BUILD)
         return self
 
     def _run_preprocessors_for_build_pages(self) -> "BuildContext":
         self._set_build_phase(BuildPhase.PRE_BUILD_PAGES)
-        for processor in self._preprocessors_before_page_build_stage:
-            processor(self)
+        self._run_processors(BuildPhase.PRE_BUILD_PAGES)
         return self
 
     def _build_pages(self) -> "BuildContext":
@@ -290,6 +342,7 @@ class BuildContext:
             layout = self._resolve_layout(path, page)
             self._set_current_page(path, page)
             self._built_pages[path] = layout.build(page, self)
+            self._run_processors(BuildPhase.BUILD_PAGES)
             self._unset_current_page()
         return self
 
@@ -320,72 +373,130 @@ class BuildContext:
 
     def _run_postprocessors_for_build_pages(self) -> "BuildContext":
         self._set_build_phase(BuildPhase.POST_BUILD_PAGES)
-        for processor in self._postprocessors_after_page_build_stage:
-            processor(self)
+        self._run_processors(BuildPhase.POST_BUILD_PAGES)
         return self
 
     def _run_preprocessors_for_prepare_page_expansion(self) -> "BuildContext":
         self._set_build_phase(BuildPhase.PRE_PREPARE_PAGE_EXPANSION)
-        for processor in self._preprocessors_before_page_expansion_preparation_stage:
-            processor(self)
+        self._run_processors(BuildPhase.PRE_PREPARE_PAGE_EXPANSION)
         return self
 
     def _prepare_page_expansion(self) -> "BuildContext":
         self._set_build_phase(BuildPhase.PREPARE_PAGE_EXPANSION)
+        has_page_processors = bool(
+            self._processors.get(BuildPhase.PREPARE_PAGE_EXPANSION)
+        )
         for page_def in self._pages:
             path, page = page_def.path, page_def.page
             node = self.get_built_page(path)
-            if not isinstance(node, Preparable):
+            is_preparable = isinstance(node, Preparable)
+            if not is_preparable and not has_page_processors:
                 continue
             self._set_current_page(path, page)
-            node.prepare(self)
+            if is_preparable:
+                node.prepare(self)
+            self._run_processors(BuildPhase.PREPARE_PAGE_EXPANSION)
             self._unset_current_page()
         return self
 
     def _run_postprocessors_for_prepare_page_expansion(self) -> "BuildContext":
         self._set_build_phase(BuildPhase.POST_PREPARE_PAGE_EXPANSION)
-        for processor in self._postprocessors_after_page_expansion_preparation_stage:
-            processor(self)
+        self._run_processors(BuildPhase.POST_PREPARE_PAGE_EXPANSION)
         return self
 
     def _run_preprocessors_for_expand_pages(self) -> "BuildContext":
         self._set_build_phase(BuildPhase.PRE_EXPAND_PAGES)
-        for processor in self._preprocessors_before_page_expansion_stage:
-            processor(self)
+        self._run_processors(BuildPhase.PRE_EXPAND_PAGES)
         return self
 
     def _expand_pages(self):
         self._set_build_phase(BuildPhase.EXPAND_PAGES)
+        page_cache = self._get_page_cache()
+        if self.get_config_value("flat_expanded_pages"):
+            expand_page = self._expand_page_flat
+        else:
+            expand_page = self._expand_page
+        coalesce = self.get_config_value("coalesce_text_nodes")
         for page_def in self._pages:
             path, page = page_def.path, page_def.page
+            if page_cache is not None:
+                # pages found in the page cache are neither expanded nor
+                # rendered again
+                key = page_cache.make_key(
+                    path, self.get_built_page(path), self
+                )
+                if key is not None:
+                    cached = page_cache.get(key)
+                    if cached is not None:
+                        self._rendered_pages[path] = cached
+                        self._page_cache_hits.add(path)
+                        continue
+                    self._page_cache_keys[path] = key
             self._set_current_page(path, page)
-            self._expanded_pages[path] = self._expand_page(
-                self.get_built_page(path)
+            coalescer = _TextNodeCoalescer() if coalesce else None
+            self._expanded_pages[path] = expand_page(
+                self.get_built_page(path), coalescer
             )
+            if coalescer is not None:
+                self._expansion_stats[path] = coalescer.get_stats()
+            self._run_processors(BuildPhase.EXPAND_PAGES)
             self._unset_current_page()
 
-    def _expand_page(self, page_built: Iterable) -> RenderNode:
+    def _get_page_cache(self) -> Union[PageCache, None]:
+        if self._page_cache is None:
+            page_cache_path = self.get_config_value("page_cache_path")
+            if page_cache_path:
+                self._page_cache = PageCache(
+                    page_cache_path,
+                    self.get_config_value("page_cache_max_size"),
+                    self._asset_urls,
+                )
+        return self._page_cache
+
+    def _expand_page(
+        self,
+        page_built: Iterable,
+        coalescer: Union[_TextNodeCoalescer, None] = None,
+    ) -> RenderNode:
         root_node = RenderNode(None)
         curr = root_node
 
         stack = collections.deque()
-        for node in reversed(page_built):
-            stack.append(node)
+        stack.append(page_built)
 
         while stack:
             node = stack.pop()
             if isinstance(node, _StackDelimiter):
                 curr = curr._parent
             elif isinstance(node, str):
-                render_node = RenderNode(TextNode(node))
+                if is_markup(node):
+                    text_node = RawHTML(node)
+                else:
+                    text_node = TextNode(node)
+                    if (
+                        coalescer is not None
+                        and coalescer.add_to_render_node(curr, text_node)
+                    ):
+                        continue
+                render_node = RenderNode(text_node)
                 render_node._parent = curr
                 curr._children.append(render_node)
             elif callable(node):
                 r = node(self)
                 stack.append(r)
             elif isinstance(node, Iterable):
-                for n in reversed(node):
-                    stack.append(n)
+                if isinstance(node, Reversible):
+                    for n in reversed(node):
+                        stack.append(n)
+                else:
+                    # iterators and generators are consumed one child at
+                    # a time, so a child is only created when it is about
+                    # to be expanded
+                    iterator = iter(node)
+                    n = next(iterator, _EXHAUSTED)
+                    if n is not _EXHAUSTED:
+                        stack.append(iterator)
+                        stack.append(n)
             elif isinstance(node, Expandable):
                 r = node.expand(self)
                 stack.append(_StackDelimiter())
@@ -395,30 +506,160 @@ class BuildContext:
                 curr = next_render_node
                 stack.append(r)
             else:
+                if (
+                    coalescer is not None
+                    and type(node) is TextNode
+                    and coalescer.add_to_render_node(curr, node)
+                ):
+                    continue
                 next_render_node = RenderNode(node)
                 next_render_node._parent = curr
                 curr._children.append(next_render_node)
 
+        if coalescer is not None:
+            coalescer.flush()
         return root_node
 
+    def _expand_page_flat(
+        self,
+        page_built: Iterable,
+        coalescer: Union[_TextNodeCoalescer, None] = None,
+    ) -> FlatTree:
+        tree = FlatTree()
+        depth = 1
+
+        stack = collections.deque()
+        stack.append(page_built)
+
+        while stack:
+            node = stack.pop()
+            if isinstance(node, _SubtreeEnd):
+                tree.end_subtree(node.index)
+                depth -= 1
+                if coalescer is not None:
+                    coalescer.last_subtree_index = node.index
+            elif isinstance(node, str):
+                if is_markup(node):
+                    tree.append(RawHTML(node), depth)
+                    continue
+                text_node = TextNode(node)
+                if (
+                    coalescer is not None
+                    and coalescer.add_to_flat_tree(tree, depth, text_node)
+                ):
+                    continue
+                tree.append(text_node, depth)
+            elif callable(node):
+                r = node(self)
+                stack.append(r)
+            elif isinstance(node, Iterable):
+                if isinstance(node, Reversible):
+                    for n in reversed(node):
+                        stack.append(n)
+                else:
+                    # iterators and generators are consumed one child at
+                    # a time, so a child is only created when it is about
+                    # to be expanded
+                    iterator = iter(node)
+                    n = next(iterator, _EXHAUSTED)
+                    if n is not _EXHAUSTED:
+                        stack.append(iterator)
+                        stack.append(n)
+            elif isinstance(node, Expandable):
+                r = node.expand(self)
+                stack.append(_SubtreeEnd(tree.append(node, depth)))
+                depth += 1
+                stack.append(r)
+            else:
+                if (
+                    coalescer is not None
+                    and type(node) is TextNode
+                    and coalescer.add_to_flat_tree(tree, depth, node)
+                ):
+                    continue
+                tree.append(node, depth)
+
+        if coalescer is not None:
+            coalescer.flush()
+        tree.end_subtree(0)
+        return tree
+
+    def _iter_expansion_events(self, page_built: Iterable) -> Iterator[tuple]:
+        """Expand a built page, yielding render events as nodes expand.
+
+        Events are the same as those of RenderNode.iter_render_events(),
+        but the expanded page is never stored, so rendering the events
+        with render_events() holds only the nodes on the current path in
+        memory. Text nodes are not coalesced.
+        """
+
+        stack = collections.deque()
+        stack.append(page_built)
+
+        while stack:
+            node = stack.pop()
+            if isinstance(node, _Revisit):
+                yield node.value, True
+            elif isinstance(node, str):
+                if is_markup(node):
+                    yield RawHTML(node), False
+                else:
+                    yield TextNode(node), False
+            elif callable(node):
+                r = node(self)
+                stack.append(r)
+            elif isinstance(node, Iterable):
+                if isinstance(node, Reversible):
+                    for n in reversed(node):
+                        stack.append(n)
+                else:
+                    iterator = iter(node)
+                    n = next(iterator, _EXHAUSTED)
+                    if n is not _EXHAUSTED:
+                        stack.append(iterator)
+                        stack.append(n)
+            elif isinstance(node, Expandable):
+                r = node.expand(self)
+                yield node, False
+                if isinstance(node, OpenRenderable):
+                    stack.append(_Revisit(node))
+                stack.append(r)
+            else:
+                yield node, False
+
     def _run_postprocessors_for_expand_pages(self) -> "BuildContext":
         self._set_build_phase(BuildPhase.POST_EXPAND_PAGES)
-        for processor in self._postprocessors_after_page_expansion_stage:
-            processor(self)
+        self._run_processors(BuildPhase.POST_EXPAND_PAGES)
         return self
 
     def _run_preprocessors_for_render_pages(self) -> "BuildContext":
         self._set_build_phase(BuildPhase.PRE_RENDER_PAGES)
-        for processor in self._preprocessors_before_page_rendering_stage:
-            processor(self)
+        self._run_processors(BuildPhase.PRE_RENDER_PAGES)
         return self
 
     def _render_pages(self):
         self._set_build_phase(BuildPhase.RENDER_PAGES)
+        has_page_processors = bool(
+            self._processors.get(BuildPhase.RENDER_PAGES)
+        )
         for page_def in self._pages:
             path, page = page_def.path, page_def.page
+            if path in self._page_cache_hits:
+                # the page cache keeps pages as rendered before page
+                # processors run, so they also run for cached pages
+                if has_page_processors:
+                    self._set_current_page(path, page)
+                    self._run_processors(BuildPhase.RENDER_PAGES)
+                    self._unset_current_page()
+                continue
             self._set_current_page(path, page)
             self._rendered_pages[path] = self._render_page(path, page)
+            if path in self._page_cache_keys:
+                self._page_cache.set(
+                    self._page_cache_keys[path],
+                    self._rendered_pages[path],
+                )
+            self._run_processors(BuildPhase.RENDER_PAGES)
             self._unset_current_page()
 
     def _render_page(self, path: str, page: Any):
@@ -428,14 +669,12 @@ class BuildContext:
 
     def _run_postprocessors_for_render_pages(self) -> "BuildContext":
         self._set_build_phase(BuildPhase.POST_RENDER_PAGES)
-        for processor in self._postprocessors_after_page_rendering_stage:
-            processor(self)
+        self._run_processors(BuildPhase.POST_RENDER_PAGES)
         return self
 
     def _run_preprocessors_for_export_pages(self) -> "BuildContext":
         self._set_build_phase(BuildPhase.PRE_EXPORT_PAGES)
-        for processor in self._preprocessors_before_page_exportation_stage:
-            processor(self)
+        self._run_processors(BuildPhase.PRE_EXPORT_PAGES)
         return self
 
     def _export_pages(self) -> "BuildContext":
@@ -444,19 +683,18 @@ class BuildContext:
             path, page = page_def.path, page_def.page
             self._set_current_page(path, page)
             page.export_page(self)
+            self._run_processors(BuildPhase.EXPORT_PAGES)
             self._unset_current_page()
         return self
 
     def _run_postprocessors_for_export_pages(self) -> "BuildContext":
         self._set_build_phase(BuildPhase.POST_EXPORT_PAGES)
-        for processor in self._postprocessors_after_page_exportation_stage:
-            processor(self)
+        self._run_processors(BuildPhase.POST_EXPORT_PAGES)
         return self
 
     def _run_preprocessors_for_finalize_page_build(self) -> "BuildContext":
         self._set_build_phase(BuildPhase.PRE_FINALIZE_PAGE_BUILD)
-        for processor in self._preprocessors_before_page_build_finalization_stage:
-            processor(self)
+        self._run_processors(BuildPhase.PRE_FINALIZE_PAGE_BUILD)
         return self
 
     def _finalize_page_build(self) -> "BuildContext":
@@ -465,34 +703,15 @@ class BuildContext:
             self._write_exported_files()
 
     def _write_exported_files(self):
-        export_root_path_value = self.get_config_value("export_root_path")
-        if not export_root_path_value:
-            raise RootPathUndefinedError(
-                "failed to write exported files because export_root_path is "
-                "empty"
+        self._export_manifest.update(
+            write_exported_files(
+                self, self._exported_files, self._previous_export_manifest
             )
-
-        export_root_path = pathlib.Path(export_root_path_value)
-        export_root_path.mkdir(parents=True, exist_ok=True)
-
-        for path, file_content in self._exported_files.items():
-            target_path = export_root_path / path.lstrip('/')
-            target_directory = target_path.parent
-            target_directory.mkdir(parents=True, exist_ok=True)
-            if isinstance(file_content, (bytes, bytearray)):
-                with target_path.open(mode="wb") as f:
-                    f.write(file_content)
-            elif isinstance(file_content, str):
-                with target_path.open(mode="w", encoding="utf-8") as f:
-                    f.write(file_content)
-            else:
-                with target_path.open(mode="w", encoding="utf-8") as f:
-                    json.dump(file_content, f)
+        )
 
     def _run_postprocessors_for_finalize_page_build(self) -> "BuildContext":
         self._set_build_phase(BuildPhase.POST_FINALIZE_PAGE_BUILD)
-        for processor in self._postprocessors_after_page_build_finalization_stage:
-            processor(self)
+        self._run_processors(BuildPhase.POST_FINALIZE_PAGE_BUILD)
         return self
 
     def _set_build_phase(self, phase: BuildPhase):
@@ -503,8 +722,16 @@ class BuildContext:
     def _set_current_page(self, path, page):
         self._current_page_path = path
         self._current_page = page
+        self._current_page_start_time = time.perf_counter()
 
     def _unset_current_page(self):
+        # the build time of a page is the sum of the time spent on it in
+        # each build phase
+        elapsed = time.perf_counter() - self._current_page_start_time
+        path = self._current_page_path
+        self._page_build_times[path] = (
+            self._page_build_times.get(path, 0.0) + elapsed
+        )
         self._current_page_path = None
         self._current_page = None
 
@@ -607,6 +834,14 @@ class BuildContext:
             result["rendered_pages"] = self._rendered_pages
         if self.get_config_value("return_exported_files_after_page_build"):
             result["exported_files"] = self._exported_files
+        if self._input_files:
+            result["input_files"] = self._input_files
+        if self._export_manifest:
+            result["export_manifest"] = self._export_manifest
+        if self.get_config_value("export_manifest_file_name"):
+            result["export_sources"] = self.get_export_sources()
+        if self._expansion_stats:
+            result["expansion_stats"] = self._expansion_stats
 
         return result
 
@@ -651,6 +886,9 @@ class BuildContext:
     def has_page(self, page_path: str):
         return page_path in self._pages_dict
 
+    def set_built_page(self, page_path: str, built_page: Any):
+        self._built_pages[page_path] = built_page
+
     def get_built_page(self, page_path: str):
         return self._built_pages[page_path]
 
@@ -663,6 +901,9 @@ class BuildContext:
     def is_built_page_path(self, page_path: str):
         return page_path in self._built_pages
 
+    def set_expanded_page(self, page_path: str, expanded_page: RenderNode):
+        self._expanded_pages[page_path] = expanded_page
+
     def get_expanded_page(self, page_path: str):
         return self._expanded_pages[page_path]
 
@@ -675,6 +916,9 @@ class BuildContext:
     def is_expanded_page_path(self, page_path: str):
         return page_path in self._expanded_pages
 
+    def set_rendered_page(self, page_path: str, rendered_page: str):
+        self._rendered_pages[page_path] = rendered_page
+
     def get_rendered_page(self, page_path: str):
         return self._rendered_pages[page_path]
 
@@ -690,7 +934,7 @@ class BuildContext:
     def export_file(
         self,
         export_path: str,
-        data: Union[str, bytes, bytearray, memoryview]
+        data: Union[str, bytes, bytearray, memoryview, StaticFile]
     ):
         normalized_export_path = os.path.normpath("/" + export_path)
         if normalized_export_path in self._exported_files:
@@ -699,6 +943,24 @@ class BuildContext:
                 "already exported to that path".format(normalized_export_path)
             )
         self._exported_files[normalized_export_path] = data
+        if self._current_page_path is not None:
+            self._exported_file_pages[
+                normalize_export_path(normalized_export_path)
+            ] = self._current_page_path
+
+    def export_static(self, source_path: str, export_path: str):
+        """Export a copy of a file without reading it into memory.
+
+        The file is copied (or hardlinked, if export_static_files_as_hardlinks
+        is enabled) when exported files are written, and it is skipped if
+        the existing copy has the same size and modification time.
+        """
+
+        if not os.path.isfile(source_path):
+            raise FileNotFoundError(
+                "static file does not exist: {}".format(source_path)
+            )
+        self.export_file(export_path, StaticFile(source_path))
 
     def get_exported_file(self, export_path: str):
         return self._exported_files[export_path]
@@ -712,12 +974,87 @@ class BuildContext:
     def is_exported_file_path(self, export_path: str):
         return export_path in self._exported_files
 
+    def get_asset_url(self, url: str) -> str:
+        """Return the fingerprinted URL of an asset, or url itself."""
+        return self._asset_urls.get(url, url)
+
+    def get_asset_urls(self):
+        return self._asset_urls.copy()
+
+    def get_page_build_time(self, page_path: str) -> float:
+        """Return the time in seconds spent building a page so far."""
+        return self._page_build_times.get(page_path, 0.0)
+
+    def get_expansion_stats(self, page_path: Union[str, None] = None):
+        """Return how many nodes were removed while expanding pages.
+
+        Stats are only recorded if coalesce_text_nodes is enabled. If
+        page_path is None, a dict of stats for each page is returned.
+        """
+
+        if page_path is None:
+            return {k: v.copy() for k, v in self._expansion_stats.items()}
+        return self._expansion_stats[page_path].copy()
+
+    def get_export_sources(self):
+        """Return the page, page group and build time of exported files.
+
+        Files that were not exported while building a page are omitted.
+        """
+
+        export_sources = {}
+        for export_path, page_path in self._exported_file_pages.items():
+            export_sources[export_path] = {
+                "page": page_path,
+                "page_group": self._name,
+                "build_time": self._page_build_times.get(page_path, 0.0),
+            }
+        return export_sources
+
+    def add_input_file(
+        self,
+        file_path: str,
+        page_path: Union[str, None] = None,
+    ):
+        """Declare that a page is built from the given file.
+
+        If page_path is None, the page that is currently being built is
+        used, or every page in this context if no page is being built.
+        Declared input files are used to rebuild only the affected pages
+        when the files change.
+        """
+
+        if not isinstance(file_path, (str, os.PathLike)):
+            raise TypeError("file_path must be a str or a path-like object")
+        file_path = os.path.abspath(file_path)
+        if page_path is None:
+            page_path = self._current_page_path
+        if page_path is None:
+            page_paths = [x.path for x in self._pages]
+        else:
+            page_paths = [page_path]
+        for path in page_paths:
+            if path not in self._input_files:
+                self._input_files[path] = []
+            if file_path not in self._input_files[path]:
+                self._input_files[path].append(file_path)
+
+    def get_input_files(self, page_path: Union[str, None] = None):
+        if page_path is None:
+            page_path = self._current_page_path
+        if page_path is None:
+            raise NoCurrentPageError(
+                "no page is currently being built in this context"
+            )
+        return list(self._input_files.get(page_path, ()))
+
 ROOT_BUILD_CONTEXT_CONFIG_DEFAULT_VALUES = {
     "export_root_path"                       : "./ophinode_exported_files",
     "default_layout"                         : None,
     "build_strategy"                         : "sync",
     "parallel_build_workers"                 : os.cpu_count(),
     "parallel_build_chunksize"               : 1,
+    "page_source_chunksize"                  : 1000,
     "page_default_file_name"                 : "index.html",
     "page_default_file_name_suffix"          : ".html",
     "auto_write_exported_page_build_files"   : False,
@@ -736,6 +1073,21 @@ ROOT_BUILD_CONTEXT_CONFIG_DEFAULT_VALUES = {
     "disable_auto_indent_when_rendering"     : False,
     "auto_indent_string_for_top_level"       : "  ",
     "append_newline_to_render_result"        : False,
+    "page_cache_path"                        : None,
+    "page_cache_max_size"                    : 256 * 1024 * 1024,
+    "export_compression_formats"             : (),
+    "export_compression_min_size"            : 1024,
+    "export_compression_file_suffixes"       : (
+        ".html", ".css", ".js", ".mjs", ".json", ".xml", ".svg", ".txt",
+    ),
+    "export_compression_workers"             : None,
+    "export_manifest_file_name"              : None,
+    "export_pages_as_bytes"                  : False,
+    "export_static_files_as_hardlinks"       : False,
+    "flat_expanded_pages"                    : False,
+    "coalesce_text_nodes"                    : False,
+    "asset_hash_length"                      : 8,
+    "asset_url_prefix"                       : "",
 }
 ROOT_BUILD_CONTEXT_CONFIG_KEYS = set(ROOT_BUILD_CONTEXT_CONFIG_DEFAULT_VALUES)
 
@@ -749,10 +1101,13 @@ class RootBuildContext:
         self,
         page_groups: dict,
         build_config: dict,
-        processors: dict,
+        processors: Union[dict, ProcessorRegistry],
         site_data: dict,
         page_data: dict,
         misc_data: dict,
+        page_paths: Union[Iterable[str], None] = None,
+        assets: Union[dict, None] = None,
+        asset_paths: Union[dict, None] = None,
     ):
         self._build_phase = BuildPhase.INIT
 
@@ -761,7 +1116,11 @@ class RootBuildContext:
             self.update_config(build_config)
 
         self._page_groups = page_groups
+        self._page_paths = None
+        if page_paths is not None:
+            self._page_paths = set(page_paths)
         self._subcontexts = []
+        self._page_groups_with_page_sources = []
         self._page_build_results = {}
         self._site_data = site_data
         self._page_data = page_data
@@ -770,114 +1129,129 @@ class RootBuildContext:
         self._expanded_pages = {}
         self._rendered_pages = {}
         self._exported_files = {}
-
-        self._preprocessors_before_site_build_preparation_stage = []
-        self._postprocessors_after_site_build_preparation_stage = []
-        self._preprocessors_before_site_build_finalization_stage = []
-        self._postprocessors_after_site_build_finalization_stage = []
-
-        if "pre_prepare_site_build" in processors:
-            l = self._preprocessors_before_site_build_preparation_stage
-            for proc in processors["pre_prepare_site_build"]:
-                if not callable(proc):
-                    raise ValueError(
-                        "pre- and post-processors must be callable"
-                    )
-                l.append(proc)
-
-        if "post_prepare_site_build" in processors:
-            l = self._postprocessors_after_site_build_preparation_stage
-            for proc in processors["post_prepare_site_build"]:
-                if not callable(proc):
-                    raise ValueError(
-                        "pre- and post-processors must be callable"
-                    )
-                l.append(proc)
-
-        if "pre_finalize_site_build" in processors:
-            l = self._preprocessors_before_site_build_finalization_stage
-            for proc in processors["pre_finalize_site_build"]:
-                if not callable(proc):
-                    raise ValueError(
-                        "pre- and post-processors must be callable"
-                    )
-                l.append(proc)
-
-        if "post_finalize_site_build" in processors:
-            l = self._postprocessors_after_site_build_finalization_stage
-            for proc in processors["post_finalize_site_build"]:
-                if not callable(proc):
-                    raise ValueError(
-                        "pre- and post-processors must be callable"
-                    )
-                l.append(proc)
+        self._input_files = {}
+        self._export_manifest = {}
+        self._export_sources = {}
+        self._expansion_stats = {}
+        self._assets = assets if assets is not None else {}
+        self._asset_paths = asset_paths
+        self._asset_urls = {}
+
+        self._processors = ProcessorRegistry(processors)
+
+    def _run_processors(self, phase: BuildPhase):
+        for processor in self._processors.get(phase):
+            processor(self)
 
     def _run_preprocessors_for_prepare_site_build(self) -> "RootBuildContext":
         self._set_build_phase(BuildPhase.PRE_PREPARE_SITE_BUILD)
-        for processor in self._preprocessors_before_site_build_preparation_stage:
-            processor(self)
+        self._run_processors(BuildPhase.PRE_PREPARE_SITE_BUILD)
         return self
 
     def _prepare_site_build(self) -> "RootBuildContext":
         self._set_build_phase(BuildPhase.PREPARE_SITE_BUILD)
+        self._prepare_assets()
         for page_group in self._page_groups.values():
+            if page_group.has_page_sources():
+                self._page_groups_with_page_sources.append(page_group)
+            if not page_group.has_pages(self._page_paths):
+                if page_group.has_page_sources():
+                    continue
+                if self._page_paths is not None:
+                    continue
             self.create_subcontext(page_group)
         return self
 
+    def _prepare_assets(self):
+        if not self._assets:
+            return
+        # asset URLs must be known before any page is rendered, so assets
+        # are hashed and exported before subcontexts are created
+        fingerprinted_paths = self._asset_paths
+        if fingerprinted_paths is None:
+            fingerprinted_paths = fingerprint_assets(
+                self._assets, self.get_config_value("asset_hash_length")
+            )
+        for export_path, data in self._assets.items():
+            self.export_file(fingerprinted_paths[export_path], data)
+        self._asset_urls = create_asset_url_mapping(
+            fingerprinted_paths, self.get_config_value("asset_url_prefix")
+        )
+
     def _run_postprocessors_for_prepare_site_build(self) -> "RootBuildContext":
         self._set_build_phase(BuildPhase.POST_PREPARE_SITE_BUILD)
-        for processor in self._postprocessors_after_site_build_preparation_stage:
-            processor(self)
+        self._run_processors(BuildPhase.POST_PREPARE_SITE_BUILD)
         return self
 
     def _run_preprocessors_for_finalize_site_build(self) -> "RootBuildContext":
         self._set_build_phase(BuildPhase.PRE_FINALIZE_SITE_BUILD)
-        for processor in self._preprocessors_before_site_build_finalization_stage:
-            processor(self)
+        self._run_processors(BuildPhase.PRE_FINALIZE_SITE_BUILD)
         return self
 
     def _finalize_site_build(self):
         self._set_build_phase(BuildPhase.FINALIZE_SITE_BUILD)
         if self.get_config_value("auto_write_exported_site_build_files"):
             self._write_exported_files()
+        self._write_export_manifest()
+        page_cache_path = self.get_config_value("page_cache_path")
+        if page_cache_path:
+            PageCache(
+                page_cache_path,
+                self.get_config_value("page_cache_max_size"),
+            ).evict()
 
     def _write_exported_files(self):
-        export_root_path_value = self.get_config_value("export_root_path")
-        if not export_root_path_value:
-            raise RootPathUndefinedError(
-                "failed to write exported files because export_root_path is "
-                "empty"
+        manifest_file_name = self.get_config_value("export_manifest_file_name")
+        previous_manifest = None
+        if manifest_file_name:
+            previous_manifest = load_export_manifest(
+                get_export_root_path(self), manifest_file_name
+            )
+            previous_manifest.update(self._export_manifest)
+        self._export_manifest.update(
+            write_exported_files(
+                self, self._exported_files, previous_manifest
             )
+        )
 
-        export_root_path = pathlib.Path(export_root_path_value)
-        export_root_path.mkdir(parents=True, exist_ok=True)
-
-        for path, file_content in self._exported_files.items():
-            target_path = export_root_path / path.lstrip('/')
-            target_directory = target_path.parent
-            target_directory.mkdir(parents=True, exist_ok=True)
-            if isinstance(file_content, (bytes, bytearray)):
-                with target_path.open(mode="wb") as f:
-                    f.write(file_content)
-            elif isinstance(file_content, str):
-                with target_path.open(mode="w", encoding="utf-8") as f:
-                    f.write(file_content)
-            else:
-                with target_path.open(mode="w", encoding="utf-8") as f:
-                    json.dump(file_content, f)
+    def _write_export_manifest(self):
+        manifest_file_name = self.get_config_value("export_manifest_file_name")
+        if not manifest_file_name or not self._export_manifest:
+            return
+        export_root_path = get_export_root_path(self)
+        entries = self.get_export_manifest()
+        if self._page_paths is not None:
+            # only some pages were built, so entries of the other pages are
+            # kept from the previous manifest
+            previous_entries = load_export_manifest(
+                export_root_path, manifest_file_name
+            )
+            previous_entries.update(entries)
+            entries = previous_entries
+        save_export_manifest(export_root_path, manifest_file_name, entries)
 
     def _run_postprocessors_for_finalize_site_build(self) -> "RootBuildContext":
         self._set_build_phase(BuildPhase.POST_FINALIZE_SITE_BUILD)
-        for processor in self._postprocessors_after_site_build_finalization_stage:
-            processor(self)
+        self._run_processors(BuildPhase.POST_FINALIZE_SITE_BUILD)
         return self
 
     def _merge_data_from_build_results(self, build_result: dict):
-        if "site_data" in build_result:
+        # In sync builds, subcontexts share data mappings with the root
+        # context, so merging them into themselves can be skipped
+        if (
+            "site_data" in build_result
+            and build_result["site_data"] is not self._site_data
+        ):
             self._site_data.update(build_result["site_data"])
-        if "page_data" in build_result:
+        if (
+            "page_data" in build_result
+            and build_result["page_data"] is not self._page_data
+        ):
             self._page_data.update(build_result["page_data"])
-        if "misc_data" in build_result:
+        if (
+            "misc_data" in build_result
+            and build_result["misc_data"] is not self._misc_data
+        ):
             self._misc_data.update(build_result["misc_data"])
         if "built_pages" in build_result:
             self._built_pages.update(build_result["built_pages"])
@@ -888,36 +1262,51 @@ class RootBuildContext:
         if "exported_files" in build_result:
             self._exported_files.update(build_result["exported_files"])
 
-    def build_site(self) -> "RootBuildContext":
+    def build_site(
+        self,
+        pool: Union[multiprocessing.pool.Pool, None] = None,
+    ) -> "RootBuildContext":
         self._run_preprocessors_for_prepare_site_build()
         self._prepare_site_build()
         self._run_postprocessors_for_prepare_site_build()
 
         build_strategy = self.get_config_value("build_strategy")
         if build_strategy == "sync":
-            for subcontext in self._subcontexts:
-                result = build_page_group(subcontext)
-                self._page_build_results[result["name"]] = result
-                if self.get_config_value(
-                    "gather_and_merge_page_build_results"
-                ):
-                    self._merge_data_from_build_results(result)
+            for subcontext in itertools.chain(
+                self._subcontexts,
+                self._iter_page_source_subcontexts(),
+            ):
+                self._handle_page_build_result(build_page_group(subcontext))
         elif build_strategy == "parallel":
-            pool = multiprocessing.Pool(
-                processes=self.get_config_value("parallel_build_workers")
-            )
+            workers = self.get_config_value("parallel_build_workers")
+            # an externally provided pool is kept running after the build,
+            # so that worker processes can be reused across builds
+            owns_pool = pool is None
+            if owns_pool:
+                pool = multiprocessing.Pool(processes=workers)
             for result in pool.imap_unordered(
                 build_page_group,
                 self._subcontexts,
                 self.get_config_value("parallel_build_chunksize")
             ):
-                self._page_build_results[result["name"]] = result
-                if self.get_config_value(
-                    "gather_and_merge_page_build_results"
-                ):
-                    self._merge_data_from_build_results(result)
-            pool.close()
-            pool.join()
+                self._handle_page_build_result(result)
+
+            # Subcontexts for page sources are submitted a few at a time,
+            # so that only a bounded number of chunks is held in memory
+            pending = collections.deque()
+            max_pending = 2 * (workers or os.cpu_count() or 1)
+            for subcontext in self._iter_page_source_subcontexts():
+                pending.append(
+                    pool.apply_async(build_page_group, (subcontext,))
+                )
+                if len(pending) >= max_pending:
+                    self._handle_page_build_result(pending.popleft().get())
+            while pending:
+                self._handle_page_build_result(pending.popleft().get())
+
+            if owns_pool:
+                pool.close()
+                pool.join()
         else:
             raise ValueError("unknown build strategy: {}".format(build_strategy))
 
@@ -927,17 +1316,101 @@ class RootBuildContext:
 
         return self
 
+    def _iter_page_source_subcontexts(self):
+        build_config = {}
+        for k in BUILD_CONTEXT_CONFIG_KEYS:
+            if k in self._config:
+                build_config[k] = self._config[k]
+
+        # When exported files are written to disk, each chunk writes its
+        # files as soon as it is built and does not return them, so that
+        # the files of every page are never held at once
+        write_chunks = self.get_config_value(
+            "auto_write_exported_site_build_files"
+        )
+        # The previous export manifest is loaded once, and each chunk gets
+        # the entries of its own pages, instead of loading the manifest
+        # for every chunk
+        previous_entries_by_page = None
+        manifest_file_name = self.get_config_value("export_manifest_file_name")
+        if write_chunks and manifest_file_name:
+            previous_entries_by_page = {}
+            previous_entries = load_export_manifest(
+                get_export_root_path(self), manifest_file_name
+            )
+            for export_path, entry in previous_entries.items():
+                page_entries = previous_entries_by_page.setdefault(
+                    entry.get("page"), {}
+                )
+                page_entries[export_path] = entry
+            del previous_entries
+        for page_group in self._page_groups_with_page_sources:
+            for subcontext in page_group.create_page_source_build_contexts(
+                build_config,
+                self._site_data,
+                self._page_data,
+                self._misc_data,
+                self.get_config_value("page_source_chunksize"),
+                self._page_paths,
+                self._asset_urls,
+            ):
+                if write_chunks:
+                    subcontext.update_config({
+                        "auto_write_exported_page_build_files": True,
+                        "return_exported_files_after_page_build": False,
+                    })
+                if previous_entries_by_page is not None:
+                    previous_manifest = {}
+                    for page_def in subcontext._pages:
+                        previous_manifest.update(
+                            previous_entries_by_page.get(page_def.path, ())
+                        )
+                    subcontext._previous_export_manifest = previous_manifest
+                yield subcontext
+
+    def _handle_page_build_result(self, result: dict):
+        name = result["name"]
+        if name in self._page_build_results:
+            # page groups with page sources are built in multiple chunks,
+            # so results from each chunk are merged into one
+            previous_result = self._page_build_results[name]
+            for k, v in result.items():
+                if k == "name":
+                    continue
+                if k not in previous_result:
+                    previous_result[k] = v
+                elif previous_result[k] is not v:
+                    previous_result[k].update(v)
+        else:
+            self._page_build_results[name] = result
+        if "input_files" in result:
+            self._input_files.update(result["input_files"])
+        if "export_manifest" in result:
+            self._export_manifest.update(result["export_manifest"])
+        if "export_sources" in result:
+            self._export_sources.update(result["export_sources"])
+        if "expansion_stats" in result:
+            self._expansion_stats.update(result["expansion_stats"])
+        if self.get_config_value("gather_and_merge_page_build_results"):
+            self._merge_data_from_build_results(result)
+
     def create_subcontext(self, page_group: "PageGroup"):
         build_config = {}
         for k in BUILD_CONTEXT_CONFIG_KEYS:
             if k in self._config:
                 build_config[k] = self._config[k]
 
+        pages = None
+        if self._page_paths is not None:
+            pages = page_group.get_pages(self._page_paths)
+
         subcontext = page_group.create_build_context(
             build_config,
             self._site_data,
             self._page_data,
             self._misc_data,
+            pages,
+            self._asset_urls,
         )
         self._subcontexts.append(subcontext)
 
@@ -1061,7 +1534,7 @@ class RootBuildContext:
     def export_file(
         self,
         export_path: str,
-        data: Union[str, bytes, bytearray, memoryview]
+        data: Union[str, bytes, bytearray, memoryview, StaticFile]
     ):
         normalized_export_path = os.path.normpath("/" + export_path)
         if normalized_export_path in self._exported_files:
@@ -1071,6 +1544,20 @@ class RootBuildContext:
             )
         self._exported_files[normalized_export_path] = data
 
+    def export_static(self, source_path: str, export_path: str):
+        """Export a copy of a file without reading it into memory.
+
+        The file is copied (or hardlinked, if export_static_files_as_hardlinks
+        is enabled) when exported files are written, and it is skipped if
+        the existing copy has the same size and modification time.
+        """
+
+        if not os.path.isfile(source_path):
+            raise FileNotFoundError(
+                "static file does not exist: {}".format(source_path)
+            )
+        self.export_file(export_path, StaticFile(source_path))
+
     def get_exported_file(self, export_path: str):
         return self._exported_files[export_path]
 
@@ -1083,6 +1570,45 @@ class RootBuildContext:
     def is_exported_file_path(self, export_path: str):
         return export_path in self._exported_files
 
+    def get_asset_url(self, url: str) -> str:
+        return self._asset_urls.get(url, url)
+
+    def get_asset_urls(self):
+        return self._asset_urls.copy()
+
+    def get_expansion_stats(self, page_path: Union[str, None] = None):
+        """Return how many nodes were removed while expanding pages.
+
+        Stats are only recorded if coalesce_text_nodes is enabled. If
+        page_path is None, a dict of stats for each page is returned.
+        """
+
+        if page_path is None:
+            return {k: v.copy() for k, v in self._expansion_stats.items()}
+        return self._expansion_stats[page_path].copy()
+
+    def get_export_manifest(self):
+        """Return the export manifest entries of the files written so far.
+
+        Each entry has the size and SHA-256 hash of a file, and the page,
+        page group and build time of the page that exported it (which are
+        None for files not exported by a page).
+        """
+
+        entries = {}
+        for export_path, entry in self._export_manifest.items():
+            entry = dict(entry)
+            entry.update(self._export_sources.get(export_path, {
+                "page": None,
+                "page_group": None,
+                "build_time": None,
+            }))
+            entries[export_path] = entry
+        return entries
+
     def get_page_build_result(self, page_group_name: str):
         return self._page_build_results[page_group_name]
 
+    def get_input_files(self):
+        return {k: list(v) for k, v in self._input_files.items()}
+
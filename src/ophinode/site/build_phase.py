@@ -0,0 +1,31 @@
+from enum import Enum
+
+class BuildPhase(Enum):
+    INIT                        = 0
+    PRE_PREPARE_SITE_BUILD      = 1
+    PREPARE_SITE_BUILD          = 2
+    POST_PREPARE_SITE_BUILD     = 3
+    PRE_PREPARE_PAGE_BUILD      = 4
+    PREPARE_PAGE_BUILD          = 5
+    POST_PREPARE_PAGE_BUILD     = 6
+    PRE_BUILD_PAGES             = 7
+    BUILD_PAGES                 = 8
+    POST_BUILD_PAGES            = 9
+    PRE_PREPARE_PAGE_EXPANSION  = 10
+    PREPARE_PAGE_EXPANSION      = 11
+    POST_PREPARE_PAGE_EXPANSION = 12
+    PRE_EXPAND_PAGES            = 13
+    EXPAND_PAGES                = 14
+    POST_EXPAND_PAGES           = 15
+    PRE_RENDER_PAGES            = 16
+    RENDER_PAGES                = 17
+    POST_RENDER_PAGES           = 18
+    PRE_EXPORT_PAGES            = 19
+    EXPORT_PAGES                = 20
+    POST_EXPORT_PAGES           = 21
+    PRE_FINALIZE_PAGE_BUILD     = 22
+    FINALIZE_PAGE_BUILD         = 23
+    POST_FINALIZE_PAGE_BUILD    = 24
+    PRE_FINALIZE_SITE_BUILD     = 25
+    FINALIZE_SITE_BUILD         = 26
+    POST_FINALIZE_SITE_BUILD    = 27
@@ -0,0 +1,56 @@
+import io
+import gzip
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# compression format name -> file name suffix of compressed variants
+COMPRESSION_FORMAT_SUFFIXES = {
+    "gzip"   : ".gz",
+    "brotli" : ".br",
+    "zstd"   : ".zst",
+}
+
+def _compress_gzip(data: bytes) -> bytes:
+    # mtime is fixed, so that the same content is always compressed to the
+    # same bytes
+    buf = io.BytesIO()
+    with gzip.GzipFile(
+        filename="", mode="wb", compresslevel=9, fileobj=buf, mtime=0
+    ) as f:
+        f.write(data)
+    return buf.getvalue()
+
+def _compress_brotli(data: bytes) -> bytes:
+    return brotli.compress(data)
+
+def _compress_zstd(data: bytes) -> bytes:
+    return zstandard.ZstdCompressor(level=19).compress(data)
+
+def is_compression_format_available(compression_format: str) -> bool:
+    if compression_format not in COMPRESSION_FORMAT_SUFFIXES:
+        raise ValueError(
+            "unknown compression format: {}".format(compression_format)
+        )
+    if compression_format == "brotli":
+        return brotli is not None
+    if compression_format == "zstd":
+        return zstandard is not None
+    return True
+
+def compress(data: bytes, compression_format: str) -> bytes:
+    if not is_compression_format_available(compression_format):
+        raise ValueError(
+            "compression format is not available because its module is not "
+            "installed: {}".format(compression_format)
+        )
+    if compression_format == "gzip":
+        return _compress_gzip(data)
+    if compression_format == "brotli":
+        return _compress_brotli(data)
+    return _compress_zstd(data)
@@ -0,0 +1,106 @@
+import sys
+import copy
+if sys.version_info.major == 3 and sys.version_info.minor < 9:
+    from typing import Mapping, MutableMapping
+else:
+    from collections.abc import Mapping, MutableMapping
+
+_IMMUTABLE_TYPES = (
+    str, bytes, int, float, complex, bool, type(None), frozenset, range,
+)
+
+class CopyOnWriteDict(MutableMapping):
+    """A mapping that shares its values with a base mapping.
+
+    A value is deep-copied from the base mapping when it is read for the
+    first time, not when it is written, because a value can be mutated
+    through the object that a read returns, e.g. data[key].append(x).
+    Mutations made through this mapping therefore never reach the base
+    mapping, and values that are never read are never copied. Values are
+    copied with a shared memo, so values that share an object in the base
+    mapping share its copy as well.
+
+    If base is itself a CopyOnWriteDict, its values are used as the base
+    values, so they are copied once instead of through both mappings.
+    """
+
+    def __init__(self, base: Mapping):
+        if not isinstance(base, Mapping):
+            raise TypeError("base must be a mapping")
+        if isinstance(base, CopyOnWriteDict):
+            self._base = base._get_values()
+        else:
+            self._base = dict(base)
+        self._copied = {}
+        self._deleted = set()
+        self._memo = {}
+
+    def __getitem__(self, key):
+        if key in self._copied:
+            return self._copied[key]
+        if key in self._deleted:
+            raise KeyError(key)
+        value = self._base[key]
+        if not isinstance(value, _IMMUTABLE_TYPES):
+            value = copy.deepcopy(value, self._memo)
+        self._copied[key] = value
+        return value
+
+    def __setitem__(self, key, value):
+        self._copied[key] = value
+        self._deleted.discard(key)
+
+    def __delitem__(self, key):
+        if key in self._copied:
+            del self._copied[key]
+            if key in self._base:
+                self._deleted.add(key)
+        elif key in self._base and key not in self._deleted:
+            self._deleted.add(key)
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        if key in self._copied:
+            return True
+        return key in self._base and key not in self._deleted
+
+    def __iter__(self):
+        for key in self._base:
+            if key not in self._deleted:
+                yield key
+        for key in self._copied:
+            if key not in self._base:
+                yield key
+
+    def __len__(self):
+        count = len(self._copied)
+        for key in self._base:
+            if key not in self._deleted and key not in self._copied:
+                count += 1
+        return count
+
+    def __repr__(self):
+        return "{}({!r})".format(self.__class__.__name__, dict(self))
+
+    def __reduce__(self):
+        # A pickled mapping is already a private copy, so it can be restored
+        # as a plain dict without copying each value again
+        return (dict, (self._get_values(),))
+
+    def _get_values(self) -> dict:
+        # the current values without copying the ones that are not read yet
+        values = {}
+        for key in self._base:
+            if key not in self._deleted:
+                values[key] = self._base[key]
+        values.update(self._copied)
+        return values
+
+    def copy(self):
+        new = self.__class__.__new__(self.__class__)
+        new._base = self._base
+        new._copied = self._copied.copy()
+        new._deleted = self._deleted.copy()
+        new._memo = {}
+        return new
@@ -1,3 +1,4 @@
+import gc
 import os
 import sys
 import copy
@@ -18,12 +19,26 @@ from ophinode.nodes.html.elements.fullname import (
 )
 from .page_group import PageGroup
 from .page_definition import PageDefinition
+from .export import normalize_export_path
+from .assets import fingerprint_assets
+from .copy_on_write import CopyOnWriteDict
+from .page_source import PageSource, parse_page_source_spec
+from .renderer import Renderer, _NodesPage, _NodesLayout
 from .build_contexts import (
     RootBuildContext,
     BuildContext,
     BuildPhase,
     ROOT_BUILD_CONTEXT_CONFIG_KEYS,
 )
+from .processors import (
+    ProcessorRegistry,
+    SITE_PROCESSOR_STAGES,
+    PAGE_GROUP_PROCESSOR_STAGES,
+    PAGE_PROCESSOR_STAGES,
+)
+
+# add_pages() pauses the cyclic garbage collector for at least this many pages
+_MIN_PAGES_TO_PAUSE_GC = 1000
 
 SITE_CONFIG_DEFAULT_VALUES = {
     "export_root_path"                       : "./ophinode_exported_files",
@@ -32,6 +47,7 @@ SITE_CONFIG_DEFAULT_VALUES = {
     "parallel_build_workers"                 : os.cpu_count(),
     "parallel_build_chunksize"               : 1,
     "preserve_site_definition_across_builds" : False,
+    "page_source_chunksize"                  : 1000,
     "page_default_file_name"                 : "index.html",
     "page_default_file_name_suffix"          : ".html",
     "auto_write_exported_page_build_files"   : False,
@@ -50,6 +66,21 @@ SITE_CONFIG_DEFAULT_VALUES = {
     "disable_auto_indent_when_rendering"     : False,
     "auto_indent_string_for_top_level"       : "  ",
     "append_newline_to_render_result"        : False,
+    "page_cache_path"                        : None,
+    "page_cache_max_size"                    : 256 * 1024 * 1024,
+    "export_compression_formats"             : (),
+    "export_compression_min_size"            : 1024,
+    "export_compression_file_suffixes"       : (
+        ".html", ".css", ".js", ".mjs", ".json", ".xml", ".svg", ".txt",
+    ),
+    "export_compression_workers"             : None,
+    "export_manifest_file_name"              : None,
+    "export_pages_as_bytes"                  : False,
+    "export_static_files_as_hardlinks"       : False,
+    "flat_expanded_pages"                    : False,
+    "coalesce_text_nodes"                    : False,
+    "asset_hash_length"                      : 8,
+    "asset_url_prefix"                       : "",
 }
 SITE_CONFIG_KEYS = set(SITE_CONFIG_DEFAULT_VALUES)
 
@@ -84,63 +115,14 @@ class Site:
         self._pages = []
         self._page_groups = {}
         self._page_data = {}
+        self._assets = {}
+        self._asset_paths = None
         if pages is not None:
             if not isinstance(pages, Iterable):
                 raise TypeError("pages must be an iterable")
-            for page_spec in pages:
-                if isinstance(
-                    page_spec, (str, bytes, bytearray, memoryview)
-                ):
-                    raise TypeError(
-                        "object of type {} cannot be given as a page "
-                        "specification".format(page_spec.__class__.__name__)
-                    )
-                elif isinstance(page_spec, Mapping):
-                    if "path" not in page_spec:
-                        raise ValueError(
-                            "page specification does not contain 'path'"
-                        )
-                    if "page" not in page_spec:
-                        raise ValueError(
-                            "page specification does not contain 'page'"
-                        )
-                    path = page_spec["path"]
-                    page = page_spec["page"]
-                    page_group = None
-                    dependency_group = None
-                    if "page_group" in page_spec:
-                        page_group = page_spec["page_group"]
-                    if "dependency_group" in page_spec:
-                        dependency_group = page_spec["dependency_group"]
-                elif isinstance(page_spec, Sequence):
-                    if len(page_spec) == 2:
-                        path, page = page_spec
-                        page_group, dependency_group = None, None
-                    elif len(page_spec) == 3:
-                        path, page, page_group = page_spec
-                        dependency_group = None
-                    elif len(page_spec) == 4:
-                        path, page, page_group, dependency_group = (
-                            page_spec
-                        )
-                    else:
-                        raise ValueError(
-                            "page specification contains wrong number of "
-                            "arguments (expected 2~4, but {} given)".format(
-                                len(page_spec)
-                            )
-                        )
-                else:
-                    raise TypeError(
-                        "object of type {} cannot be given as a page "
-                        "specification".format(page_spec.__class__.__name__)
-                    )
-                self.add_page(path, page, page_group, dependency_group)
+            self.add_pages(pages)
 
-        self._preprocessors_before_site_build_preparation_stage = []
-        self._postprocessors_after_site_build_preparation_stage = []
-        self._preprocessors_before_site_build_finalization_stage = []
-        self._postprocessors_after_site_build_finalization_stage = []
+        self._processors = ProcessorRegistry()
         if processors is not None:
             if not isinstance(processors, Iterable):
                 raise TypeError("processors must be an iterable")
@@ -240,6 +222,8 @@ class Site:
         if key not in SITE_CONFIG_KEYS:
             raise ValueError("unknown config key: {}".format(key))
         self._config[key] = value
+        if key == "asset_hash_length":
+            self._asset_paths = None
 
     def update_config(
         self,
@@ -254,6 +238,8 @@ class Site:
                     continue
                 raise ValueError("unknown config key: {}".format(k))
             self._config[k] = v
+        if "asset_hash_length" in config_values:
+            self._asset_paths = None
 
     def get_page_group(self, page_group: str):
         if not isinstance(page_group, str):
@@ -306,6 +292,184 @@ class Site:
 
         return page_definition
 
+    def add_pages(
+        self,
+        pages: Union[
+            Iterable[Tuple[str, Page]],
+            Iterable[Tuple[str, Page, str]],
+            Iterable[Tuple[str, Page, str, str]],
+            Iterable[Mapping[str, Any]],
+            Sequence[Page],
+        ],
+        paths: Union[Sequence[str], None] = None,
+        page_group: Union[str, None] = None,
+    ):
+        """Add many pages at once.
+
+        pages is either an iterable of page specifications (as accepted by
+        the constructor), or, if paths is given, a sequence of pages where
+        pages[i] is added at paths[i] (columnar input). page_group is used
+        for pages whose specification does not name a page group.
+
+        All pages are validated before any of them is added, so either all
+        pages are added or none of them. Returns a list of the page
+        definitions of the added pages.
+        """
+
+        if page_group is None:
+            page_group = "default"
+        if not isinstance(page_group, str):
+            raise TypeError(
+                "page_group must be a str, not {}".format(
+                    page_group.__class__.__name__
+                )
+            )
+
+        if paths is None:
+            paths, pages, page_groups, dependency_groups = _parse_page_specs(
+                pages, page_group
+            )
+        else:
+            paths = list(paths)
+            pages = list(pages)
+            if len(paths) != len(pages):
+                raise ValueError(
+                    "paths and pages must have the same length ({} != "
+                    "{})".format(len(paths), len(pages))
+                )
+            page_groups = [page_group] * len(paths)
+            dependency_groups = paths
+
+        # validate types once per distinct type rather than once per page
+        for t in set(map(type, paths)):
+            if not issubclass(t, str):
+                raise TypeError(
+                    "path to a page must be a str, not {}".format(t.__name__)
+                )
+        for t in set(map(type, pages)):
+            if not issubclass(t, Page):
+                raise TypeError(
+                    "page must be an instance of Page, not {}".format(
+                        t.__name__
+                    )
+                )
+        for t in set(map(type, page_groups)):
+            if not issubclass(t, str):
+                raise TypeError(
+                    "page_group must be a str, not {}".format(t.__name__)
+                )
+        if (
+            len(set(paths)) != len(paths)
+            or not self._pages_dict.keys().isdisjoint(paths)
+        ):
+            seen = set(self._pages_dict)
+            for path in paths:
+                if path in seen:
+                    raise ValueError("duplicate page path: " + path)
+                seen.add(path)
+
+        # creating many objects at once triggers the cyclic garbage
+        # collector repeatedly, although none of them can form a cycle.
+        # The collector is a process-wide setting, so it is only paused
+        # for batches large enough to benefit, and left as it was if it is
+        # already disabled.
+        pause_gc = len(paths) >= _MIN_PAGES_TO_PAUSE_GC and gc.isenabled()
+        if pause_gc:
+            gc.disable()
+        try:
+            page_definitions = list(map(
+                PageDefinition, paths, pages, page_groups, dependency_groups
+            ))
+
+            page_definitions_by_group = {}
+            for page_definition in page_definitions:
+                name = page_definition.page_group
+                if name not in page_definitions_by_group:
+                    page_definitions_by_group[name] = []
+                page_definitions_by_group[name].append(page_definition)
+            for name, group_page_definitions in (
+                page_definitions_by_group.items()
+            ):
+                if name not in self._page_groups:
+                    self._page_groups[name] = PageGroup(name)
+                self._page_groups[name].add_pages(group_page_definitions)
+
+            self._pages_dict.update(zip(paths, page_definitions))
+            self._pages.extend(page_definitions)
+            self._page_data.update((path, {}) for path in paths)
+        finally:
+            if pause_gc:
+                gc.enable()
+
+        return page_definitions
+
+    def add_page_source(
+        self,
+        source: Union[PageSource, Iterable, Callable[[], Iterable]],
+        page_group: Union[str, None] = None,
+    ):
+        if not isinstance(source, PageSource):
+            source = PageSource(source)
+        if page_group is None:
+            page_group = "default"
+        if not isinstance(page_group, str):
+            raise TypeError(
+                "page_group must be a str, not {}".format(
+                    page_group.__class__.__name__
+                )
+            )
+
+        if page_group not in self._page_groups:
+            self._page_groups[page_group] = PageGroup(page_group)
+        self._page_groups[page_group].add_page_source(source)
+
+        return source
+
+    def add_asset(
+        self,
+        export_path: str,
+        data: Union[str, bytes, bytearray, memoryview],
+    ):
+        """Add a file that is exported under a content-addressed name.
+
+        An asset added as "/css/main.css" is exported as
+        "/css/main.<hash>.css", and href and src attributes referring to
+        "/css/main.css" are rewritten to the new path while rendering.
+        Assets are exported along with the files of the site build. The
+        data of an asset is hashed once, so it must not be modified after
+        the asset is added.
+        """
+
+        if not isinstance(export_path, str):
+            raise TypeError(
+                "export path of an asset must be a str, not {}".format(
+                    export_path.__class__.__name__
+                )
+            )
+        if not isinstance(data, (str, bytes, bytearray, memoryview)):
+            raise TypeError(
+                "data of an asset must be a str or a bytes-like object, not "
+                "{}".format(data.__class__.__name__)
+            )
+        export_path = normalize_export_path(export_path)
+        if export_path in self._assets:
+            raise ValueError("duplicate asset path: " + export_path)
+        self._assets[export_path] = data
+        self._asset_paths = None
+
+    def get_assets(self):
+        return self._assets.copy()
+
+    def get_asset_paths(self):
+        """Return a mapping of asset export paths to fingerprinted paths."""
+        if self._asset_paths is None:
+            # hashing every asset on each build would make builds of a few
+            # pages slow, so the paths are kept until assets change
+            self._asset_paths = fingerprint_assets(
+                self._assets, self.get_config_value("asset_hash_length")
+            )
+        return self._asset_paths.copy()
+
     def get_page(self, path: str):
         if not isinstance(path, str):
             raise TypeError("path to a page must be a str")
@@ -322,6 +486,20 @@ class Site:
             raise TypeError("path to a page must be a str")
         return path in self._pages_dict
 
+    def get_page_source_paths(self):
+        """Return the paths of the pages defined by page sources.
+
+        Page sources define pages lazily, so they are iterated to find the
+        paths, which can be as slow as building the pages.
+        """
+
+        paths = []
+        for page_group in self._page_groups.values():
+            for page_source in page_group.get_page_sources():
+                for page_spec in page_source.iter_page_specs():
+                    paths.append(parse_page_source_spec(page_spec)[0])
+        return paths
+
     def add_processor(
         self,
         stage: str,
@@ -335,42 +513,16 @@ class Site:
         if page_group is not None and not isinstance(page_group, str):
             raise ValueError("page_group must be a str or None")
 
-        if stage in (
-            "pre_prepare_site_build",
-            "post_prepare_site_build",
-            "pre_finalize_site_build",
-            "post_finalize_site_build",
-        ):
+        if stage in SITE_PROCESSOR_STAGES:
             if page_group is not None:
                 raise ValueError(
                     "preprocessors and postprocessors for site build can "
                     "only have 'page_group' set to None"
                 )
-            if stage == "pre_prepare_site_build":
-                self._preprocessors_before_site_build_preparation_stage.append(processor)
-            elif stage == "post_prepare_site_build":
-                self._postprocessors_after_site_build_preparation_stage.append(processor)
-            elif stage == "pre_finalize_site_build":
-                self._preprocessors_before_site_build_finalization_stage.append(processor)
-            elif stage == "post_finalize_site_build":
-                self._postprocessors_after_site_build_finalization_stage.append(processor)
-            else:
-                raise ValueError("invalid processor stage: '{}'".format(stage))
-        elif stage in (
-            "pre_prepare_page_build",
-            "post_prepare_page_build",
-            "pre_build_pages",
-            "post_build_pages",
-            "pre_prepare_page_expansion",
-            "post_prepare_page_expansion",
-            "pre_expand_pages",
-            "post_expand_pages",
-            "pre_render_pages",
-            "post_render_pages",
-            "pre_export_pages",
-            "post_export_pages",
-            "pre_finalize_page_build",
-            "post_finalize_page_build",
+            self._processors = self._processors.add(stage, processor)
+        elif (
+            stage in PAGE_GROUP_PROCESSOR_STAGES
+            or stage in PAGE_PROCESSOR_STAGES
         ):
             if page_group is None:
                 page_group = "default"
@@ -406,7 +558,10 @@ class Site:
             raise TypeError("page group name must be a str")
         return self._page_group[page_group_name].page_group_data
 
-    def create_root_build_context(self) -> RootBuildContext:
+    def create_root_build_context(
+        self,
+        page_paths: Union[Iterable[str], None] = None,
+    ) -> RootBuildContext:
         build_config = {}
         for k in ROOT_BUILD_CONTEXT_CONFIG_KEYS:
             if k in self._config:
@@ -415,36 +570,14 @@ class Site:
         if self.get_config_value("preserve_site_definition_across_builds"):
             build_config_to_pass = copy.deepcopy(build_config)
             page_groups = copy.deepcopy(self._page_groups)
-            pre_preparation = copy.deepcopy(
-                self._preprocessors_before_site_build_preparation_stage
-            )
-            post_preparation = copy.deepcopy(
-                self._postprocessors_after_site_build_preparation_stage
-            )
-            pre_finalization = copy.deepcopy(
-                self._preprocessors_before_site_build_finalization_stage
-            )
-            post_finalization = copy.deepcopy(
-                self._postprocessors_after_site_build_finalization_stage
-            )
-            site_data = copy.deepcopy(self._site_data)
-            page_data = copy.deepcopy(self._page_data)
-            misc_data = copy.deepcopy(self._misc_data)
+            processors = copy.deepcopy(self._processors)
+            site_data = CopyOnWriteDict(self._site_data)
+            page_data = CopyOnWriteDict(self._page_data)
+            misc_data = CopyOnWriteDict(self._misc_data)
         else:
             build_config_to_pass = build_config
             page_groups = self._page_groups.copy()
-            pre_preparation = (
-                self._preprocessors_before_site_build_preparation_stage
-            ).copy()
-            post_preparation = (
-                self._postprocessors_after_site_build_preparation_stage
-            ).copy()
-            pre_finalization = (
-                self._preprocessors_before_site_build_finalization_stage
-            ).copy()
-            post_finalization = (
-                self._postprocessors_after_site_build_finalization_stage
-            ).copy()
+            processors = self._processors
             site_data = self._site_data.copy()
             page_data = self._page_data.copy()
             misc_data = self._misc_data.copy()
@@ -452,20 +585,74 @@ class Site:
         return RootBuildContext(
             page_groups,
             build_config_to_pass,
-            {
-                "pre_prepare_site_build": pre_preparation,
-                "post_prepare_site_build": post_preparation,
-                "pre_finalize_site_build": pre_finalization,
-                "post_finalize_site_build": post_finalization,
-            },
+            processors,
             site_data,
             page_data,
             misc_data,
+            page_paths,
+            self._assets.copy(),
+            self.get_asset_paths() if self._assets else None,
         )
 
-    def build_site(self):
-        context = self.create_root_build_context()
-        return context.build_site()
+    def build_site(
+        self,
+        page_paths: Union[Iterable[str], None] = None,
+        pool: Union["multiprocessing.pool.Pool", None] = None,
+    ):
+        context = self.create_root_build_context(page_paths)
+        return context.build_site(pool)
+
+def _parse_page_specs(page_specs: Iterable, default_page_group: str):
+    paths, pages, page_groups, dependency_groups = [], [], [], []
+    for page_spec in page_specs:
+        if type(page_spec) is tuple and len(page_spec) == 2:
+            # fast path for the most common form of page specifications
+            path, page = page_spec
+            page_group, dependency_group = None, None
+        elif isinstance(page_spec, (str, bytes, bytearray, memoryview)):
+            raise TypeError(
+                "object of type {} cannot be given as a page "
+                "specification".format(page_spec.__class__.__name__)
+            )
+        elif isinstance(page_spec, Mapping):
+            if "path" not in page_spec:
+                raise ValueError("page specification does not contain 'path'")
+            if "page" not in page_spec:
+                raise ValueError("page specification does not contain 'page'")
+            path = page_spec["path"]
+            page = page_spec["page"]
+            page_group = page_spec.get("page_group")
+            dependency_group = page_spec.get("dependency_group")
+        elif isinstance(page_spec, Sequence):
+            if len(page_spec) == 2:
+                path, page = page_spec
+                page_group, dependency_group = None, None
+            elif len(page_spec) == 3:
+                path, page, page_group = page_spec
+                dependency_group = None
+            elif len(page_spec) == 4:
+                path, page, page_group, dependency_group = page_spec
+            else:
+                raise ValueError(
+                    "page specification contains wrong number of "
+                    "arguments (expected 2~4, but {} given)".format(
+                        len(page_spec)
+                    )
+                )
+        else:
+            raise TypeError(
+                "object of type {} cannot be given as a page "
+                "specification".format(page_spec.__class__.__name__)
+            )
+        paths.append(path)
+        pages.append(page)
+        page_groups.append(
+            page_group if page_group is not None else default_page_group
+        )
+        dependency_groups.append(
+            dependency_group if dependency_group is not None else path
+        )
+    return paths, pages, page_groups, dependency_groups
 
 def render_page(
     page: Page,
@@ -483,6 +670,17 @@ def render_page(
     auto_indent: bool = True,
     auto_indent_string: str = "  ",
 ):
+    if processors is None:
+        renderer = Renderer(
+            default_layout,
+            escape_ampersands,
+            escape_tag_delimiters,
+            auto_newline,
+            auto_indent,
+            auto_indent_string,
+        )
+        return renderer.render_page(page)
+
     config = {
         "export_root_path": "/",
         "build_strategy": "sync",
@@ -517,6 +715,17 @@ def render_nodes(
     auto_indent: bool = True,
     auto_indent_string: str = "  ",
 ):
+    if processors is None:
+        renderer = Renderer(
+            None,
+            escape_ampersands,
+            escape_tag_delimiters,
+            auto_newline,
+            auto_indent,
+            auto_indent_string,
+        )
+        return renderer.render_nodes(*nodes)
+
     config = {
         "export_root_path": "/",
         "build_strategy": "sync",
@@ -529,14 +738,8 @@ def render_nodes(
         "disable_auto_indent_when_rendering": not auto_indent,
         "auto_indent_string_for_top_level": auto_indent_string,
     }
-    class TempPage(Page):
-        def __init__(self, nodes):
-            self.nodes = nodes
-    class TempLayout(Layout):
-        def build(self, page: TempPage, context: BuildContext):
-            return page.nodes
-    config["default_layout"] = TempLayout()
-    site = Site(config, [("/", TempPage(list(nodes)))], processors)
+    config["default_layout"] = _NodesLayout()
+    site = Site(config, [("/", _NodesPage(list(nodes)))], processors)
     context = site.build_site()
     result = context.get_page_build_result("default")
     return result["rendered_pages"]["/"]
@@ -0,0 +1,316 @@
+import os
+import json
+import hashlib
+import pathlib
+import concurrent.futures
+from typing import Any, Union
+
+from ophinode.exceptions.site import RootPathUndefinedError
+from .compression import (
+    COMPRESSION_FORMAT_SUFFIXES,
+    is_compression_format_available,
+    compress,
+)
+from .static_file import StaticFile, write_static_file
+
+# Increment this when the format of export manifests changes
+EXPORT_MANIFEST_FORMAT_VERSION = 2
+
+def encode_file_content(file_content: Any) -> bytes:
+    if isinstance(file_content, bytes):
+        return file_content
+    if isinstance(file_content, StaticFile):
+        return file_content.read_bytes()
+    if isinstance(file_content, (bytearray, memoryview)):
+        return bytes(file_content)
+    if isinstance(file_content, str):
+        return file_content.encode("utf-8")
+    return json.dumps(file_content).encode("utf-8")
+
+def normalize_export_path(path: str) -> str:
+    return "/" + path.lstrip("/")
+
+def get_export_root_path(context) -> pathlib.Path:
+    export_root_path_value = context.get_config_value("export_root_path")
+    if not export_root_path_value:
+        raise RootPathUndefinedError(
+            "failed to write exported files because export_root_path is "
+            "empty"
+        )
+    return pathlib.Path(export_root_path_value)
+
+def load_export_manifest(export_root_path: pathlib.Path, file_name: str):
+    """Load the entries of an export manifest written by a previous build.
+
+    An empty dict is returned if the manifest does not exist, cannot be
+    parsed, or was written in a different format.
+    """
+
+    entries = {}
+    try:
+        with (export_root_path / file_name).open(
+            mode="r", encoding="utf-8"
+        ) as f:
+            header = json.loads(f.readline() or "null")
+            if (
+                not isinstance(header, dict)
+                or header.get("version") != EXPORT_MANIFEST_FORMAT_VERSION
+            ):
+                return {}
+            for line in f:
+                entry = json.loads(line)
+                entries[entry.pop("path")] = entry
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return {}
+    return entries
+
+def save_export_manifest(
+    export_root_path: pathlib.Path,
+    file_name: str,
+    entries: dict,
+):
+    """Write an export manifest in the JSON Lines format.
+
+    The first line is a header with the format version, and each following
+    line is an object describing one exported file, sorted by path.
+    """
+
+    target_path = export_root_path / file_name
+    target_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = target_path.with_name(
+        "{}.{}.tmp".format(target_path.name, os.getpid())
+    )
+    with temp_path.open(mode="w", encoding="utf-8") as f:
+        f.write(json.dumps(
+            {"version": EXPORT_MANIFEST_FORMAT_VERSION},
+            separators=(",", ":"),
+        ))
+        f.write("\n")
+        for path in sorted(entries):
+            line = {"path": path}
+            line.update(entries[path])
+            f.write(json.dumps(line, separators=(",", ":")))
+            f.write("\n")
+    os.replace(str(temp_path), str(target_path))
+
+def _get_file_size(path: pathlib.Path) -> Union[int, None]:
+    try:
+        return path.stat().st_size
+    except OSError:
+        return None
+
+class _ExportedFileWriter:
+    def __init__(
+        self,
+        export_root_path: pathlib.Path,
+        compression_formats: list,
+        compression_min_size: int,
+        compression_file_suffixes: Union[tuple, None],
+        previous_manifest: dict,
+        use_hardlinks: bool,
+        hash_static_files: bool,
+    ):
+        self._export_root_path = export_root_path
+        self._compression_formats = compression_formats
+        self._compression_min_size = compression_min_size
+        self._compression_file_suffixes = compression_file_suffixes
+        self._previous_manifest = previous_manifest
+        self._use_hardlinks = use_hardlinks
+        self._hash_static_files = hash_static_files
+
+    def _should_compress(self, path: str, size: int) -> bool:
+        if not self._compression_formats:
+            return False
+        if size < self._compression_min_size:
+            return False
+        suffixes = self._compression_file_suffixes
+        return suffixes is None or path.endswith(suffixes)
+
+    def write(self, item):
+        path, file_content = item
+        path = normalize_export_path(path)
+        if isinstance(file_content, StaticFile):
+            return path, self._write_static_file(path, file_content)
+
+        data = encode_file_content(file_content)
+        data_hash = hashlib.sha256(data).hexdigest()
+        target_path = self._export_root_path / path.lstrip("/")
+
+        # files that have not changed since the previous build are not
+        # written (and compressed) again
+        previous_entry = self._previous_manifest.get(path)
+        unchanged = (
+            previous_entry is not None
+            and previous_entry.get("sha256") == data_hash
+            and _get_file_size(target_path) == len(data)
+        )
+        if not unchanged:
+            target_path.parent.mkdir(parents=True, exist_ok=True)
+            with target_path.open(mode="wb") as f:
+                f.write(data)
+
+        entry = {"size": len(data), "sha256": data_hash}
+        if self._should_compress(path, len(data)):
+            compressed = self._write_compressed_variants(
+                target_path, data, previous_entry if unchanged else None
+            )
+            if compressed:
+                entry["compressed"] = compressed
+        return path, entry
+
+    def _write_static_file(self, path: str, static_file: StaticFile):
+        target_path = self._export_root_path / path.lstrip("/")
+        written = write_static_file(
+            static_file, target_path, self._use_hardlinks
+        )
+        source_stat = os.stat(static_file.source_path)
+
+        # the hash of a static file is reused from the previous manifest
+        # while the source file keeps its size and modification time
+        previous_entry = self._previous_manifest.get(path)
+        unchanged = (
+            previous_entry is not None
+            and previous_entry.get("size") == source_stat.st_size
+            and previous_entry.get("mtime_ns") == source_stat.st_mtime_ns
+        )
+        entry = {
+            "size": source_stat.st_size,
+            "mtime_ns": source_stat.st_mtime_ns,
+        }
+        if unchanged and "sha256" in previous_entry:
+            entry["sha256"] = previous_entry["sha256"]
+        elif self._hash_static_files:
+            entry["sha256"] = static_file.get_hash()
+
+        if self._should_compress(path, source_stat.st_size):
+            compressed = self._write_compressed_variants(
+                target_path,
+                static_file,
+                previous_entry if unchanged and not written else None,
+            )
+            if compressed:
+                entry["compressed"] = compressed
+        return entry
+
+    def _write_compressed_variants(
+        self,
+        target_path: pathlib.Path,
+        data: Union[bytes, StaticFile],
+        previous_entry: Union[dict, None],
+    ):
+        # compressed variants listed in previous_entry are reused if they
+        # still exist with the same size
+        compressed = {}
+        previous_compressed = {}
+        if previous_entry is not None:
+            previous_compressed = previous_entry.get("compressed", {})
+        for compression_format in self._compression_formats:
+            variant_path = target_path.with_name(
+                target_path.name
+                + COMPRESSION_FORMAT_SUFFIXES[compression_format]
+            )
+            variant_size = previous_compressed.get(compression_format)
+            if (
+                variant_size is not None
+                and _get_file_size(variant_path) == variant_size
+            ):
+                compressed[compression_format] = variant_size
+                continue
+            if isinstance(data, StaticFile):
+                data = data.read_bytes()
+            compressed_data = compress(data, compression_format)
+            with variant_path.open(mode="wb") as f:
+                f.write(compressed_data)
+            compressed[compression_format] = len(compressed_data)
+        return compressed
+
+def _as_tuple(value):
+    # a single str is accepted in place of a sequence of str, and must not
+    # be iterated character by character
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return (value,)
+    return tuple(value)
+
+def write_exported_files(
+    context,
+    exported_files: dict,
+    previous_manifest: Union[dict, None] = None,
+) -> dict:
+    """Write exported files under the export root path of a build context.
+
+    If export compression formats are configured, compressed variants of
+    the exported files are written next to them from the in-memory
+    content, using a thread pool. If an export manifest file name is
+    configured, files that are unchanged according to previous_manifest
+    (which is loaded from the export root path if it is None) are skipped.
+
+    Returns the export manifest entries of the written files, or an empty
+    dict if no export manifest file name is configured.
+    """
+
+    export_root_path = get_export_root_path(context)
+    export_root_path.mkdir(parents=True, exist_ok=True)
+
+    compression_formats = [
+        x for x in _as_tuple(
+            context.get_config_value("export_compression_formats")
+        ) or ()
+        if is_compression_format_available(x)
+    ]
+    manifest_file_name = context.get_config_value("export_manifest_file_name")
+
+    use_hardlinks = context.get_config_value(
+        "export_static_files_as_hardlinks"
+    )
+
+    if not compression_formats and not manifest_file_name:
+        for path, file_content in exported_files.items():
+            target_path = export_root_path / path.lstrip('/')
+            if isinstance(file_content, StaticFile):
+                write_static_file(file_content, target_path, use_hardlinks)
+                continue
+            target_directory = target_path.parent
+            target_directory.mkdir(parents=True, exist_ok=True)
+            if isinstance(file_content, (bytes, bytearray, memoryview)):
+                with target_path.open(mode="wb") as f:
+                    f.write(file_content)
+            elif isinstance(file_content, str):
+                with target_path.open(mode="w", encoding="utf-8") as f:
+                    f.write(file_content)
+            else:
+                with target_path.open(mode="w", encoding="utf-8") as f:
+                    json.dump(file_content, f)
+        return {}
+
+    if previous_manifest is None:
+        previous_manifest = {}
+        if manifest_file_name:
+            previous_manifest = load_export_manifest(
+                export_root_path, manifest_file_name
+            )
+    writer = _ExportedFileWriter(
+        export_root_path,
+        compression_formats,
+        context.get_config_value("export_compression_min_size"),
+        _as_tuple(
+            context.get_config_value("export_compression_file_suffixes")
+        ),
+        previous_manifest,
+        use_hardlinks,
+        bool(manifest_file_name),
+    )
+
+    workers = context.get_config_value("export_compression_workers")
+    if workers == 1 or len(exported_files) < 2:
+        entries = dict(map(writer.write, exported_files.items()))
+    else:
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers
+        ) as executor:
+            entries = dict(executor.map(writer.write, exported_files.items()))
+
+    if not manifest_file_name:
+        return {}
+    return entries
@@ -41,6 +41,13 @@ class Page:
             export_path += page_default_file_name_suffix
 
         render_result = context.get_rendered_page(context.current_page_path)
+        if (
+            isinstance(render_result, str)
+            and context.get_config_value("export_pages_as_bytes")
+        ):
+            # encode once here, so that writing, hashing and compressing
+            # the exported file do not encode it again
+            render_result = render_result.encode("utf-8")
         context.export_file(export_path, render_result)
 
     def finalize_page(self, context: "ophinode.site.BuildContext"):
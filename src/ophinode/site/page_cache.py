@@ -0,0 +1,112 @@
+import os
+import zlib
+import hashlib
+import pathlib
+from typing import Any, Union
+
+from ophinode.nodes.fingerprint import fingerprint
+
+# Increment this when the format of cache keys or entries changes
+PAGE_CACHE_FORMAT_VERSION = 3
+
+PAGE_CACHE_CONFIG_KEYS = (
+    "html_default_escape_ampersands",
+    "html_default_escape_tag_delimiters",
+    "disable_auto_newline_when_rendering",
+    "disable_auto_indent_when_rendering",
+    "auto_indent_string_for_top_level",
+    "append_newline_to_render_result",
+)
+
+class PageCache:
+    """A size-bounded on-disk cache of rendered pages.
+
+    Each entry is stored in its own file under the cache directory as
+    zlib-compressed UTF-8 text. When the total size of the entries exceeds
+    max_size, the least recently used entries are removed by evict().
+    """
+
+    def __init__(
+        self,
+        cache_path: str,
+        max_size: int,
+        asset_urls: Union[dict, None] = None,
+    ):
+        self._cache_path = pathlib.Path(cache_path)
+        self._max_size = max_size
+        # rendered pages depend on asset URLs through rewritten attributes
+        self._asset_urls_repr = repr(sorted((asset_urls or {}).items()))
+
+    def make_key(
+        self,
+        page_path: str,
+        built_page: Any,
+        context: "ophinode.site.BuildContext",
+    ) -> Union[str, None]:
+        built_page_fingerprint = fingerprint(built_page)
+        if built_page_fingerprint is None:
+            return None
+        config_values = [
+            context.get_config_value(k) for k in PAGE_CACHE_CONFIG_KEYS
+        ]
+        h = hashlib.sha256()
+        h.update(repr(PAGE_CACHE_FORMAT_VERSION).encode("utf-8"))
+        h.update(b"\0")
+        h.update(page_path.encode("utf-8"))
+        h.update(b"\0")
+        h.update(built_page_fingerprint.encode("utf-8"))
+        h.update(b"\0")
+        h.update(repr(config_values).encode("utf-8"))
+        h.update(b"\0")
+        h.update(self._asset_urls_repr.encode("utf-8"))
+        return h.hexdigest()
+
+    def _entry_path(self, key: str) -> pathlib.Path:
+        return self._cache_path / key[:2] / key
+
+    def get(self, key: str) -> Union[str, None]:
+        entry_path = self._entry_path(key)
+        try:
+            with entry_path.open(mode="rb") as f:
+                data = f.read()
+            os.utime(str(entry_path))
+        except OSError:
+            return None
+        try:
+            return zlib.decompress(data).decode("utf-8")
+        except (zlib.error, UnicodeDecodeError):
+            return None
+
+    def set(self, key: str, rendered_page: str):
+        entry_path = self._entry_path(key)
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = entry_path.with_name(
+            "{}.{}.tmp".format(key, os.getpid())
+        )
+        with temp_path.open(mode="wb") as f:
+            f.write(zlib.compress(rendered_page.encode("utf-8")))
+        os.replace(str(temp_path), str(entry_path))
+
+    def evict(self):
+        if not self._cache_path.is_dir():
+            return
+        entries = []
+        total_size = 0
+        for entry_path in self._cache_path.glob("*/*"):
+            try:
+                st = entry_path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, entry_path))
+            total_size += st.st_size
+        if total_size <= self._max_size:
+            return
+        entries.sort(key=lambda x: x[0])
+        for _, size, entry_path in entries:
+            if total_size <= self._max_size:
+                break
+            try:
+                entry_path.unlink()
+            except OSError:
+                continue
+            total_size -= size
@@ -1,5 +1,6 @@
 import sys
 import copy
+import collections
 from typing import Any
 if sys.version_info.major == 3 and sys.version_info.minor < 9:
     from typing import Callable, Mapping, Iterable
@@ -7,11 +8,20 @@ else:
     from collections.abc import Callable, Mapping, Iterable
 
 from .build_contexts import BuildContext, BUILD_CONTEXT_CONFIG_KEYS
+from .copy_on_write import CopyOnWriteDict
+from .page_definition import PageDefinition
+from .page_source import PageSource
+from .processors import (
+    ProcessorRegistry,
+    PAGE_GROUP_PROCESSOR_STAGES,
+    PAGE_PROCESSOR_STAGES,
+)
 
 PAGE_GROUP_CONFIG_DEFAULT_VALUES = {
     "export_root_path"                       : "./ophinode_exported_files",
     "default_layout"                         : None,
     "preserve_site_definition_across_builds" : False,
+    "page_source_chunksize"                  : 1000,
     "page_default_file_name"                 : "index.html",
     "page_default_file_name_suffix"          : ".html",
     "auto_write_exported_page_build_files"   : False,
@@ -28,6 +38,19 @@ PAGE_GROUP_CONFIG_DEFAULT_VALUES = {
     "disable_auto_indent_when_rendering"     : False,
     "auto_indent_string_for_top_level"       : "  ",
     "append_newline_to_render_result"        : False,
+    "page_cache_path"                        : None,
+    "page_cache_max_size"                    : 256 * 1024 * 1024,
+    "export_compression_formats"             : (),
+    "export_compression_min_size"            : 1024,
+    "export_compression_file_suffixes"       : (
+        ".html", ".css", ".js", ".mjs", ".json", ".xml", ".svg", ".txt",
+    ),
+    "export_compression_workers"             : None,
+    "export_manifest_file_name"              : None,
+    "export_pages_as_bytes"                  : False,
+    "export_static_files_as_hardlinks"       : False,
+    "flat_expanded_pages"                    : False,
+    "coalesce_text_nodes"                    : False,
 }
 PAGE_GROUP_CONFIG_KEYS = set(PAGE_GROUP_CONFIG_DEFAULT_VALUES)
 
@@ -37,9 +60,11 @@ class PageGroup:
         self._config = {}
         self._pages_dict = {}
         self._pages = []
+        self._page_sources = []
         self._dependency_group_of_pages = {}    # page path -> dependency group name
         self._dependencies = {}
         self._page_group_data = {}
+        self._shares_page_definitions = False
 
         self._dependencies_in_page_build_preparation_stage = {}
         self._dependencies_in_page_build_stage = {}
@@ -49,20 +74,26 @@ class PageGroup:
         self._dependencies_in_page_exportation_stage = {}
         self._dependencies_in_page_build_finalization_stage = {}
 
-        self._preprocessors_before_page_build_preparation_stage = []
-        self._postprocessors_after_page_build_preparation_stage = []
-        self._preprocessors_before_page_build_stage = []
-        self._postprocessors_after_page_build_stage = []
-        self._preprocessors_before_page_expansion_preparation_stage = []
-        self._postprocessors_after_page_expansion_preparation_stage = []
-        self._preprocessors_before_page_expansion_stage = []
-        self._postprocessors_after_page_expansion_stage = []
-        self._preprocessors_before_page_rendering_stage = []
-        self._postprocessors_after_page_rendering_stage = []
-        self._preprocessors_before_page_exportation_stage = []
-        self._postprocessors_after_page_exportation_stage = []
-        self._preprocessors_before_page_build_finalization_stage = []
-        self._postprocessors_after_page_build_finalization_stage = []
+        self._processors = ProcessorRegistry()
+
+    def __deepcopy__(self, memo):
+        new = self.__class__.__new__(self.__class__)
+        memo[id(self)] = new
+        for k, v in self.__dict__.items():
+            if k == "_page_group_data":
+                # page group data is copied lazily, because it can be large
+                # and is often not modified at all during a build
+                new.__dict__[k] = CopyOnWriteDict(v)
+            elif k in ("_pages", "_pages_dict", "_dependency_group_of_pages"):
+                # page definitions are shared with the original, and only
+                # those selected for a build are copied by
+                # create_build_context, so that building a few pages does
+                # not copy every page of the site
+                new.__dict__[k] = v.copy()
+            else:
+                new.__dict__[k] = copy.deepcopy(v, memo)
+        new._shares_page_definitions = True
+        return new
 
     @property
     def name(self):
@@ -78,7 +109,12 @@ class PageGroup:
         site_data,
         page_data,
         misc_data,
+        pages = None,
+        asset_urls = None,
     ):
+        if pages is None:
+            pages = self._pages
+
         cfg = {}
         for k in BUILD_CONTEXT_CONFIG_KEYS:
             if k in self._config:
@@ -88,98 +124,25 @@ class PageGroup:
             else:
                 cfg[k] = self.get_config_value(k)
 
+        if (
+            self.get_config_value("preserve_site_definition_across_builds")
+            or self._shares_page_definitions
+        ):
+            pages = copy.deepcopy(pages)
+        else:
+            pages = pages.copy()
+
         if self.get_config_value("preserve_site_definition_across_builds"):
             cfg_to_pass = copy.deepcopy(cfg)
-            pages = copy.deepcopy(self._pages)
             dependencies = copy.deepcopy(self._dependencies)
-            pre_page_build_preps = copy.deepcopy(
-                self._preprocessors_before_page_build_preparation_stage
-            )
-            post_page_build_preps = copy.deepcopy(
-                self._postprocessors_after_page_build_preparation_stage
-            )
-            pre_page_builds = copy.deepcopy(
-                self._preprocessors_before_page_build_stage
-            )
-            post_page_builds = copy.deepcopy(
-                self._postprocessors_after_page_build_stage
-            )
-            pre_page_expand_preps = copy.deepcopy(
-                self._preprocessors_before_page_expansion_preparation_stage
-            )
-            post_page_expand_preps = copy.deepcopy(
-                self._postprocessors_after_page_expansion_preparation_stage
-            )
-            pre_page_expands = copy.deepcopy(
-                self._preprocessors_before_page_expansion_stage
-            )
-            post_page_expands = copy.deepcopy(
-                self._postprocessors_after_page_expansion_stage
-            )
-            pre_page_renders = copy.deepcopy(
-                self._preprocessors_before_page_rendering_stage
-            )
-            post_page_renders = copy.deepcopy(
-                self._postprocessors_after_page_rendering_stage
-            )
-            pre_page_exports = copy.deepcopy(
-                self._preprocessors_before_page_exportation_stage
-            )
-            post_page_exports = copy.deepcopy(
-                self._postprocessors_after_page_exportation_stage
-            )
-            pre_page_build_finalizations = copy.deepcopy(
-                self._preprocessors_before_page_build_finalization_stage
-            )
-            post_page_build_finalizations = copy.deepcopy(
-                self._postprocessors_after_page_build_finalization_stage
-            )
+            page_group_data = CopyOnWriteDict(self._page_group_data)
+            processors = copy.deepcopy(self._processors)
         else:
             cfg_to_pass = cfg
-            pages = self._pages.copy()
             dependencies = self._dependencies.copy()
-            pre_page_build_preps = (
-                self._preprocessors_before_page_build_preparation_stage
-            ).copy()
-            post_page_build_preps = (
-                self._postprocessors_after_page_build_preparation_stage
-            ).copy()
-            pre_page_builds = (
-                self._preprocessors_before_page_build_stage
-            ).copy()
-            post_page_builds = (
-                self._postprocessors_after_page_build_stage
-            ).copy()
-            pre_page_expand_preps = (
-                self._preprocessors_before_page_expansion_preparation_stage
-            ).copy()
-            post_page_expand_preps = (
-                self._postprocessors_after_page_expansion_preparation_stage
-            ).copy()
-            pre_page_expands = (
-                self._preprocessors_before_page_expansion_stage
-            ).copy()
-            post_page_expands = (
-                self._postprocessors_after_page_expansion_stage
-            ).copy()
-            pre_page_renders = (
-                self._preprocessors_before_page_rendering_stage
-            ).copy()
-            post_page_renders = (
-                self._postprocessors_after_page_rendering_stage
-            ).copy()
-            pre_page_exports = (
-                self._preprocessors_before_page_exportation_stage
-            ).copy()
-            post_page_exports = (
-                self._postprocessors_after_page_exportation_stage
-            ).copy()
-            pre_page_build_finalizations = (
-                self._preprocessors_before_page_build_finalization_stage
-            ).copy()
-            post_page_build_finalizations = (
-                self._postprocessors_after_page_build_finalization_stage
-            ).copy()
+            page_group_data = self._page_group_data.copy()
+            # registries are immutable, so they can be shared
+            processors = self._processors
 
         return BuildContext(
             self._name,
@@ -188,26 +151,47 @@ class PageGroup:
             site_data,
             page_data,
             misc_data,
-            self._page_group_data.copy(),
+            page_group_data,
             cfg_to_pass,
-            {
-                "pre_prepare_page_build": pre_page_build_preps,
-                "post_prepare_page_build": post_page_build_preps,
-                "pre_build_pages": pre_page_builds,
-                "post_build_pages": post_page_builds,
-                "pre_prepare_page_expansion": pre_page_expand_preps,
-                "post_prepare_page_expansion": post_page_expand_preps,
-                "pre_expand_pages": pre_page_expands,
-                "post_expand_pages": post_page_expands,
-                "pre_render_pages": pre_page_renders,
-                "post_render_pages": post_page_renders,
-                "pre_export_pages": pre_page_exports,
-                "post_export_pages": post_page_exports,
-                "pre_finalize_page_build": pre_page_build_finalizations,
-                "post_finalize_page_build": post_page_build_finalizations,
-            },
+            processors,
+            asset_urls,
         )
 
+    def create_page_source_build_contexts(
+        self,
+        build_config,
+        site_data,
+        page_data,
+        misc_data,
+        chunksize = None,
+        page_paths = None,
+        asset_urls = None,
+    ):
+        if "page_source_chunksize" in self._config or chunksize is None:
+            chunksize = self.get_config_value("page_source_chunksize")
+
+        for page_source in self._page_sources:
+            for chunk in page_source.iter_chunks(chunksize):
+                pages = []
+                chunk_page_data = {}
+                for path, page, pd, dependency_group in chunk:
+                    if page_paths is not None and path not in page_paths:
+                        continue
+                    pages.append(
+                        PageDefinition(path, page, self._name, dependency_group)
+                    )
+                    chunk_page_data[path] = dict(pd) if pd is not None else {}
+                if not pages:
+                    continue
+                yield self.create_build_context(
+                    build_config,
+                    site_data,
+                    collections.ChainMap(chunk_page_data, page_data),
+                    misc_data,
+                    pages,
+                    asset_urls,
+                )
+
     def get_config_value(self, key: str):
         if not isinstance(key, str):
             raise TypeError(
@@ -253,6 +237,61 @@ class PageGroup:
         self._pages_dict[page_definition.path] = page_definition
         self._pages.append(page_definition)
 
+    def add_pages(self, page_definitions):
+        paths = [x.path for x in page_definitions]
+        self._dependency_group_of_pages.update(zip(
+            paths,
+            [
+                x.dependency_group if x.dependency_group is not None
+                else x.path
+                for x in page_definitions
+            ],
+        ))
+        self._pages_dict.update(zip(paths, page_definitions))
+        self._pages.extend(page_definitions)
+
+    def add_page_source(self, page_source: PageSource):
+        if not isinstance(page_source, PageSource):
+            raise TypeError(
+                "page_source must be an instance of PageSource, not {}".format(
+                    page_source.__class__.__name__
+                )
+            )
+        self._page_sources.append(page_source)
+
+    def _can_look_up_pages(self, page_paths) -> bool:
+        # looking up a few pages by path is faster than scanning every page
+        # of the group, but is only equivalent if paths are unique
+        return (
+            isinstance(page_paths, (set, frozenset))
+            and len(page_paths) < len(self._pages)
+            and len(self._pages_dict) == len(self._pages)
+        )
+
+    def get_pages(self, page_paths = None):
+        if page_paths is None:
+            return self._pages.copy()
+        if self._can_look_up_pages(page_paths):
+            pages_dict = self._pages_dict
+            return [pages_dict[x] for x in page_paths if x in pages_dict]
+        return [x for x in self._pages if x.path in page_paths]
+
+    def has_pages(self, page_paths = None):
+        if page_paths is None:
+            return bool(self._pages)
+        if self._can_look_up_pages(page_paths):
+            return not self._pages_dict.keys().isdisjoint(page_paths)
+        for page_definition in self._pages:
+            if page_definition.path in page_paths:
+                return True
+        return False
+
+    def get_page_sources(self):
+        return self._page_sources.copy()
+
+    def has_page_sources(self):
+        return bool(self._page_sources)
+
     def add_processor(
         self,
         stage: str,
@@ -263,33 +302,9 @@ class PageGroup:
         if not callable(processor):
             raise TypeError("processor must be a callable")
 
-        if stage == "pre_prepare_page_build":
-            self._preprocessors_before_page_build_preparation_stage.append(processor)
-        elif stage == "post_prepare_page_build":
-            self._postprocessors_after_page_build_preparation_stage.append(processor)
-        elif stage == "pre_build_pages":
-            self._preprocessors_before_page_build_stage.append(processor)
-        elif stage == "post_build_pages":
-            self._postprocessors_after_page_build_stage.append(processor)
-        elif stage == "pre_prepare_page_expansion":
-            self._preprocessors_before_page_expansion_preparation_stage.append(processor)
-        elif stage == "post_prepare_page_expansion":
-            self._postprocessors_after_page_expansion_preparation_stage.append(processor)
-        elif stage == "pre_expand_pages":
-            self._preprocessors_before_page_expansion_stage.append(processor)
-        elif stage == "post_expand_pages":
-            self._postprocessors_after_page_expansion_stage.append(processor)
-        elif stage == "pre_render_pages":
-            self._preprocessors_before_page_rendering_stage.append(processor)
-        elif stage == "post_render_pages":
-            self._postprocessors_after_page_rendering_stage.append(processor)
-        elif stage == "pre_export_pages":
-            self._preprocessors_before_page_exportation_stage.append(processor)
-        elif stage == "post_export_pages":
-            self._postprocessors_after_page_exportation_stage.append(processor)
-        elif stage == "pre_finalize_page_build":
-            self._preprocessors_before_page_build_finalization_stage.append(processor)
-        elif stage == "post_finalize_page_build":
-            self._postprocessors_after_page_build_finalization_stage.append(processor)
-        else:
+        if (
+            stage not in PAGE_GROUP_PROCESSOR_STAGES
+            and stage not in PAGE_PROCESSOR_STAGES
+        ):
             raise ValueError("invalid processor stage: '{}'".format(stage))
+        self._processors = self._processors.add(stage, processor)
@@ -0,0 +1,138 @@
+import sys
+if sys.version_info.major == 3 and sys.version_info.minor < 9:
+    from typing import Iterable, Callable, Mapping, Sequence
+else:
+    from collections.abc import Iterable, Callable, Mapping, Sequence
+from typing import Any, Union
+
+from .page import Page
+
+class PageSource:
+    """A source of pages which are defined lazily during a build.
+
+    The source is either an iterable of page specifications, or a callable
+    returning such an iterable. A callable is called again on every build,
+    while a plain iterator can be consumed only once.
+
+    A page specification is a mapping with 'path', 'page', and optionally
+    'page_data' and 'dependency_group', or a sequence of 2 to 4 items in
+    the same order.
+    """
+
+    def __init__(
+        self,
+        source: Union[Iterable, Callable[[], Iterable]],
+    ):
+        if not callable(source) and not isinstance(source, Iterable):
+            raise TypeError("source must be an iterable or a callable")
+        self._source = source
+
+    def __deepcopy__(self, memo):
+        # page sources only describe how to create pages, so they are
+        # shared instead of copied
+        return self
+
+    def iter_page_specs(self):
+        source = self._source
+        if callable(source):
+            source = source()
+        return iter(source)
+
+    def iter_chunks(self, chunksize: int):
+        if not isinstance(chunksize, int) or chunksize < 1:
+            raise ValueError("chunksize must be a positive int")
+        chunk = []
+        for page_spec in self.iter_page_specs():
+            chunk.append(parse_page_source_spec(page_spec))
+            if len(chunk) >= chunksize:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+class PagedPageSource(PageSource):
+    """A page source backed by a callable that returns pages in batches.
+
+    fetch is called with (offset, limit) and returns a sequence of page
+    specifications; iteration stops when it returns fewer than limit items.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[int, int], Sequence],
+        batch_size: int = 1000,
+    ):
+        if not callable(fetch):
+            raise TypeError("fetch must be a callable")
+        if not isinstance(batch_size, int) or batch_size < 1:
+            raise ValueError("batch_size must be a positive int")
+        self._fetch = fetch
+        self._batch_size = batch_size
+
+    def iter_page_specs(self):
+        offset = 0
+        while True:
+            batch = self._fetch(offset, self._batch_size)
+            count = 0
+            for page_spec in batch:
+                count += 1
+                yield page_spec
+            if count < self._batch_size:
+                break
+            offset += count
+
+def parse_page_source_spec(page_spec: Any):
+    if isinstance(page_spec, (str, bytes, bytearray, memoryview)):
+        raise TypeError(
+            "object of type {} cannot be given as a page "
+            "specification".format(page_spec.__class__.__name__)
+        )
+    elif isinstance(page_spec, Mapping):
+        if "path" not in page_spec:
+            raise ValueError("page specification does not contain 'path'")
+        if "page" not in page_spec:
+            raise ValueError("page specification does not contain 'page'")
+        path = page_spec["path"]
+        page = page_spec["page"]
+        page_data = page_spec.get("page_data")
+        dependency_group = page_spec.get("dependency_group")
+    elif isinstance(page_spec, Sequence):
+        if len(page_spec) == 2:
+            path, page = page_spec
+            page_data, dependency_group = None, None
+        elif len(page_spec) == 3:
+            path, page, page_data = page_spec
+            dependency_group = None
+        elif len(page_spec) == 4:
+            path, page, page_data, dependency_group = page_spec
+        else:
+            raise ValueError(
+                "page specification contains wrong number of "
+                "arguments (expected 2~4, but {} given)".format(
+                    len(page_spec)
+                )
+            )
+    else:
+        raise TypeError(
+            "object of type {} cannot be given as a page "
+            "specification".format(page_spec.__class__.__name__)
+        )
+
+    if not isinstance(path, str):
+        raise TypeError(
+            "path to a page must be a str, not {}".format(
+                path.__class__.__name__
+            )
+        )
+    if not isinstance(page, Page):
+        raise TypeError(
+            "page must be an instance of Page, not {}".format(
+                page.__class__.__name__
+            )
+        )
+    if page_data is not None and not isinstance(page_data, Mapping):
+        raise TypeError("page_data must be a mapping or None")
+    if dependency_group is None:
+        dependency_group = path
+
+    return path, page, page_data, dependency_group
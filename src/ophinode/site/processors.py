@@ -0,0 +1,134 @@
+import sys
+import copy
+import types
+if sys.version_info.major == 3 and sys.version_info.minor < 9:
+    from typing import Callable, Mapping, Iterable
+else:
+    from collections.abc import Callable, Mapping, Iterable
+from typing import Union
+
+from .build_phase import BuildPhase
+
+SITE_PROCESSOR_STAGES = {
+    "pre_prepare_site_build"      : BuildPhase.PRE_PREPARE_SITE_BUILD,
+    "post_prepare_site_build"     : BuildPhase.POST_PREPARE_SITE_BUILD,
+    "pre_finalize_site_build"     : BuildPhase.PRE_FINALIZE_SITE_BUILD,
+    "post_finalize_site_build"    : BuildPhase.POST_FINALIZE_SITE_BUILD,
+}
+
+PAGE_GROUP_PROCESSOR_STAGES = {
+    "pre_prepare_page_build"      : BuildPhase.PRE_PREPARE_PAGE_BUILD,
+    "post_prepare_page_build"     : BuildPhase.POST_PREPARE_PAGE_BUILD,
+    "pre_build_pages"             : BuildPhase.PRE_BUILD_PAGES,
+    "post_build_pages"            : BuildPhase.POST_BUILD_PAGES,
+    "pre_prepare_page_expansion"  : BuildPhase.PRE_PREPARE_PAGE_EXPANSION,
+    "post_prepare_page_expansion" : BuildPhase.POST_PREPARE_PAGE_EXPANSION,
+    "pre_expand_pages"            : BuildPhase.PRE_EXPAND_PAGES,
+    "post_expand_pages"           : BuildPhase.POST_EXPAND_PAGES,
+    "pre_render_pages"            : BuildPhase.PRE_RENDER_PAGES,
+    "post_render_pages"           : BuildPhase.POST_RENDER_PAGES,
+    "pre_export_pages"            : BuildPhase.PRE_EXPORT_PAGES,
+    "post_export_pages"           : BuildPhase.POST_EXPORT_PAGES,
+    "pre_finalize_page_build"     : BuildPhase.PRE_FINALIZE_PAGE_BUILD,
+    "post_finalize_page_build"    : BuildPhase.POST_FINALIZE_PAGE_BUILD,
+}
+
+# Page processors run once for each page, right after the page is
+# processed in the build phase they are keyed by, with the page set as the
+# current page of the build context
+PAGE_PROCESSOR_STAGES = {
+    "on_page_prepared"            : BuildPhase.PREPARE_PAGE_BUILD,
+    "on_page_built"               : BuildPhase.BUILD_PAGES,
+    "on_page_expansion_prepared"  : BuildPhase.PREPARE_PAGE_EXPANSION,
+    "on_page_expanded"            : BuildPhase.EXPAND_PAGES,
+    "on_page_rendered"            : BuildPhase.RENDER_PAGES,
+    "on_page_exported"            : BuildPhase.EXPORT_PAGES,
+}
+
+PROCESSOR_STAGES = {}
+PROCESSOR_STAGES.update(SITE_PROCESSOR_STAGES)
+PROCESSOR_STAGES.update(PAGE_GROUP_PROCESSOR_STAGES)
+PROCESSOR_STAGES.update(PAGE_PROCESSOR_STAGES)
+
+# deepcopy() returns these objects themselves, so registries that only
+# contain them can be shared instead of copied
+_STATELESS_CALLABLE_TYPES = (
+    types.FunctionType,
+    types.BuiltinFunctionType,
+    type,
+)
+
+_EMPTY = ()
+
+class ProcessorRegistry:
+    """An immutable table of processors, keyed by build phase.
+
+    Processors of each build phase are kept in a tuple indexed by the value
+    of the phase, so looking them up is a single index operation. Adding a
+    processor returns a new registry, which lets build contexts share a
+    registry instead of copying processor lists for every context.
+    """
+
+    def __init__(
+        self,
+        processors: Union[
+            Mapping[str, Iterable[Callable]],
+            "ProcessorRegistry",
+            None,
+        ] = None,
+    ):
+        if isinstance(processors, ProcessorRegistry):
+            self._table = processors._table
+            return
+
+        table = [_EMPTY] * len(BuildPhase)
+        if processors is not None:
+            for stage, stage_processors in processors.items():
+                phase = _get_phase(stage)
+                procs = []
+                for proc in stage_processors:
+                    if not callable(proc):
+                        raise ValueError(
+                            "pre- and post-processors must be callable"
+                        )
+                    procs.append(proc)
+                table[phase.value] = table[phase.value] + tuple(procs)
+        self._table = tuple(table)
+
+    def __deepcopy__(self, memo):
+        if all(
+            isinstance(proc, _STATELESS_CALLABLE_TYPES)
+            for procs in self._table
+            for proc in procs
+        ):
+            return self
+        new = self.__class__.__new__(self.__class__)
+        memo[id(self)] = new
+        new._table = copy.deepcopy(self._table, memo)
+        return new
+
+    def __bool__(self):
+        return any(self._table)
+
+    def add(self, stage: str, processor: Callable) -> "ProcessorRegistry":
+        if not callable(processor):
+            raise TypeError("processor must be a callable")
+        phase = _get_phase(stage)
+        table = list(self._table)
+        table[phase.value] = table[phase.value] + (processor,)
+        new = self.__class__.__new__(self.__class__)
+        new._table = tuple(table)
+        return new
+
+    def get(self, phase: BuildPhase) -> tuple:
+        return self._table[phase.value]
+
+    def get_stage(self, stage: str) -> tuple:
+        return self._table[_get_phase(stage).value]
+
+def _get_phase(stage: str) -> BuildPhase:
+    if not isinstance(stage, str):
+        raise ValueError("processor stage must be a str")
+    if stage not in PROCESSOR_STAGES:
+        raise ValueError("invalid processor stage: '{}'".format(stage))
+    return PROCESSOR_STAGES[stage]
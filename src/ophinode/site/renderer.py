@@ -0,0 +1,183 @@
+import sys
+if sys.version_info.major == 3 and sys.version_info.minor < 9:
+    from typing import Mapping, Iterator
+else:
+    from collections.abc import Mapping, Iterator
+from typing import Union
+
+from .page import Page
+from .layout import Layout
+from .page_definition import PageDefinition
+from .build_phase import BuildPhase
+from .build_contexts import BuildContext
+from ophinode.rendering.render_node import render_events
+from ophinode.nodes.html.core import HTML5Doctype
+from ophinode.nodes.html.elements.fullname import HtmlElement
+
+class _NodesPage(Page):
+    def __init__(self, nodes):
+        self.nodes = nodes
+
+class _NodesLayout(Layout):
+    def build(self, page: _NodesPage, context: BuildContext):
+        return page.nodes
+
+class Renderer:
+    """Renders pages and nodes without setting up a site.
+
+    A renderer resolves its configuration once and reuses a BuildContext
+    for every render, running only the build phases needed to produce
+    the rendered result. Pages are prepared, built, expanded
+    and rendered, and nodes are only expanded and rendered. Processors
+    and page caches are not supported, and nothing is exported.
+
+    If lazy_expansion is True, nodes are expanded while they are rendered
+    instead of before rendering, so the expanded page is never stored
+    and iterators and generators given as children are consumed as the
+    output is produced. Errors in nodes are then raised while iterating
+    over the rendered chunks.
+
+    The iterators returned by the iter_render_* methods can be consumed
+    in any order, even interleaved: a render that starts while another
+    one has not finished gets a context of its own. A renderer must not
+    be used by multiple threads at the same time, though.
+    """
+
+    def __init__(
+        self,
+        default_layout: Union[Layout, None] = None,
+        escape_ampersands: bool = False,
+        escape_tag_delimiters: bool = True,
+        auto_newline: bool = True,
+        auto_indent: bool = True,
+        auto_indent_string: str = "  ",
+        lazy_expansion: bool = False,
+    ):
+        config = {
+            "export_root_path": "/",
+            "html_default_escape_ampersands": escape_ampersands,
+            "html_default_escape_tag_delimiters": escape_tag_delimiters,
+            "disable_auto_newline_when_rendering": not auto_newline,
+            "disable_auto_indent_when_rendering": not auto_indent,
+            "auto_indent_string_for_top_level": auto_indent_string,
+        }
+        if default_layout is not None:
+            config["default_layout"] = default_layout
+        self._config = config
+        # a context that no unfinished render is using, or None
+        self._idle_context = self._create_context()
+        self._lazy_expansion = lazy_expansion
+
+    def _create_context(self) -> BuildContext:
+        return BuildContext(
+            "default", [], {}, {}, {}, {}, {}, self._config, None
+        )
+
+    def _acquire_context(self) -> BuildContext:
+        context = self._idle_context
+        if context is None:
+            return self._create_context()
+        self._idle_context = None
+        return context
+
+    def render_page(self, page: Page, path: str = "/") -> str:
+        return "".join(self.iter_render_page(page, path))
+
+    def render_nodes(self, *nodes) -> str:
+        return "".join(self.iter_render_nodes(*nodes))
+
+    def iter_render_page(
+        self,
+        page: Page,
+        path: str = "/",
+        chunk_size: Union[int, None] = None,
+        layout: Union[Layout, None] = None,
+    ) -> Iterator[str]:
+        """Render a page, yielding the result in chunks.
+
+        Pages are built with layout if it is given, which skips resolving
+        the layout of the page for every render. See
+        RenderNode.iter_render() for chunk_size.
+        """
+
+        context = self._acquire_context()
+        try:
+            context._reset_pages(
+                [PageDefinition(path, page, "default", path)]
+            )
+            context._prepare_page_build()
+            if layout is None:
+                context._build_pages()
+            else:
+                context._set_build_phase(BuildPhase.BUILD_PAGES)
+                context._set_current_page(path, page)
+                context.set_built_page(path, layout.build(page, context))
+                context._unset_current_page()
+            context._prepare_page_expansion()
+            if not self._lazy_expansion:
+                context._expand_pages()
+        except BaseException:
+            # contexts are reset for every render, so a context can be
+            # reused even if building or expanding a page failed
+            self._idle_context = context
+            raise
+        return self._iter_render(context, path, page, chunk_size)
+
+    def iter_render_nodes(
+        self,
+        *nodes,
+        chunk_size: Union[int, None] = None,
+    ) -> Iterator[str]:
+        """Render nodes, yielding the result in chunks.
+
+        See RenderNode.iter_render() for chunk_size.
+        """
+
+        context = self._acquire_context()
+        try:
+            nodes = list(nodes)
+            page = _NodesPage(nodes)
+            context._reset_pages(
+                [PageDefinition("/", page, "default", "/")]
+            )
+            context.set_built_page("/", nodes)
+            if not self._lazy_expansion:
+                context._expand_pages()
+        except BaseException:
+            self._idle_context = context
+            raise
+        return self._iter_render(context, "/", page, chunk_size)
+
+    def _iter_render(
+        self,
+        context: BuildContext,
+        path: str,
+        page: Page,
+        chunk_size: Union[int, None],
+    ) -> Iterator[str]:
+        context._set_build_phase(BuildPhase.RENDER_PAGES)
+        context._set_current_page(path, page)
+        try:
+            if self._lazy_expansion:
+                yield from render_events(
+                    context._iter_expansion_events(
+                        context.get_built_page(path)
+                    ),
+                    context,
+                    chunk_size,
+                )
+            else:
+                yield from context.get_expanded_page(path).iter_render(
+                    context, chunk_size
+                )
+        finally:
+            context._unset_current_page()
+            self._idle_context = context
+
+    def render_html(
+        self,
+        *nodes,
+        root_attributes: Union[Mapping, None] = None,
+    ) -> str:
+        root = HtmlElement(list(nodes), attributes=root_attributes)
+        return self.render_nodes(HTML5Doctype(), root)
@@ -0,0 +1,320 @@
+import sys
+if sys.version_info.major == 3 and sys.version_info.minor < 9:
+    from typing import Callable, Iterable, Iterator, Mapping
+else:
+    from collections.abc import Callable, Iterable, Iterator, Mapping
+import asyncio
+import collections
+from typing import Any, Union
+
+from .page import Page
+from .layout import Layout
+from .renderer import Renderer
+
+class RenderingApp:
+    """A WSGI and ASGI application that renders pages on request.
+
+    Each page is registered with a path, either as a Page or as a callable
+    that takes the WSGI environ or the ASGI scope of a request and returns
+    a Page. Layouts of registered Page objects are resolved once, when
+    they are added.
+
+    Pages are rendered with Renderer objects taken from a pool, so
+    concurrent requests never share a build context and renderers are
+    reused across requests. If chunk_size is set, the response body is
+    streamed in chunks of about chunk_size characters as they are
+    rendered; otherwise, it is sent in one piece. See Renderer for
+    lazy_expansion.
+
+    Use the application object itself as a WSGI application, and
+    asgi_app as an ASGI application.
+    """
+
+    def __init__(
+        self,
+        pages: Union[
+            Mapping[str, Union[Page, Callable[[Any], Page]]],
+            Iterable[tuple],
+            None,
+        ] = None,
+        default_layout: Union[Layout, None] = None,
+        escape_ampersands: bool = False,
+        escape_tag_delimiters: bool = True,
+        auto_newline: bool = True,
+        auto_indent: bool = True,
+        auto_indent_string: str = "  ",
+        chunk_size: Union[int, None] = 16384,
+        max_pooled_renderers: int = 32,
+        lazy_expansion: bool = False,
+    ):
+        if chunk_size is not None and chunk_size <= 0:
+            raise ValueError("chunk_size must be a positive int or None")
+        self._renderer_args = (
+            default_layout,
+            escape_ampersands,
+            escape_tag_delimiters,
+            auto_newline,
+            auto_indent,
+            auto_indent_string,
+            lazy_expansion,
+        )
+        self._default_layout = default_layout
+        self._chunk_size = chunk_size
+        self._max_pooled_renderers = max_pooled_renderers
+
+        # appending to and popping from a deque are atomic, so the pool
+        # needs no lock
+        self._renderers = collections.deque()
+
+        self._pages = {}
+        self._layouts = {}
+        if pages is not None:
+            if isinstance(pages, Mapping):
+                pages = pages.items()
+            for path, page in pages:
+                self.add_page(path, page)
+
+    def add_page(
+        self,
+        path: str,
+        page: Union[Page, Callable[[Any], Page]],
+    ):
+        if not isinstance(path, str):
+            raise TypeError(
+                "path to a page must be a str, not {}".format(
+                    path.__class__.__name__
+                )
+            )
+        if not isinstance(page, Page) and not callable(page):
+            raise TypeError(
+                "page must be an instance of Page or a callable, not "
+                "{}".format(page.__class__.__name__)
+            )
+        if path in self._pages:
+            raise ValueError("duplicate page path: " + path)
+        self._pages[path] = page
+        if isinstance(page, Page):
+            layout = self._get_static_layout(page)
+            if layout is not None:
+                self._layouts[path] = layout
+
+    def _get_static_layout(self, page: Page) -> Union[Layout, None]:
+        # layouts given as callables are called with the build context,
+        # so they are resolved for every render instead
+        layout = page.layout or self._default_layout
+        if isinstance(layout, Layout):
+            return layout
+        return None
+
+    def has_page(self, path: str) -> bool:
+        return self._find_page_path(path) is not None
+
+    def _find_page_path(self, request_path: str) -> Union[str, None]:
+        if request_path in self._pages:
+            return request_path
+        if request_path.endswith("/"):
+            alternative_path = request_path.rstrip("/") or "/"
+        else:
+            alternative_path = request_path + "/"
+        if alternative_path in self._pages:
+            return alternative_path
+        return None
+
+    def _acquire_renderer(self) -> Renderer:
+        try:
+            return self._renderers.pop()
+        except IndexError:
+            return Renderer(*self._renderer_args)
+
+    def _release_renderer(self, renderer: Renderer):
+        if len(self._renderers) < self._max_pooled_renderers:
+            self._renderers.append(renderer)
+
+    def iter_render(self, path: str, request: Any = None) -> Iterator[str]:
+        """Render the page at path, yielding the result in chunks.
+
+        request is passed to the page if it was added as a callable.
+        Pages are built and expanded before this method returns, so
+        errors in them are raised here rather than while iterating,
+        unless pages are expanded lazily.
+        """
+
+        page_path = self._find_page_path(path)
+        if page_path is None:
+            raise KeyError(path)
+        page = self._pages[page_path]
+        layout = self._layouts.get(page_path)
+        if not isinstance(page, Page):
+            page = page(request)
+            if not isinstance(page, Page):
+                raise TypeError(
+                    "page callable must return an instance of Page, not "
+                    "{}".format(page.__class__.__name__)
+                )
+
+        renderer = self._acquire_renderer()
+        try:
+            chunks = renderer.iter_render_page(
+                page, page_path, self._chunk_size, layout
+            )
+        except BaseException:
+            # renderers reset their build context for every render, so
+            # they can be reused even after a failed render
+            self._release_renderer(renderer)
+            raise
+        return _PooledChunks(self, renderer, chunks)
+
+    def render(self, path: str, request: Any = None) -> str:
+        return "".join(self.iter_render(path, request))
+
+    def __call__(self, environ: dict, start_response: Callable):
+        method = environ.get("REQUEST_METHOD", "GET")
+        if method not in ("GET", "HEAD"):
+            start_response(
+                "405 Method Not Allowed",
+                [
+                    ("Content-Type", "text/plain; charset=utf-8"),
+                    ("Allow", "GET, HEAD"),
+                ],
+            )
+            return [b"405 Method Not Allowed"]
+        path = _decode_wsgi_path(environ.get("PATH_INFO") or "/")
+        if not self.has_page(path):
+            start_response(
+                "404 Not Found",
+                [("Content-Type", "text/plain; charset=utf-8")],
+            )
+            return [b"404 Not Found"]
+
+        chunks = self.iter_render(path, environ)
+        start_response(
+            "200 OK",
+            [("Content-Type", "text/html; charset=utf-8")],
+        )
+        if method == "HEAD":
+            chunks.close()
+            return []
+        return _EncodedChunks(chunks)
+
+    async def asgi_app(self, scope: dict, receive: Callable, send: Callable):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            raise ValueError(
+                "unsupported ASGI scope type: '{}'".format(scope["type"])
+            )
+
+        method = scope.get("method", "GET")
+        if method not in ("GET", "HEAD"):
+            await _send_asgi_response(
+                send,
+                405,
+                b"405 Method Not Allowed",
+                [(b"allow", b"GET, HEAD")],
+            )
+            return
+        path = scope.get("path") or "/"
+        if not self.has_page(path):
+            await _send_asgi_response(send, 404, b"404 Not Found")
+            return
+
+        # rendering is CPU-bound, so it runs in the default executor to
+        # keep the event loop responsive. get_running_loop() would need
+        # Python 3.7, and get_event_loop() returns the running loop here.
+        loop = asyncio.get_event_loop()
+        chunks = await loop.run_in_executor(
+            None, self.iter_render, path, scope
+        )
+        try:
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/html; charset=utf-8"),
+                ],
+            })
+            if method == "HEAD":
+                await send({"type": "http.response.body", "body": b""})
+                return
+            while True:
+                chunk = await loop.run_in_executor(None, next, chunks, None)
+                if chunk is None:
+                    break
+                await send({
+                    "type": "http.response.body",
+                    "body": chunk.encode("utf-8"),
+                    "more_body": True,
+                })
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            chunks.close()
+
+class _PooledChunks:
+    # the renderer is returned to the pool when the chunks are exhausted
+    # or closed, which also happens if a client disconnects, since WSGI
+    # servers always call close() on response bodies
+    def __init__(
+        self,
+        app: RenderingApp,
+        renderer: Renderer,
+        chunks: Iterator[str],
+    ):
+        self._app = app
+        self._renderer = renderer
+        self._chunks = chunks
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        try:
+            return next(self._chunks)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        if self._renderer is not None:
+            self._chunks.close()
+            self._app._release_renderer(self._renderer)
+            self._renderer = None
+
+class _EncodedChunks:
+    def __init__(self, chunks: _PooledChunks):
+        self._chunks = chunks
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            yield chunk.encode("utf-8")
+
+    def close(self):
+        self._chunks.close()
+
+def _decode_wsgi_path(path_info: str) -> str:
+    # PATH_INFO is decoded as latin-1 by WSGI servers
+    try:
+        return path_info.encode("latin-1").decode("utf-8")
+    except UnicodeError:
+        return path_info
+
+async def _send_asgi_response(
+    send: Callable,
+    status: int,
+    body: bytes,
+    extra_headers: Union[list, None] = None,
+):
+    headers = [(b"content-type", b"text/plain; charset=utf-8")]
+    if extra_headers:
+        headers.extend(extra_headers)
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": headers,
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,143 @@
+import os
+import shutil
+import hashlib
+import pathlib
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# ioctl request number of FICLONE on Linux, which makes the destination
+# file share the extents of the source file (a reflink) on file systems
+# like Btrfs and XFS
+_FICLONE = 0x40049409
+
+class StaticFile:
+    """An exported file whose content is copied from a source file.
+
+    StaticFile values are recorded by BuildContext.export_static() instead
+    of file contents, so that large files are never read into memory. The
+    source file is copied (or hardlinked) when exported files are written.
+    """
+
+    def __init__(self, source_path: str):
+        self._source_path = os.path.abspath(source_path)
+
+    def __repr__(self):
+        return "StaticFile({!r})".format(self._source_path)
+
+    @property
+    def source_path(self):
+        return self._source_path
+
+    def read_bytes(self) -> bytes:
+        with open(self._source_path, "rb") as f:
+            return f.read()
+
+    def get_hash(self) -> str:
+        h = hashlib.sha256()
+        with open(self._source_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(chunk)
+        return h.hexdigest()
+
+def _copy_by_reflink(source_fd: int, target_fd: int, size: int):
+    if fcntl is None:
+        raise OSError("reflinks are not supported on this platform")
+    fcntl.ioctl(target_fd, _FICLONE, source_fd)
+
+def _copy_by_copy_file_range(source_fd: int, target_fd: int, size: int):
+    copied = 0
+    while copied < size:
+        n = os.copy_file_range(source_fd, target_fd, size - copied)
+        if n == 0:
+            break
+        copied += n
+
+def _copy_by_sendfile(source_fd: int, target_fd: int, size: int):
+    copied = 0
+    while copied < size:
+        n = os.sendfile(target_fd, source_fd, copied, size - copied)
+        if n == 0:
+            break
+        copied += n
+
+_COPY_METHODS = [_copy_by_reflink]
+if hasattr(os, "copy_file_range"):
+    _COPY_METHODS.append(_copy_by_copy_file_range)
+if hasattr(os, "sendfile"):
+    _COPY_METHODS.append(_copy_by_sendfile)
+
+def copy_file(source_path: str, target_path: str):
+    """Copy a file, without reading it into user space where possible.
+
+    Reflinks, copy_file_range() and sendfile() are tried in order, and
+    the content is copied through a buffer if none of them works.
+    """
+
+    with open(source_path, "rb") as fsrc, open(target_path, "wb") as fdst:
+        source_fd, target_fd = fsrc.fileno(), fdst.fileno()
+        size = os.fstat(source_fd).st_size
+        for method in _COPY_METHODS:
+            try:
+                method(source_fd, target_fd, size)
+            except OSError:
+                # start over with the next method
+                os.ftruncate(target_fd, 0)
+                os.lseek(target_fd, 0, os.SEEK_SET)
+                os.lseek(source_fd, 0, os.SEEK_SET)
+                continue
+            if os.fstat(target_fd).st_size == size:
+                return
+            os.ftruncate(target_fd, 0)
+            os.lseek(target_fd, 0, os.SEEK_SET)
+            os.lseek(source_fd, 0, os.SEEK_SET)
+        shutil.copyfileobj(fsrc, fdst, 1024 * 1024)
+
+def write_static_file(
+    static_file: StaticFile,
+    target_path: pathlib.Path,
+    use_hardlink: bool = False,
+) -> bool:
+    """Write a static file to target_path.
+
+    The file is skipped if target_path is already a hardlink to the
+    source, or has the same size and modification time as the source.
+    Copies get the modification time of the source, so that they are
+    skipped in the next build. Returns whether the file was written.
+    """
+
+    source_path = static_file.source_path
+    source_stat = os.stat(source_path)
+    try:
+        target_stat = os.stat(str(target_path))
+    except OSError:
+        target_stat = None
+    if target_stat is not None:
+        if os.path.samestat(source_stat, target_stat):
+            return False
+        if (
+            target_stat.st_size == source_stat.st_size
+            and target_stat.st_mtime_ns == source_stat.st_mtime_ns
+        ):
+            return False
+
+    target_path.parent.mkdir(parents=True, exist_ok=True)
+    # the target is removed rather than overwritten, because it may be a
+    # hardlink to a file that must not be modified
+    if target_stat is not None:
+        os.unlink(str(target_path))
+    if use_hardlink:
+        try:
+            os.link(source_path, str(target_path))
+            return True
+        except OSError:
+            # e.g. the source and the target are on different file systems
+            pass
+
+    copy_file(source_path, str(target_path))
+    os.utime(
+        str(target_path),
+        ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns),
+    )
+    return True
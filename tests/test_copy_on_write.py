@@ -0,0 +1,26 @@
+from ophinode.site.copy_on_write import CopyOnWriteDict
+
+def test_values_are_copied_when_read():
+    base = {"a": [1]}
+    data = CopyOnWriteDict(base)
+    data["a"].append(2)
+    assert data["a"] == [1, 2]
+    assert base["a"] == [1]
+
+def test_shared_values_stay_shared():
+    shared = []
+    data = CopyOnWriteDict({"a": shared, "b": shared})
+    data["a"].append(1)
+    assert data["b"] is data["a"]
+    assert shared == []
+
+def test_nested_mapping_is_unwrapped():
+    base = {"a": [1], "b": [2]}
+    inner = CopyOnWriteDict(base)
+    inner["a"].append(3)
+    outer = CopyOnWriteDict(inner)
+    assert outer._base["b"] is base["b"]
+    assert outer["a"] == [1, 3]
+    outer["a"].append(4)
+    assert inner["a"] == [1, 3]
+    assert base["a"] == [1]
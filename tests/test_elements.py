@@ -0,0 +1,22 @@
+from ophinode import *
+
+class _ClassedDiv(DivisionElement):
+    def render_attributes(self, context):
+        rendered = super().render_attributes(context)
+        return ("class=\"x\" " + rendered).strip()
+
+def test_overridden_render_attributes_is_used_without_attributes():
+    assert render_nodes([_ClassedDiv()]) == "<div class=\"x\"></div>"
+    assert render_nodes([_ClassedDiv(id="a")]) == (
+        "<div class=\"x\" id=\"a\"></div>"
+    )
+
+class _Box(DivisionElement):
+    pass
+
+def test_reassigned_tag_is_rendered():
+    _Box.tag = "section"
+    try:
+        assert render_nodes([_Box()]) == "<section></section>"
+    finally:
+        _Box.tag = "div"
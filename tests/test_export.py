@@ -0,0 +1,47 @@
+import gzip
+
+from ophinode import *
+
+class _Page(HTML5Page):
+    def body(self, context):
+        return ParagraphElement("compressible " * 200)
+
+def test_single_str_compression_format_and_suffix(tmp_path):
+    site = Site(
+        {
+            "export_root_path": str(tmp_path),
+            "export_compression_formats": "gzip",
+            "export_compression_file_suffixes": ".html",
+            "export_compression_min_size": 0,
+        },
+        [("/", _Page())],
+    )
+    site.build_site()
+    html = (tmp_path / "index.html").read_bytes()
+    assert gzip.decompress((tmp_path / "index.html.gz").read_bytes()) == html
+
+class _NumberedPage(HTML5Page):
+    def __init__(self, i):
+        self._i = i
+
+    def body(self, context):
+        return ParagraphElement(str(self._i))
+
+def test_partial_rebuild_keeps_page_fields_in_manifest(tmp_path):
+    from ophinode.site.export import load_export_manifest
+
+    site = Site(
+        {
+            "export_root_path": str(tmp_path),
+            "export_manifest_file_name": "manifest.jsonl",
+        },
+        [("/a", _NumberedPage(1)), ("/b", _NumberedPage(2))],
+    )
+    site.build_site()
+    site.build_site(["/a"])
+    entries = load_export_manifest(tmp_path, "manifest.jsonl")
+    assert len(entries) == 2
+    for entry in entries.values():
+        assert entry["page_group"] == "default"
+        assert entry["build_time"] is not None
+    assert sorted(entry["page"] for entry in entries.values()) == ["/a", "/b"]
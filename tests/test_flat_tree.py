@@ -0,0 +1,44 @@
+from ophinode import *
+
+class _Page(HTML5Page):
+    def head(self, context):
+        return TitleElement("title")
+
+    def body(self, context):
+        return [
+            DivisionElement(ParagraphElement("a"), ParagraphElement("b")),
+            "text",
+        ]
+
+def _walk(node, depth, values):
+    values.append((depth, type(node.value).__name__))
+    for child in node.children:
+        assert child.parent.value is node.value
+        _walk(child, depth + 1, values)
+
+def _collect_expanded_values(flat_expanded_pages):
+    collected = {}
+
+    def processor(context):
+        for path in context.get_expanded_page_paths():
+            root = context.get_expanded_page(path)
+            assert root.parent is None
+            values = []
+            _walk(root, 0, values)
+            collected[path] = values
+
+    site = Site(
+        {
+            "flat_expanded_pages": flat_expanded_pages,
+            "auto_write_exported_site_build_files": False,
+        },
+        [("/", _Page())],
+        [("post_expand_pages", processor)],
+    )
+    site.build_site()
+    return collected
+
+def test_processors_walk_flat_expanded_pages_from_root():
+    collected = _collect_expanded_values(True)
+    assert collected == _collect_expanded_values(False)
+    assert len(collected["/"]) > 5
@@ -0,0 +1,52 @@
+import pytest
+
+from ophinode import *
+from ophinode.exceptions import UnresolvedFieldError
+
+_ROWS = [{"name": "a<b", "href": "/x"}, {"name": "c", "href": "/y"}]
+
+def _expected(make_row):
+    return render_nodes([make_row(row) for row in _ROWS])
+
+def test_fields_in_lists_and_comments_are_replaced():
+    def make_row(row):
+        return DivisionElement(
+            [row["name"], [AnchorElement("link", href=row["href"])]],
+            Comment(row["name"]),
+        )
+    template = make_row({"name": Field("name"), "href": Field("href")})
+    assert render_nodes(ForEach(template, _ROWS)) == _expected(make_row)
+
+def test_fields_in_lazy_children_are_replaced():
+    def make_row(row):
+        return UnorderedListElement(
+            LazyChildren(lambda: [ListItemElement(row["name"]), row["href"]])
+        )
+    template = make_row({"name": Field("name"), "href": Field("href")})
+    assert render_nodes(ForEach(template, _ROWS)) == _expected(make_row)
+
+class _Card(Node, Expandable):
+    def __init__(self, title):
+        self.title = title
+
+    def expand(self, context):
+        return [HeadingLevel2Element(self.title)]
+
+def test_unresolved_field_raises():
+    with pytest.raises(UnresolvedFieldError):
+        render_nodes(ForEach(_Card(Field("name")), _ROWS))
+    with pytest.raises(UnresolvedFieldError):
+        render_nodes(DivisionElement(Field("name")))
+
+def test_fields_in_script_and_style_are_escaped():
+    rows = [{"x": "</script><b>"}, {"x": "</style><!--<script>"}]
+    for element_class in (ScriptElement, StyleElement):
+        def make_row(row):
+            return DivisionElement(element_class(row["x"]), row["x"])
+        template = make_row({"x": Field("x")})
+        expected = render_nodes([make_row(row) for row in rows])
+        assert render_nodes(ForEach(template, rows)) == expected
+    rendered = render_nodes(
+        ForEach(ScriptElement(Field("x")), [{"x": "</script><b>"}])
+    )
+    assert rendered == "<script>\\x3C/script><b></script>"
@@ -0,0 +1,54 @@
+from ophinode import *
+
+class _Counter(Node, ClosedRenderable, Preparable):
+    def __init__(self, prepared):
+        self._prepared = prepared
+
+    def prepare(self, context):
+        self._prepared.append(self)
+
+    def render(self, context):
+        return "counted"
+
+def test_generator_children_render_more_than_once():
+    items = ["a", "b"]
+    for children in (
+        (ListItemElement(x) for x in items),
+        LazyChildren(lambda: (ListItemElement(x) for x in items)),
+    ):
+        ul = UnorderedListElement(children=children)
+        first = render_nodes([ul])
+        assert first == render_nodes([ul])
+        assert first == render_nodes([
+            UnorderedListElement(ListItemElement("a"), ListItemElement("b"))
+        ])
+
+def test_lazy_children_of_style_and_script_are_escaped():
+    style = StyleElement(
+        LazyChildren(lambda: (s for s in ["a > b {}</style>"]))
+    )
+    assert "a > b {}\\3C/style>" in render_nodes([style])
+    assert render_nodes([style]) == render_nodes(
+        [StyleElement("a > b {}</style>")]
+    )
+    script = ScriptElement(
+        LazyChildren(lambda: (s for s in ["1 < 2;</script>"]))
+    )
+    assert render_nodes([script]) == render_nodes(
+        [ScriptElement("1 < 2;</script>")]
+    )
+    generated = StyleElement(children=(s for s in ["a > b {}</style>"]))
+    assert "a > b {}\\3C/style>" in render_nodes([generated])
+
+def test_prepare_reaches_lazy_children():
+    prepared = []
+    counters = [_Counter(prepared), _Counter(prepared)]
+    div = DivisionElement(LazyChildren(lambda: iter(counters)))
+    div.prepare(None)
+    assert prepared == counters
+    assert render_nodes([div]).count("counted") == 2
+    del prepared[:]
+    generated = DivisionElement(children=(c for c in counters))
+    assert generated.children == counters
+    generated.prepare(None)
+    assert prepared == counters
@@ -0,0 +1,72 @@
+from ophinode import *
+from ophinode.nodes.fingerprint import fingerprint
+
+class _Box(DivisionElement):
+    def __init__(self, title, **kwargs):
+        super().__init__(**kwargs)
+        self.title = title
+
+class _Card(DivisionElement):
+    def __init__(self, title, **kwargs):
+        super().__init__(**kwargs)
+        self.title = title
+
+    def expand(self, context):
+        return [HeadingLevel2Element(self.title)]
+
+class _Page(HTML5Page):
+    def __init__(self, title):
+        self._title = title
+
+    def body(self, context):
+        return _Card(self._title)
+
+def _build(tmp_path, title):
+    site = Site(
+        {
+            "export_root_path": str(tmp_path / "out"),
+            "page_cache_path": str(tmp_path / "cache"),
+            "return_rendered_pages_after_page_build": True,
+        },
+        [("/index.html", _Page(title))],
+    )
+    return site.build_site().get_rendered_pages()["/index.html"]
+
+def test_changed_subclass_attribute_invalidates_cached_page(tmp_path):
+    assert "\n        a\n" in _build(tmp_path, "a")
+    assert "\n        b\n" in _build(tmp_path, "b")
+    assert _Box("a").fingerprint() != _Box("b").fingerprint()
+    assert DivisionElement("a").fingerprint() is not None
+    assert (
+        DivisionElement("a").fingerprint()
+        == DivisionElement("a").fingerprint()
+    )
+
+def test_subclass_expanding_from_context_is_not_fingerprinted():
+    assert _Card("a").fingerprint() is None
+    assert fingerprint(_Card("a")) is None
+    assert fingerprint([DivisionElement(_Card("a"))]) is None
+
+class _SiteName(Expandable):
+    def expand(self, context):
+        return context.site_data["name"]
+
+class _SiteNamePage(HTML5Page):
+    def body(self, context):
+        return ParagraphElement(_SiteName())
+
+def test_expandable_reading_site_data_is_not_served_from_cache(tmp_path):
+    def build(name):
+        site = Site(
+            {
+                "export_root_path": str(tmp_path / "out"),
+                "page_cache_path": str(tmp_path / "cache"),
+                "return_rendered_pages_after_page_build": True,
+            },
+            [("/index.html", _SiteNamePage())],
+            site_data={"name": name},
+        )
+        return site.build_site().get_rendered_pages()["/index.html"]
+
+    assert "first" in build("first")
+    assert "second" in build("second")
@@ -0,0 +1,66 @@
+import os
+
+from ophinode import *
+
+class _Page(HTML5Page):
+    def __init__(self, i):
+        self._i = i
+
+    def body(self, context):
+        return ParagraphElement(str(self._i))
+
+def _pages():
+    for i in range(50):
+        yield ("/p{}".format(i), _Page(i))
+
+def test_root_context_does_not_hold_page_source_outputs(tmp_path):
+    for build_strategy in ("sync", "parallel"):
+        export_root_path = tmp_path / build_strategy
+        site = Site(
+            {
+                "export_root_path": str(export_root_path),
+                "build_strategy": build_strategy,
+                "parallel_build_workers": 2,
+                "page_source_chunksize": 10,
+            },
+            [("/", _Page(-1))],
+        )
+        site.add_page_source(_pages)
+        context = site.build_site()
+        assert len(os.listdir(export_root_path)) == 51
+        assert "p7.html" in os.listdir(export_root_path)
+        # only the page that is not from the page source is kept
+        assert len(context.get_exported_files()) == 1
+        for result in context._page_build_results.values():
+            assert len(result.get("exported_files", {})) <= 1
+
+def test_export_manifest_is_not_loaded_for_every_chunk(tmp_path, monkeypatch):
+    from ophinode.site import build_contexts, export
+
+    loads = []
+    load_export_manifest = export.load_export_manifest
+
+    def counting_load_export_manifest(*args):
+        loads.append(args)
+        return load_export_manifest(*args)
+
+    monkeypatch.setattr(
+        export, "load_export_manifest", counting_load_export_manifest
+    )
+    monkeypatch.setattr(
+        build_contexts, "load_export_manifest", counting_load_export_manifest
+    )
+    for build in range(2):
+        site = Site(
+            {
+                "export_root_path": str(tmp_path),
+                "export_manifest_file_name": "manifest.jsonl",
+                "page_source_chunksize": 5,
+            },
+            [("/", _Page(-1))],
+        )
+        site.add_page_source(_pages)
+        del loads[:]
+        context = site.build_site()
+        assert len(loads) <= 2
+        assert len(context.get_export_manifest()) == 51
@@ -0,0 +1,45 @@
+import pytest
+
+from ophinode import *
+
+class _Page(HTML5Page):
+    def __init__(self, text):
+        self._text = text
+
+    def body(self, context):
+        return [
+            ParagraphElement(self._text, context.current_page_path)
+            for _ in range(20)
+        ]
+
+def test_interleaved_renders_do_not_share_state():
+    for lazy_expansion in (False, True):
+        renderer = Renderer(lazy_expansion=lazy_expansion)
+        expected_a = renderer.render_page(_Page("a"), "/a")
+        expected_b = renderer.render_page(_Page("b"), "/b")
+        chunks_a = renderer.iter_render_page(_Page("a"), "/a", chunk_size=16)
+        chunks_b = renderer.iter_render_page(_Page("b"), "/b", chunk_size=16)
+        rendered_a = []
+        rendered_b = []
+        for chunk_a, chunk_b in zip(chunks_a, chunks_b):
+            rendered_a.append(chunk_a)
+            rendered_b.append(chunk_b)
+        rendered_a.extend(chunks_a)
+        rendered_b.extend(chunks_b)
+        assert "".join(rendered_a) == expected_a
+        assert "".join(rendered_b) == expected_b
+        assert renderer.render_page(_Page("a"), "/a") == expected_a
+
+class _FailingPage(HTML5Page):
+    def body(self, context):
+        raise ValueError("failed")
+
+def test_context_is_reused_after_failed_render():
+    renderer = Renderer()
+    context = renderer._idle_context
+    with pytest.raises(ValueError):
+        renderer.iter_render_page(_FailingPage(), "/failed")
+    assert renderer._idle_context is context
+    expected = Renderer().render_page(_Page("a"), "/a")
+    assert renderer.render_page(_Page("a"), "/a") == expected
+    assert renderer._idle_context is context
@@ -0,0 +1,52 @@
+import argparse
+
+import ophinode.site.core
+from ophinode.cli.serve import PageServer, add_serve_arguments
+
+_SITE_MODULE = """
+from ophinode import *
+
+class _Page(HTML5Page):
+    def __init__(self, text):
+        self.text = text
+
+    def head(self, context):
+        return []
+
+    def body(self, context):
+        return ParagraphElement(self.text)
+
+site = Site(pages=[("/", _Page("index"))])
+site.add_page_source(lambda: [("/posts/a", _Page("post a"))])
+site.add_asset("/main.css", "p { color: red; }")
+"""
+
+def _create_page_server(tmp_path, module_name):
+    module_path = tmp_path / (module_name + ".py")
+    module_path.write_text(_SITE_MODULE)
+    parser = argparse.ArgumentParser()
+    add_serve_arguments(parser)
+    return PageServer(parser.parse_args([str(module_path)]))
+
+def test_pages_of_page_sources_are_served(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    page_server = _create_page_server(tmp_path, "serve_page_source_site")
+    path, content = page_server.get_file("/posts/a")
+    assert path == "/posts/a.html"
+    assert "post a" in content
+    assert page_server.get_file("/posts/b") == (None, None)
+
+def test_assets_are_hashed_once(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    calls = []
+    fingerprint_assets = ophinode.site.core.fingerprint_assets
+    def counting_fingerprint_assets(*args):
+        calls.append(args)
+        return fingerprint_assets(*args)
+    monkeypatch.setattr(
+        ophinode.site.core, "fingerprint_assets", counting_fingerprint_assets
+    )
+    page_server = _create_page_server(tmp_path, "serve_asset_site")
+    assert "index" in page_server.get_file("/")[1]
+    assert "post a" in page_server.get_file("/posts/a")[1]
+    assert len(calls) == 1
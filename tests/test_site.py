@@ -0,0 +1,43 @@
+import gc
+
+from ophinode import *
+
+def test_add_pages_keeps_garbage_collector_state():
+    paths = ["/p{}".format(i) for i in range(2000)]
+    was_enabled = gc.isenabled()
+    try:
+        gc.disable()
+        Site().add_pages([Page() for _ in paths], paths)
+        assert not gc.isenabled()
+        gc.enable()
+        Site().add_pages([Page() for _ in paths], paths)
+        assert gc.isenabled()
+    finally:
+        if was_enabled:
+            gc.enable()
+        else:
+            gc.disable()
+
+class _CountedPage(HTML5Page):
+    copies = 0
+
+    def head(self, context):
+        return []
+
+    def body(self, context):
+        return []
+
+    def __deepcopy__(self, memo):
+        _CountedPage.copies += 1
+        return _CountedPage()
+
+def test_preserved_build_copies_only_selected_pages():
+    site = Site({
+        "preserve_site_definition_across_builds": True,
+        "auto_write_exported_site_build_files": False,
+    })
+    site.add_pages([("/p{}".format(i), _CountedPage()) for i in range(100)])
+    _CountedPage.copies = 0
+    context = site.build_site(["/p5"])
+    assert list(context.get_exported_files()) == ["//p5.html"]
+    assert _CountedPage.copies == 1
@@ -0,0 +1,37 @@
+from ophinode import *
+
+class _Page(HTML5Page):
+    def __init__(self, children):
+        self._children = children
+
+    def body(self, context):
+        return Div(self._children)
+
+def _render(children, coalesce_text_nodes, flat_expanded_pages):
+    site = Site(
+        {
+            "auto_write_exported_page_build_files": False,
+            "auto_write_exported_site_build_files": False,
+            "return_rendered_pages_after_page_build": True,
+            "coalesce_text_nodes": coalesce_text_nodes,
+            "flat_expanded_pages": flat_expanded_pages,
+        },
+        [("/index.html", _Page(children))],
+    )
+    context = site.build_site()
+    result = context.get_page_build_result("default")
+    return result["rendered_pages"]["/index.html"]
+
+def test_text_nodes_with_different_escape_settings_are_not_merged():
+    children = [
+        TextNode("<b>", escape_tag_delimiters=False),
+        TextNode("hi</b>", escape_tag_delimiters=False),
+        TextNode("<script>user()</script>", escape_tag_delimiters=True),
+        "&",
+        TextNode("<i>", escape_tag_delimiters=False),
+    ]
+    for flat_expanded_pages in (False, True):
+        rendered = _render(children, True, flat_expanded_pages)
+        assert rendered == _render(children, False, flat_expanded_pages)
+        assert "<b>hi</b>&lt;script&gt;" in rendered
+        assert "<script>" not in rendered
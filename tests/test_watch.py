@@ -0,0 +1,72 @@
+import argparse
+
+from ophinode.cli.watch import SiteWatcher, add_watch_arguments
+
+_SITE_MODULE = """
+from ophinode import *
+
+class _Page(HTML5Page):
+    def body(self, context):
+        return ParagraphElement("hello")
+
+site = Site({"export_root_path": "out"}, [("/", _Page())])
+"""
+
+def test_exported_files_do_not_trigger_rebuilds(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    module_path = tmp_path / "watch_export_root_site.py"
+    module_path.write_text(_SITE_MODULE)
+    parser = argparse.ArgumentParser()
+    add_watch_arguments(parser)
+    args = parser.parse_args([
+        str(module_path),
+        "--watch", str(tmp_path),
+        "--export-root-path", str(tmp_path / "out"),
+    ])
+    watcher = SiteWatcher(args)
+    site = watcher.load_site()
+    watcher.take_snapshot()
+    site.build_site()
+    assert (tmp_path / "out" / "index.html").exists()
+    assert watcher.poll() == (None, set())
+    (tmp_path / "content.txt").write_text("changed")
+    assert watcher.poll()[0] == "rebuild"
+
+_COUNTED_SITE_MODULE = """
+from ophinode import *
+
+class _Page(HTML5Page):
+    copies = 0
+
+    def __deepcopy__(self, memo):
+        _Page.copies += 1
+        return _Page()
+
+    def head(self, context):
+        return []
+
+    def body(self, context):
+        return ParagraphElement("hello")
+
+site = Site(
+    {"auto_write_exported_site_build_files": False},
+    [("/p{}".format(i), _Page()) for i in range(100)],
+)
+"""
+
+def test_updates_copy_only_affected_pages(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    module_path = tmp_path / "watch_counted_site.py"
+    module_path.write_text(_COUNTED_SITE_MODULE)
+    parser = argparse.ArgumentParser()
+    add_watch_arguments(parser)
+    args = parser.parse_args([str(module_path)])
+    watcher = SiteWatcher(args)
+    site = watcher.load_site()
+    page_class = watcher.module._Page
+    page_class.copies = 0
+    context = site.build_site({"/p5"})
+    assert list(context.get_exported_files()) == ["//p5.html"]
+    assert page_class.copies == 1
+    site.build_site()
+    assert page_class.copies == 101